@@ -1,82 +1,33 @@
-
 import os
 import json
-import math
+import asyncio
+import contextvars
 import random
-from datetime import datetime
-from dotenv import load_dotenv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from dotenv import load_dotenv, find_dotenv
 
 # Load Env (User must provide GROQ_API_KEY in .env)
-# Load Env (User must provide GROQ_API_KEY in .env)
-# Load Env (User must provide GROQ_API_KEY in .env)
-# We use a try/except block to allow the app to run in "mock" mode if key is missing
-try:
-    from dotenv import load_dotenv, find_dotenv
-    load_dotenv(find_dotenv())
-    from langchain_groq import ChatGroq
-    from langchain_core.tools import tool
-    from langchain.agents import create_tool_calling_agent, AgentExecutor
-    from langchain_core.prompts import ChatPromptTemplate
-    from langchain_community.tools import DuckDuckGoSearchRun
-    HAS_LANGCHAIN = True
-except ImportError as e:
-    HAS_LANGCHAIN = False
-    print(f"LangChain/Groq/Community modules not found. Running in degradation mode. Error: {e}")
+load_dotenv(find_dotenv())
 
-# --- TOOLS ---
+# LangChain, Groq and the community tools are imported lazily by create_agent(),
+# so endpoints that never touch the LLM do not pay for them at cold start.
 
-def calculate_drift_physics(last_known_lat: float, last_known_lon: float, wind_u: float, wind_v: float, hours: float) -> dict:
-    # ... (Keep existing implementation)
-    """
-    Core physics model for drift calculation (EKF-lite).
-    Returns detailed intermediate steps for visualization.
-    """
-    R = 6371000  # Earth radius in meters
-    
-    # Simple drift model: position += velocity * time
-    drift_lat_m = wind_v * 3600 * hours
-    drift_lon_m = wind_u * 3600 * hours
-    
-    # Process noise (stochastic)
-    noise_lat = random.gauss(0, 0.05)
-    noise_lon = random.gauss(0, 0.05)
-    
-    # Coordinate conversion
-    dlat = (drift_lat_m / R) * (180 / math.pi)
-    dlon = (drift_lon_m / (R * math.cos(math.radians(last_known_lat)))) * (180 / math.pi)
-    
-    pred_lat = last_known_lat + dlat + noise_lat
-    pred_lon = last_known_lon + dlon + noise_lon
-    
-    confidence = max(0, 100 - (hours * 2))
-    
-    return {
-        "predicted_lat": round(pred_lat, 4),
-        "predicted_lon": round(pred_lon, 4),
-        "confidence": round(confidence, 1),
-        "drift_vector_m": [round(drift_lat_m, 2), round(drift_lon_m, 2)],
-        "process_noise": [round(noise_lat, 5), round(noise_lon, 5)],
-        "dlat": round(dlat, 5),
-        "dlon": round(dlon, 5)
-    }
+# --- TOOLS ---
 
-from weather_handler import get_weather_data
+from drift_physics import calculate_drift_physics, integrate_drift
+from weather_handler import get_weather_data, get_weather_data_async
+from helpline_index import lookup_helpline
+from terrain import describe_terrain
+from wind_field import wind_fields
+from response_cache import cache_key, get_cached_response, store_response, MISS
 
-@tool
-def ekf_trajectory(last_known_lat: float, last_known_lon: float, wind_u: float = None, wind_v: float = None, hours: float = 6.0) -> str:
-    """
-    Calculates the predicted crash zone using a simplified physics model (EKF-lite).
-    Inputs:
-    - last_known_lat/lon: Decimal degrees
-    - wind_u/v: Zonal/Meridional wind components in m/s (Optional: Will fetch live data if omitted)
-    - hours: Time elapsed since signal loss
-    """
-    
+def _ekf_from_weather(last_known_lat: float, last_known_lon: float, wind_u, wind_v, hours: float, weather) -> str:
     source = "Static Model"
-    
-    # Fetch live weather if wind not provided (or if passed as 0 defaults by LLM)
+
+    # Use live weather if wind not provided (or if passed as 0 defaults by LLM)
     if wind_u is None and wind_v is None:
-        weather = get_weather_data(last_known_lat, last_known_lon)
         if weather:
             wind_u = weather["wind_u"]
             wind_v = weather["wind_v"]
@@ -100,61 +51,52 @@ def ekf_trajectory(last_known_lat: float, last_known_lon: float, wind_u: float =
         "conditions": source
     })
 
-@tool
+def _ekf_from_field(last_known_lat: float, last_known_lon: float, hours: float, field) -> str:
+    # Step through the gridded forecast so the wind can change along the track
+    *_, result = integrate_drift(last_known_lat, last_known_lon, field.sampler(), hours)
+    source = f"Wind Field ({field.name})"
+    return json.dumps({
+        "predicted_lat": result["predicted_lat"],
+        "predicted_lon": result["predicted_lon"],
+        "confidence": f"{result['confidence']}%",
+        "method": f"Physics-based Drift (EKF-lite) using {source}",
+        "conditions": source
+    })
+
+def ekf_trajectory(last_known_lat: float, last_known_lon: float, wind_u: float = None, wind_v: float = None, hours: float = 6.0) -> str:
+    """
+    Calculates the predicted crash zone using a simplified physics model (EKF-lite).
+    Inputs:
+    - last_known_lat/lon: Decimal degrees
+    - wind_u/v: Zonal/Meridional wind components in m/s (Optional: Will use the local forecast grid or fetch live data if omitted)
+    - hours: Time elapsed since signal loss
+    """
+    weather = None
+    if wind_u is None and wind_v is None:
+        field = wind_fields.covering(last_known_lat, last_known_lon)
+        if field is not None:
+            return _ekf_from_field(last_known_lat, last_known_lon, hours, field)
+        weather = get_weather_data(last_known_lat, last_known_lon)
+    return _ekf_from_weather(last_known_lat, last_known_lon, wind_u, wind_v, hours, weather)
+
+async def _ekf_trajectory_async(last_known_lat: float, last_known_lon: float, wind_u: float = None, wind_v: float = None, hours: float = 6.0) -> str:
+    weather = None
+    if wind_u is None and wind_v is None:
+        field = wind_fields.covering(last_known_lat, last_known_lon)
+        if field is not None:
+            return _ekf_from_field(last_known_lat, last_known_lon, hours, field)
+        weather = await get_weather_data_async(last_known_lat, last_known_lon)
+    return _ekf_from_weather(last_known_lat, last_known_lon, wind_u, wind_v, hours, weather)
+
 def lookup_helpline_info(lat: float, lon: float) -> str:
     """
     Finds the nearest Maritime Rescue Coordination Center (MRCC) or emergency contact 
     based on the provided latitude and longitude.
     Returns JSON with 'country', 'agency', and 'number'.
     """
-    # Comprehensive list of MRCCs and emergency contacts
-    mrcc_database = [
-        {"country": "USA", "agency": "US Coast Guard", "number": "+1-800-323-7233", "lat": 38.0, "lon": -77.0, "range": 5000}, # Changed to East/Central
-        {"country": "USA (Pacific)", "agency": "US Coast Guard Pacific Area", "number": "+1-510-437-3701", "lat": 37.0, "lon": -122.0, "range": 3000},
-        {"country": "UK", "agency": "HM Coastguard", "number": "999 / 112", "lat": 54.0, "lon": -2.0, "range": 1000},
-        {"country": "Australia", "agency": "JRCC Australia", "number": "+61-2-6230-6811", "lat": -25.0, "lon": 133.0, "range": 4000},
-        {"country": "New Zealand", "agency": "RCCNZ", "number": "+64-4-577-8030", "lat": -41.0, "lon": 174.0, "range": 2000},
-        {"country": "China", "agency": "China MRCC", "number": "+86-10-6529-2218", "lat": 35.0, "lon": 104.0, "range": 3000},
-        {"country": "India", "agency": "Indian Coast Guard", "number": "1554", "lat": 20.0, "lon": 78.0, "range": 3000},
-        {"country": "Japan", "agency": "Japan Coast Guard", "number": "118", "lat": 36.0, "lon": 138.0, "range": 2000},
-        {"country": "Brazil", "agency": "Salvamar Brasil", "number": "185", "lat": -14.0, "lon": -51.0, "range": 4000},
-        {"country": "South Africa", "agency": "MRCC Cape Town", "number": "+27-21-938-3300", "lat": -30.0, "lon": 25.0, "range": 2500},
-        {"country": "France", "agency": "CROSS Gris-Nez", "number": "+33-3-21-87-21-87", "lat": 46.0, "lon": 2.0, "range": 1500},
-        {"country": "Spain", "agency": "Salvamento Marítimo", "number": "+34-900-202-202", "lat": 40.0, "lon": -4.0, "range": 1000},
-        {"country": "Italy", "agency": "Guardia Costiera", "number": "1530", "lat": 41.0, "lon": 12.0, "range": 1000},
-        {"country": "Canada", "agency": "JRCC Halifax/Victoria", "number": "1-800-567-5111", "lat": 56.0, "lon": -106.0, "range": 5000},
-        {"country": "Russia", "agency": "MRCC Moscow", "number": "+7-495-626-10-52", "lat": 61.0, "lon": 105.0, "range": 6000},
-        {"country": "Indonesia", "agency": "BASARNAS", "number": "115", "lat": -0.7, "lon": 113.9, "range": 3000},
-        {"country": "Philippines", "agency": "Philippine Coast Guard", "number": "+63-2-527-3877", "lat": 12.8, "lon": 121.7, "range": 1500},
-    ]
-
-    # Cast to float to be safe
-    lat = float(lat)
-    lon = float(lon)
-
-    # Find nearest
-    nearest = None
-    min_dist = float('inf')
-
-    for entry in mrcc_database:
-        # Simple Euclidean distance (good enough for this selection logic)
-        dist = ((lat - entry["lat"])**2 + (lon - entry["lon"])**2)**0.5
-        if dist < min_dist:
-            min_dist = dist
-            nearest = entry
-
-    # Provide a fallback if somehow nothing matches (unlikely with this coverage)
-    if not nearest:
-         return "No internal database match found. Please use web search."
+    # Great-circle lookup against the prebuilt MRCC / SAR region index
+    return json.dumps(lookup_helpline(lat, lon))
 
-    return json.dumps({
-        "country": nearest["country"],
-        "agency": nearest["agency"],
-        "number": nearest["number"],
-        "distance_approx": f"{int(min_dist * 111)} km"
-    })
-
-@tool
 def debris_ml_predict(region_name: str) -> str:
     """
     Simulates a query to a debris density ML model for a specific ocean region.
@@ -183,27 +125,104 @@ def debris_ml_predict(region_name: str) -> str:
         "benchmark_accuracy": "92%"
     })
 
-@tool
 def analyze_terrain(lat: float, lon: float) -> str:
     """
-    Analyzes the terrain at the given coordinates using search.
-    Returns a description (e.g., "Ocean", "Desert", "Urban") and nearest landmark.
+    Analyzes the terrain at the given coordinates.
+    Returns a description (e.g., "Ocean", "Coastline", "Land") and, for land, nearby landmarks from search.
     """
-    search = DuckDuckGoSearchRun()
-    query = f"What is the geography and terrain at coordinates {lat}, {lon}? Is it ocean, desert, mountain, or city? Nearest landmark?"
-    
     try:
-        result = search.invoke(query)
-        return result
+        return describe_terrain(lat, lon, enrich=True)
     except Exception as e:
         return f"Terrain analysis failed: {e}"
 
+# --- TOOL RUNTIME ---
+
+# Per-tool time budgets (seconds); web-backed tools get less rope than local ones
+TOOL_TIMEOUT_S = float(os.getenv("TOOL_TIMEOUT_S", "20"))
+TOOL_TIMEOUTS = {
+    "analyze_terrain": float(os.getenv("TERRAIN_TOOL_TIMEOUT_S", "8")),
+    "duckduckgo_search": float(os.getenv("SEARCH_TOOL_TIMEOUT_S", "8")),
+}
+
+# Timings of tool calls made during the current agent run
+_tool_timings = contextvars.ContextVar("tool_timings", default=None)
+_tool_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="agent-tool")
+
+def _record_timing(name: str, start: float, status: str):
+    timings = _tool_timings.get()
+    if timings is not None:
+        timings.append({"tool": name, "ms": round((time.perf_counter() - start) * 1000, 1), "status": status})
+
+def _timed_tool(base_tool):
+    """
+    Wraps a tool with its time budget and timing capture. The async executor
+    runs all tool calls from one LLM turn concurrently (asyncio.gather), so
+    with these budgets one slow tool can no longer hold up the whole turn.
+    """
+    name = base_tool.name
+    timeout = TOOL_TIMEOUTS.get(name, TOOL_TIMEOUT_S)
+
+    async def _arun(**kwargs):
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(base_tool.ainvoke(kwargs), timeout)
+            _record_timing(name, start, "ok")
+            return result
+        except asyncio.TimeoutError:
+            _record_timing(name, start, "timeout")
+            return f"Tool '{name}' timed out after {timeout}s"
+        except Exception as e:
+            _record_timing(name, start, "error")
+            return f"Tool '{name}' failed: {e}"
+
+    def _run(**kwargs):
+        start = time.perf_counter()
+        # Run in a worker so the budget is enforced; the context carries the timings list
+        future = _tool_pool.submit(contextvars.copy_context().run, base_tool.invoke, kwargs)
+        try:
+            result = future.result(timeout=timeout)
+            _record_timing(name, start, "ok")
+            return result
+        except FutureTimeout:
+            _record_timing(name, start, "timeout")
+            return f"Tool '{name}' timed out after {timeout}s"
+        except Exception as e:
+            _record_timing(name, start, "error")
+            return f"Tool '{name}' failed: {e}"
+
+    from langchain_core.tools import StructuredTool
+
+    return StructuredTool.from_function(
+        func=_run,
+        coroutine=_arun,
+        name=name,
+        description=base_tool.description,
+        args_schema=base_tool.args_schema,
+    )
+
 # --- AGENT SETUP ---
 
+def build_tools() -> list:
+    """
+    Wraps the plain tool functions above as LangChain tools.
+    """
+    from langchain_core.tools import tool
+
+    ekf_tool = tool(ekf_trajectory)
+    # Async agent runs await the weather fetch instead of parking a worker thread on it
+    ekf_tool.coroutine = _ekf_trajectory_async
+    return [tool(lookup_helpline_info), ekf_tool, tool(analyze_terrain), tool(debris_ml_predict)]
+
 def create_agent():
-    if not HAS_LANGCHAIN:
+    # We use a try/except block to allow the app to run in "mock" mode if modules are missing
+    try:
+        from langchain_groq import ChatGroq
+        from langchain.agents import create_tool_calling_agent, AgentExecutor
+        from langchain_core.prompts import ChatPromptTemplate
+        from langchain_community.tools import DuckDuckGoSearchRun
+    except ImportError as e:
+        print(f"LangChain/Groq/Community modules not found. Running in degradation mode. Error: {e}")
         return None
-    from langchain.agents import AgentExecutor
 
     api_key = os.getenv("GROQ_API_KEY")
     if not api_key:
@@ -244,17 +263,8 @@ def create_agent():
         print("Initialized Groq Cloud Agent")
 
     search = DuckDuckGoSearchRun()
-    
-    # Wrap search in a structured tool if needed, or pass directly
-    # Using 'tool' decorator or passing the class instance if compatible
-    # But simpler to just use it as is if compatible with create_tool_calling_agent
-    
-    
-    # Define analyze_terrain tool if not already present, or import it.
-    # checking file content from step 2647, it is MISSING.
-    # I need to add the tool definition before create_agent.
-    
-    tools = [lookup_helpline_info, ekf_trajectory, analyze_terrain, debris_ml_predict, search]
+
+    tools = [_timed_tool(t) for t in build_tools() + [search]]
 
     prompt = ChatPromptTemplate.from_messages([
         ("system", "You are an AI Flight Analyst specializing in crash site prediction and rescue coordination. "
@@ -319,8 +329,30 @@ Thought:{agent_scratchpad}""")
     return agent_executor
 
 
-# Singleton instance
-agent_instance = create_agent()
+# Singleton instance, built on first use (or at startup via warm_up_agent)
+agent_instance = None
+_agent_initialized = False
+_agent_lock = threading.Lock()
+
+def get_agent():
+    """
+    Returns the shared agent executor, constructing it on first call.
+    """
+    global agent_instance, _agent_initialized
+    if agent_instance is None and not _agent_initialized:
+        with _agent_lock:
+            if not _agent_initialized:
+                start = time.perf_counter()
+                agent_instance = create_agent()
+                _agent_initialized = True
+                print(f"Agent constructed in {time.perf_counter() - start:.2f}s")
+    return agent_instance
+
+async def warm_up_agent():
+    """
+    Builds the agent in a worker thread so startup is not blocked.
+    """
+    await asyncio.to_thread(get_agent)
 
 def _manual_fallback(query: str):
     """
@@ -336,7 +368,7 @@ def _manual_fallback(query: str):
             lat = float(lat_match.group(1))
             lon = float(lon_match.group(1))
             # Call the tool directly
-            result_json = lookup_helpline_info.invoke({"lat": lat, "lon": lon})
+            result_json = lookup_helpline_info(lat, lon)
             return {"output": result_json}
         except Exception as e:
             print(f"Manual fallback error: {e}")
@@ -350,17 +382,143 @@ def _manual_fallback(query: str):
         })
     }
 
-def run_agent(query: str):
+def run_agent(query: str, use_cache: bool = True, context: dict = None):
+    """
+    Runs the agent on a query. Successful answers are cached by normalized
+    query plus 'context' (the tool inputs the answer depends on); pass
+    use_cache=False to force a fresh run.
+    """
+    key = cache_key(query, context)
+    if use_cache:
+        cached = get_cached_response(key)
+        if cached is not MISS:
+            return {**cached, "cached": True}
+
     # 1. Try Agent if initialized
-    if agent_instance:
+    executor = get_agent()
+    if executor:
+        timings = []
+        token = _tool_timings.set(timings)
         try:
-            result = agent_instance.invoke({"input": query})
-            return result
+            result = executor.invoke({"input": query})
+            store_response(key, result)
+            return {**result, "tool_timings": timings}
         except Exception as e:
             print(f"Agent runtime error: {e}. Switching to fallback.")
             # Fall through to fallback
             pass
+        finally:
+            _tool_timings.reset(token)
     
     # 2. Fallback
     return _manual_fallback(query)
 
+
+
+# Concurrency limits for async agent runs: at most LLM_MAX_CONCURRENCY calls in
+# flight, at most LLM_MAX_QUEUE waiting for a slot, each bounded by LLM_TIMEOUT_S.
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "16"))
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "60"))
+
+class AgentSaturated(Exception):
+    """
+    Raised when the async agent queue is full; carries the current queue depth.
+    """
+    def __init__(self, queue_depth: int):
+        super().__init__(f"Agent saturated ({queue_depth} requests queued)")
+        self.queue_depth = queue_depth
+
+class _LLMGate:
+    """
+    Semaphore plus queue-depth accounting for async agent calls.
+    """
+    def __init__(self, limit: int, max_queue: int):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._semaphore = None
+        self._loop = None
+
+    def _sem(self):
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.limit)
+            self._loop = loop
+        return self._semaphore
+
+    async def run(self, coro_factory, timeout: float):
+        if self.active + self.waiting >= self.limit + self.max_queue:
+            self.rejected += 1
+            raise AgentSaturated(self.waiting)
+        # The timeout covers both the wait for a slot and the run itself
+        deadline = asyncio.get_running_loop().time() + timeout
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._sem().acquire(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        try:
+            remaining = max(deadline - asyncio.get_running_loop().time(), 0.001)
+            return await asyncio.wait_for(coro_factory(), remaining)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.active -= 1
+            self._sem().release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.limit,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "queued": self.waiting,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+        }
+
+llm_gate = _LLMGate(LLM_MAX_CONCURRENCY, LLM_MAX_QUEUE)
+
+async def run_agent_async(query: str, use_cache: bool = True, context: dict = None, timeout: float = LLM_TIMEOUT_S):
+    """
+    Async counterpart of run_agent for use inside the event loop.
+    Uses the executor's ainvoke behind llm_gate, so a burst of LLM calls
+    neither blocks the loop nor ties up threadpool workers. Raises
+    AgentSaturated when the queue is full; timeouts cancel the run and fall
+    back like any other agent error.
+    """
+    key = cache_key(query, context)
+    if use_cache:
+        cached = get_cached_response(key)
+        if cached is not MISS:
+            return {**cached, "cached": True}
+
+    # 1. Try Agent if initialized
+    # First use builds the agent (LangChain imports included) off the event loop
+    executor = agent_instance if _agent_initialized or agent_instance is not None else await asyncio.to_thread(get_agent)
+    if executor:
+        timings = []
+        token = _tool_timings.set(timings)
+        try:
+            result = await llm_gate.run(lambda: executor.ainvoke({"input": query}), timeout)
+            store_response(key, result)
+            return {**result, "tool_timings": timings}
+        except AgentSaturated:
+            raise
+        except asyncio.TimeoutError:
+            print(f"Agent timed out after {timeout}s. Switching to fallback.")
+        except Exception as e:
+            print(f"Agent runtime error: {e}. Switching to fallback.")
+        finally:
+            _tool_timings.reset(token)
+
+    # 2. Fallback
+    return _manual_fallback(query)
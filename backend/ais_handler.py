@@ -1,13 +1,33 @@
 import asyncio
 import json
+import re
+import time
 import websockets
 from datetime import datetime
 import os
 import math
 import ssl
 
+import numpy as np
+
+# Optional fast JSON backend for frame decoding
+try:
+    import orjson
+    _json_loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    _json_loads = json.loads
+    JSON_BACKEND = "json"
+
 # AISStream API Key
-API_KEY = "66abbba48159a809cb31be6019067fb19bdeb031"
+API_KEY = os.getenv("AISSTREAM_API_KEY", "66abbba48159a809cb31be6019067fb19bdeb031")
+AIS_STREAM_URL = os.getenv("AIS_STREAM_URL", "wss://stream.aisstream.io/v0/stream")
+
+# Background ingestion: positions older than AIS_STALE_SECONDS are dropped,
+# AIS_BBOX ("min_lat,min_lon,max_lat,max_lon") narrows the live subscription.
+AIS_STALE_SECONDS = float(os.getenv("AIS_STALE_SECONDS", "900"))
+AIS_GRID_DEG = float(os.getenv("AIS_GRID_DEG", "1.0"))
+AIS_BBOX = os.getenv("AIS_BBOX", "-90,-180,90,180")
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     R = 6371  # Earth radius in km
@@ -19,12 +39,373 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
     return R * c
 
-async def fetch_nearby_ships(lat, lon, radius_km=300):
+def _ssl_context(uri):
+    if not uri.startswith("wss://"):
+        return None
+    ssl_context = ssl.create_default_context()
+    ssl_context.check_hostname = False
+    ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+def parse_position_frame(data):
+    """
+    Extracts (mmsi, lat, lon, name, callsign) from a decoded AISStream
+    PositionReport message, or returns None for any other message.
+    """
+    if "Message" not in data or "PositionReport" not in data["Message"]:
+        return None
+    report = data["Message"]["PositionReport"]
+    meta = data.get("MetaData", {})
+    mmsi = report["UserID"]
+    name = (meta.get("ShipName") or f"Unknown Vessel {mmsi}").strip()
+    return mmsi, report["Latitude"], report["Longitude"], name, meta.get("CallSign", "N/A")
+
+# Cheap field probes used to reject frames before a full JSON parse
+_LAT_RE = re.compile(r'"Latitude"\s*:\s*(-?[0-9.eE+-]+)')
+_LON_RE = re.compile(r'"Longitude"\s*:\s*(-?[0-9.eE+-]+)')
+_LAT_RE_B = re.compile(_LAT_RE.pattern.encode())
+_LON_RE_B = re.compile(_LON_RE.pattern.encode())
+
+class FrameStats:
+    """
+    Frame counters for sizing the ingestion worker: totals since start plus
+    the rate over the last completed one-second window.
+    """
+    FIELDS = ("received", "decoded", "rejected", "accepted", "errors")
+
+    def __init__(self):
+        self.started = time.time()
+        self.totals = dict.fromkeys(self.FIELDS, 0)
+        self._window_start = int(self.started)
+        self._window = dict.fromkeys(self.FIELDS, 0)
+        self._last_window = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, field, n=1):
+        now = int(time.time())
+        if now != self._window_start:
+            # Only the immediately preceding second counts as "last"; gaps read as zero
+            self._last_window = self._window if now == self._window_start + 1 else dict.fromkeys(self.FIELDS, 0)
+            self._window = dict.fromkeys(self.FIELDS, 0)
+            self._window_start = now
+        self._window[field] += n
+        self.totals[field] += n
+
+    def snapshot(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            "json_backend": JSON_BACKEND,
+            "totals": dict(self.totals),
+            "avg_per_s": {k: round(v / elapsed, 1) for k, v in self.totals.items()},
+            "last_second": dict(self._last_window),
+        }
+
+frame_stats = FrameStats()
+
+def _in_bbox(lat, lon, bbox):
+    min_lat, min_lon, max_lat, max_lon = bbox
+    if not (min_lat <= lat <= max_lat):
+        return False
+    if min_lon <= max_lon:
+        return min_lon <= lon <= max_lon
+    return lon >= min_lon or lon <= max_lon  # box wraps the antimeridian
+
+def radius_bbox(lat, lon, radius_km):
+    """
+    (min_lat, min_lon, max_lat, max_lon) enclosing a radius; longitudes wrap.
+    """
+    dlat = radius_km / 111.0
+    cos_lat = math.cos(math.radians(min(abs(lat) + dlat, 89.9)))
+    dlon = radius_km / (111.0 * max(cos_lat, 1e-6))
+    if dlon >= 180 or abs(lat) + dlat >= 90:
+        return (max(lat - dlat, -90.0), -180.0, min(lat + dlat, 90.0), 180.0)
+    min_lon = (lon - dlon + 180) % 360 - 180
+    max_lon = (lon + dlon + 180) % 360 - 180
+    return (lat - dlat, min_lon, lat + dlat, max_lon)
+
+def decode_position_frame(raw, bbox=None, stats=frame_stats):
+    """
+    Fast path for a raw AISStream frame (str or bytes).
+    Non-position frames and, when 'bbox' is given, positions outside it are
+    rejected from a regex probe without a full JSON parse. Surviving frames
+    are decoded with the fastest available JSON backend.
+    Returns parse_position_frame()'s tuple, or None.
+    """
+    stats.add("received")
+    is_bytes = isinstance(raw, (bytes, bytearray))
+    if ("PositionReport" not in raw) if not is_bytes else (b"PositionReport" not in raw):
+        stats.add("rejected")
+        return None
+
+    if bbox is not None:
+        lat_m = (_LAT_RE_B if is_bytes else _LAT_RE).search(raw)
+        lon_m = (_LON_RE_B if is_bytes else _LON_RE).search(raw)
+        if lat_m and lon_m:
+            try:
+                if not _in_bbox(float(lat_m.group(1)), float(lon_m.group(1)), bbox):
+                    stats.add("rejected")
+                    return None
+            except ValueError:
+                pass  # malformed probe, let the full parser decide
+
+    try:
+        parsed = parse_position_frame(_json_loads(raw))
+    except Exception:
+        stats.add("errors")
+        raise
+    stats.add("decoded")
+    if parsed is None or (bbox is not None and not _in_bbox(parsed[1], parsed[2], bbox)):
+        stats.add("rejected")
+        return None
+    stats.add("accepted")
+    return parsed
+
+def ship_record(mmsi, name, ship_lat, ship_lon, callsign, dist):
+    return {
+        "mmsi": mmsi,
+        "name": name,
+        "lat": ship_lat,
+        "lon": ship_lon,
+        "distance_km": round(dist, 2),
+        "type": "Ship",
+        "callsign": callsign,
+        "contact": f"MMSI: {mmsi} // VHF Ch. 16"
+    }
+
+class VesselIndex:
+    """
+    Live vessel table keyed by MMSI with a lat/lon grid index on top, so
+    radius queries only look at vessels in nearby cells.
+    """
+
+    def __init__(self, cell_deg=AIS_GRID_DEG, stale_seconds=AIS_STALE_SECONDS):
+        self.cell_deg = cell_deg
+        self.stale_seconds = stale_seconds
+        self.vessels = {}  # mmsi -> dict(lat, lon, name, callsign, seen, cell)
+        self.cells = {}    # (row, col) -> set of mmsi
+        self.n_cols = int(round(360 / cell_deg))
+
+    def _cell(self, lat, lon):
+        row = int(math.floor((lat + 90) / self.cell_deg))
+        col = int(math.floor((lon + 180) / self.cell_deg)) % self.n_cols
+        return row, col
+
+    def upsert(self, mmsi, lat, lon, name, callsign, seen=None):
+        seen = time.time() if seen is None else seen
+        cell = self._cell(lat, lon)
+        vessel = self.vessels.get(mmsi)
+        if vessel is not None and vessel["cell"] != cell:
+            self._unlink(mmsi, vessel["cell"])
+        if vessel is None or vessel["cell"] != cell:
+            self.cells.setdefault(cell, set()).add(mmsi)
+        self.vessels[mmsi] = {"lat": lat, "lon": lon, "name": name, "callsign": callsign, "seen": seen, "cell": cell}
+
+    def _unlink(self, mmsi, cell):
+        members = self.cells.get(cell)
+        if members is not None:
+            members.discard(mmsi)
+            if not members:
+                del self.cells[cell]
+
+    def expire(self, now=None):
+        """
+        Drops vessels whose last report is older than stale_seconds.
+        """
+        cutoff = (time.time() if now is None else now) - self.stale_seconds
+        stale = [mmsi for mmsi, v in self.vessels.items() if v["seen"] < cutoff]
+        for mmsi in stale:
+            self._unlink(mmsi, self.vessels.pop(mmsi)["cell"])
+        return len(stale)
+
+    def candidates(self, lat, lon, radius_km):
+        """
+        MMSIs in the grid cells overlapping the radius' bounding box.
+        """
+        dlat = radius_km / 111.0
+        cos_lat = math.cos(math.radians(min(abs(lat) + dlat, 89.9)))
+        dlon = min(radius_km / (111.0 * max(cos_lat, 1e-6)), 180.0)
+
+        row_lo, _ = self._cell(max(lat - dlat, -90.0), lon)
+        row_hi, _ = self._cell(min(lat + dlat, 89.999), lon)
+        col_span = int(math.ceil(dlon / self.cell_deg))
+        _, col_c = self._cell(lat, lon)
+        cols = {(col_c + k) % self.n_cols for k in range(-col_span, col_span + 1)}
+
+        for row in range(row_lo, row_hi + 1):
+            for col in cols:
+                members = self.cells.get((row, col))
+                if members:
+                    yield from members
+
+    def query_radius(self, lat, lon, radius_km, limit=None):
+        """
+        Vessels within radius_km, nearest first, optionally only the closest 'limit'.
+        """
+        now = time.time()
+        cutoff = now - self.stale_seconds
+        fresh = [mmsi for mmsi in self.candidates(lat, lon, radius_km) if self.vessels[mmsi]["seen"] >= cutoff]
+        if not fresh:
+            return []
+
+        lats = np.fromiter((self.vessels[m]["lat"] for m in fresh), dtype=float, count=len(fresh))
+        lons = np.fromiter((self.vessels[m]["lon"] for m in fresh), dtype=float, count=len(fresh))
+        idx, dists = nearest_k(lat, lon, lats, lons, k=limit, radius_km=radius_km)
+
+        ships = []
+        for i, dist in zip(idx.tolist(), dists.tolist()):
+            mmsi = fresh[i]
+            v = self.vessels[mmsi]
+            record = ship_record(mmsi, v["name"], v["lat"], v["lon"], v["callsign"], dist)
+            record["age_s"] = round(now - v["seen"], 1)
+            ships.append(record)
+        return ships
+
+    def __len__(self):
+        return len(self.vessels)
+
+class AISIngestor:
+    """
+    Long-lived AISStream consumer. Runs as a background task, keeps the
+    VesselIndex current and reconnects with backoff when the stream drops.
+    """
+
+    def __init__(self, index, uri=AIS_STREAM_URL, bbox=AIS_BBOX, stats=frame_stats):
+        self.index = index
+        self.uri = uri
+        self.bbox = [float(x) for x in bbox.split(",")]
+        # Client-side area filter only pays off when the subscription is not global
+        self.area = None if self.bbox == [-90.0, -180.0, 90.0, 180.0] else tuple(self.bbox)
+        self.frame_stats = stats
+        self.task = None
+        self.connected = False
+        self.frames = 0
+        self.reconnects = 0
+        self.last_frame_at = None
+
+    @property
+    def running(self):
+        return self.task is not None and not self.task.done()
+
+    @property
+    def ready(self):
+        return self.running and self.frames > 0
+
+    def start(self):
+        if not self.running:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+        return self.task
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+        self.connected = False
+
+    def handle_message(self, message):
+        self.frames += 1
+        self.last_frame_at = time.time()
+        parsed = decode_position_frame(message, self.area, self.frame_stats)
+        if parsed is not None:
+            mmsi, ship_lat, ship_lon, name, callsign = parsed
+            self.index.upsert(mmsi, ship_lat, ship_lon, name, callsign, self.last_frame_at)
+
+    async def _run(self):
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        subscription_message = {
+            "Apikey": API_KEY,
+            "BoundingBoxes": [[[min_lat, min_lon], [max_lat, max_lon]]],
+            "FiltersShipMMSI": [],
+            "FilterMessageTypes": ["PositionReport"]
+        }
+        backoff = 1.0
+        last_expire = time.time()
+        while True:
+            try:
+                async with websockets.connect(self.uri, ssl=_ssl_context(self.uri)) as websocket:
+                    await websocket.send(json.dumps(subscription_message))
+                    self.connected = True
+                    backoff = 1.0
+                    async for message in websocket:
+                        try:
+                            self.handle_message(message)
+                        except Exception as e:
+                            print(f"Frame error: {e}")
+                        if self.last_frame_at - last_expire > 30:
+                            self.index.expire()
+                            last_expire = self.last_frame_at
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"AIS ingestion connection error: {e}")
+            self.connected = False
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "connected": self.connected,
+            "vessels": len(self.index),
+            "frames": self.frames,
+            "reconnects": self.reconnects,
+            "last_frame_age_s": round(time.time() - self.last_frame_at, 1) if self.last_frame_at else None,
+        }
+
+vessel_index = VesselIndex()
+ingestor = AISIngestor(vessel_index)
+
+def haversine_np(lat1, lon1, lat2, lon2):
+    """
+    Vectorized haversine distance in km. Arguments may be scalars or NumPy
+    arrays and broadcast against each other.
+    """
+    R = 6371  # Earth radius in km
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(x, dtype=float)) for x in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + \
+        np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * R * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def nearest_k(lat, lon, lats, lons, k=None, radius_km=None):
+    """
+    Indices and distances of the k closest positions (all of them when k is
+    None), nearest first. Uses argpartition so only the top k get sorted.
+    """
+    dists = haversine_np(lat, lon, lats, lons)
+    idx = np.arange(dists.size)
+    if radius_km is not None:
+        idx = idx[dists <= radius_km]
+    if k is not None and k < idx.size:
+        idx = idx[np.argpartition(dists[idx], k - 1)[:k]]
+    idx = idx[np.argsort(dists[idx], kind="stable")]
+    return idx, dists[idx]
+
+async def fetch_nearby_ships(lat, lon, radius_km=300, limit=None):
+    """
+    Returns unique ships within the specified radius, nearest first
+    (only the closest 'limit' when given).
+    Served from the live vessel table when the background ingestor is up;
+    otherwise connects to AISStream.io and listens for 3 seconds.
+    """
+    if ingestor.ready:
+        return vessel_index.query_radius(lat, lon, radius_km, limit=limit)
+
+    ships = await fetch_snapshot_ships(lat, lon, radius_km)
+    if not ships:
+        return ships
+    idx, _ = nearest_k(lat, lon, [s["lat"] for s in ships], [s["lon"] for s in ships], k=limit)
+    return [ships[i] for i in idx.tolist()]
+
+async def fetch_snapshot_ships(lat, lon, radius_km=300):
     """
     Connects to AISStream.io, listens for 3 seconds, and returns unique ships
-    within the specified radius.
+    within the specified radius. Raises if the stream cannot be reached.
     """
     ships = {}
+    area = radius_bbox(lat, lon, radius_km)
     
     # Calculate bounding box (approximate 1 deg = 111km)
     # Increase to 3 degrees (~330km) to ensure we find ships even in open ocean
@@ -44,10 +425,8 @@ async def fetch_nearby_ships(lat, lon, radius_km=300):
     }
 
     async def connect_and_listen():
-        uri = "wss://stream.aisstream.io/v0/stream"
-        ssl_context = ssl.create_default_context()
-        ssl_context.check_hostname = False
-        ssl_context.verify_mode = ssl.CERT_NONE
+        uri = AIS_STREAM_URL
+        ssl_context = _ssl_context(uri)
         
         # print(f"Connecting to AIS Stream with bbox: {min_lat}, {min_lon} to {max_lat}, {max_lon}")
         try:
@@ -61,30 +440,16 @@ async def fetch_nearby_ships(lat, lon, radius_km=300):
                 while asyncio.get_event_loop().time() < end_time:
                     try:
                         message = await asyncio.wait_for(websocket.recv(), timeout=0.5)
-                        data = json.loads(message)
-                        
-                        if "Message" in data and "PositionReport" in data["Message"]:
-                            report = data["Message"]["PositionReport"]
-                            meta = data["MetaData"]
-                            
-                            mmsi = report["UserID"]
-                            ship_lat = report["Latitude"]
-                            ship_lon = report["Longitude"]
+                        # Frames outside the search radius' box are dropped before parsing
+                        parsed = decode_position_frame(message, area)
+                        if parsed is not None:
+                            mmsi, ship_lat, ship_lon, name, callsign = parsed
                             
                             # Calculate distance
                             dist = haversine_distance(lat, lon, ship_lat, ship_lon)
                             
                             if dist <= radius_km:
-                                ships[mmsi] = {
-                                    "mmsi": mmsi,
-                                    "name": meta.get("ShipName", f"Unknown Vessel {mmsi}").strip(),
-                                    "lat": ship_lat,
-                                    "lon": ship_lon,
-                                    "distance_km": round(dist, 2),
-                                    "type": "Ship",
-                                    "callsign": meta.get("CallSign", "N/A"),
-                                    "contact": f"MMSI: {mmsi} // VHF Ch. 16"
-                                }
+                                ships[mmsi] = ship_record(mmsi, name, ship_lat, ship_lon, callsign, dist)
                     except asyncio.TimeoutError:
                         continue
                     except Exception as e:
@@ -92,7 +457,9 @@ async def fetch_nearby_ships(lat, lon, radius_km=300):
                         break
                         
         except Exception as e:
+            # An unreachable stream is not "no ships nearby"; let callers report it
             print(f"Connection error: {e}")
+            raise
             
     await connect_and_listen()
     return list(ships.values())
@@ -0,0 +1,265 @@
+"""
+AIS frame recorder and deterministic replay harness.
+
+Recordings are append-only files: an 8-byte magic header followed by one
+record per frame, each a big-endian (float64 receive time, uint32 length)
+prefix and the raw frame bytes exactly as they came off the websocket.
+
+    python ais_replay.py record capture.aisrec --seconds 300
+    python ais_replay.py synth capture.aisrec --frames 200000 --vessels 20000
+    python ais_replay.py serve capture.aisrec --port 8765 --speed 10
+    python ais_replay.py bench capture.aisrec
+
+Point the backend at a replay server with AIS_STREAM_URL=ws://127.0.0.1:8765.
+"""
+import argparse
+import asyncio
+import json
+import os
+import struct
+import time
+import tracemalloc
+
+import numpy as np
+import websockets
+from websockets.asyncio.server import serve
+
+from ais_handler import AIS_STREAM_URL, AIS_BBOX, API_KEY, JSON_BACKEND, AISIngestor, FrameStats, VesselIndex, _ssl_context, decode_position_frame
+
+MAGIC = b"AISREC1\n"
+RECORD_HEADER = struct.Struct(">dI")
+
+
+class FrameRecorder:
+    """
+    Appends raw AIS frames to a recording file.
+    """
+
+    def __init__(self, path):
+        new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, "ab")
+        if new_file:
+            self.file.write(MAGIC)
+        self.frames = 0
+
+    def write(self, frame, ts=None):
+        if isinstance(frame, str):
+            frame = frame.encode("utf-8")
+        self.file.write(RECORD_HEADER.pack(time.time() if ts is None else ts, len(frame)))
+        self.file.write(frame)
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_frames(path):
+    """
+    Yields (receive_time, frame_bytes) for every frame in a recording.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an AIS recording")
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            ts, length = RECORD_HEADER.unpack(header)
+            frame = f.read(length)
+            if len(frame) < length:
+                return  # truncated tail from an interrupted recording
+            yield ts, frame
+
+
+async def record(path, uri=AIS_STREAM_URL, seconds=60.0, bbox=AIS_BBOX):
+    """
+    Records the live stream for 'seconds' and returns the number of frames.
+    """
+    min_lat, min_lon, max_lat, max_lon = [float(x) for x in bbox.split(",")]
+    subscription_message = {
+        "Apikey": API_KEY,
+        "BoundingBoxes": [[[min_lat, min_lon], [max_lat, max_lon]]],
+        "FiltersShipMMSI": [],
+        "FilterMessageTypes": ["PositionReport"]
+    }
+    with FrameRecorder(path) as recorder:
+        async with websockets.connect(uri, ssl=_ssl_context(uri)) as websocket:
+            await websocket.send(json.dumps(subscription_message))
+            end_time = asyncio.get_running_loop().time() + seconds
+            while True:
+                remaining = end_time - asyncio.get_running_loop().time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(websocket.recv(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                recorder.write(message)
+        return recorder.frames
+
+
+def synthesize(path, frames=100_000, vessels=10_000, seed=0):
+    """
+    Writes a synthetic recording of PositionReport frames (vessels drifting
+    around random start points), for load tests on machines with no network.
+    """
+    rng = np.random.default_rng(seed)
+    mmsi = 200_000_000 + np.arange(vessels)
+    lats = rng.uniform(-60, 60, vessels)
+    lons = rng.uniform(-180, 180, vessels)
+    picks = rng.integers(0, vessels, frames)
+    steps = rng.normal(0, 0.001, (frames, 2))
+    start = time.time()
+
+    with FrameRecorder(path) as recorder:
+        for i, (v, (dlat, dlon)) in enumerate(zip(picks.tolist(), steps.tolist())):
+            lats[v] += dlat
+            lons[v] += dlon
+            recorder.write(json.dumps({
+                "MessageType": "PositionReport",
+                "MetaData": {
+                    "MMSI": int(mmsi[v]), "ShipName": f"SYNTH {v:05d}", "CallSign": f"S{v:05d}",
+                    "latitude": round(float(lats[v]), 6), "longitude": round(float(lons[v]), 6),
+                    "time_utc": "2024-01-01 00:00:00.000000000 +0000 UTC"
+                },
+                "Message": {"PositionReport": {
+                    "UserID": int(mmsi[v]), "Latitude": round(float(lats[v]), 6),
+                    "Longitude": round(float(lons[v]), 6), "Sog": 10.0, "Cog": 90.0,
+                    "TrueHeading": 90, "NavigationalStatus": 0, "Valid": True
+                }}
+            }), ts=start + i * 0.001)
+        return recorder.frames
+
+
+def _replay_handler(path, speed, repeat):
+    async def handler(websocket):
+        await websocket.recv()  # subscription message, ignored
+        while True:
+            first_ts = None
+            started = time.perf_counter()
+            for ts, frame in read_frames(path):
+                if speed > 0:
+                    if first_ts is None:
+                        first_ts = ts
+                    delay = (ts - first_ts) / speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                await websocket.send(frame.decode("utf-8"))
+            if not repeat:
+                break
+        await websocket.close()
+    return handler
+
+
+async def serve_replay(path, host="127.0.0.1", port=8765, speed=1.0, repeat=False):
+    """
+    Starts a websocket server that replays a recording to every client.
+    speed is a time multiplier (1 = real time, 10 = 10x); 0 sends as fast as possible.
+    Returns the running server (use 'async with' or .close()).
+    """
+    return await serve(_replay_handler(path, speed, repeat), host, port)
+
+
+def bench(path, area=(-10.0, -10.0, 10.0, 10.0)):
+    """
+    Offline ingestion benchmark: frame-parse throughput, json.loads cost,
+    fast-path decode cost with an area filter, and memory per tracked vessel.
+    """
+    frames = [frame for _, frame in read_frames(path)]
+    n = len(frames)
+    if not n:
+        return {"frames": 0}
+    size = sum(len(f) for f in frames)
+
+    start = time.perf_counter()
+    for frame in frames:
+        json.loads(frame)
+    json_s = time.perf_counter() - start
+
+    area_stats = FrameStats()
+    start = time.perf_counter()
+    for frame in frames:
+        decode_position_frame(frame, area, area_stats)
+    area_s = time.perf_counter() - start
+
+    ingestor = AISIngestor(VesselIndex())
+    start = time.perf_counter()
+    for frame in frames:
+        ingestor.handle_message(frame)
+    ingest_s = time.perf_counter() - start
+
+    # Second pass under tracemalloc (which slows things down) just for memory
+    index = VesselIndex()
+    ingestor = AISIngestor(index)
+    tracemalloc.start()
+    for frame in frames:
+        ingestor.handle_message(frame)
+    index_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "frames": n,
+        "avg_frame_bytes": round(size / n, 1),
+        "json_loads_us_per_frame": round(json_s / n * 1e6, 2),
+        "json_backend": JSON_BACKEND,
+        "area_decode_us_per_frame": round(area_s / n * 1e6, 2),
+        "area_accepted": area_stats.totals["accepted"],
+        "ingest_frames_per_s": round(n / ingest_s),
+        "ingest_us_per_frame": round(ingest_s / n * 1e6, 2),
+        "vessels": len(index),
+        "bytes_per_vessel": round(index_bytes / max(len(index), 1)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("record", help="record the live AISStream feed")
+    p.add_argument("path")
+    p.add_argument("--seconds", type=float, default=60)
+    p.add_argument("--uri", default=AIS_STREAM_URL)
+    p.add_argument("--bbox", default=AIS_BBOX)
+
+    p = sub.add_parser("synth", help="write a synthetic recording")
+    p.add_argument("path")
+    p.add_argument("--frames", type=int, default=100_000)
+    p.add_argument("--vessels", type=int, default=10_000)
+    p.add_argument("--seed", type=int, default=0)
+
+    p = sub.add_parser("serve", help="replay a recording over a local websocket")
+    p.add_argument("path")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--speed", type=float, default=1.0, help="1 = real time, 10 = 10x, 0 = max")
+    p.add_argument("--repeat", action="store_true")
+
+    p = sub.add_parser("bench", help="offline parse/ingest benchmark")
+    p.add_argument("path")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        n = asyncio.run(record(args.path, args.uri, args.seconds, args.bbox))
+        print(f"Recorded {n} frames to {args.path}")
+    elif args.command == "synth":
+        n = synthesize(args.path, args.frames, args.vessels, args.seed)
+        print(f"Wrote {n} synthetic frames to {args.path}")
+    elif args.command == "serve":
+        async def run():
+            async with await serve_replay(args.path, args.host, args.port, args.speed, args.repeat):
+                print(f"Replaying {args.path} on ws://{args.host}:{args.port} at speed {args.speed or 'max'}")
+                await asyncio.Future()
+        asyncio.run(run())
+    elif args.command == "bench":
+        print(json.dumps(bench(args.path), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Microbenchmark: scalar vs vectorized vessel distance and nearest-vessel queries.
+
+For each fleet size it times
+  - scalar:     haversine_distance() per vessel + full Python sort
+  - vectorized: haversine_np() over the whole array + argpartition top-k
+
+Usage: python bench_haversine.py [--sizes 1000 100000 1000000] [--k 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from ais_handler import haversine_distance, haversine_np, nearest_k
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    lat, lon = 10.0, 60.0
+    print(f"{'vessels':>10} {'scalar dist':>12} {'numpy dist':>12} {'scalar top-k':>13} {'numpy top-k':>12}")
+
+    for n in args.sizes:
+        lats = rng.uniform(-80, 80, n)
+        lons = rng.uniform(-180, 180, n)
+        lat_list, lon_list = lats.tolist(), lons.tolist()
+        repeats = 5 if n <= 100_000 else 1
+
+        scalar_dist = best_of(lambda: [haversine_distance(lat, lon, a, b) for a, b in zip(lat_list, lon_list)], repeats)
+        vector_dist = best_of(lambda: haversine_np(lat, lon, lats, lons), repeats)
+
+        def scalar_topk():
+            dists = [(haversine_distance(lat, lon, a, b), i) for i, (a, b) in enumerate(zip(lat_list, lon_list))]
+            dists.sort()
+            return dists[:args.k]
+
+        scalar_knn = best_of(scalar_topk, repeats)
+        vector_knn = best_of(lambda: nearest_k(lat, lon, lats, lons, k=args.k), repeats)
+
+        # Both paths must agree on the answer
+        assert [i for _, i in scalar_topk()] == nearest_k(lat, lon, lats, lons, k=args.k)[0].tolist()
+
+        print(f"{n:>10} {scalar_dist * 1000:>10.2f}ms {vector_dist * 1000:>10.2f}ms "
+              f"{scalar_knn * 1000:>11.2f}ms {vector_knn * 1000:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Latency benchmark for weather lookups under concurrent load.
+
+Starts a local stub OpenWeatherMap server (no network or API key needed) and
+fires N concurrent lookups through:
+  - legacy: bare requests.get per call on a 40-worker pool (Starlette's default)
+  - async:  get_weather_data_async (shared pool + cache + request coalescing)
+
+Usage: python bench_weather.py [--requests 100] [--cells 10] [--delay-ms 50]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import requests
+
+STUB_DELAY_S = 0.05
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        time.sleep(STUB_DELAY_S)
+        body = json.dumps({
+            "wind": {"speed": 8.0, "deg": 45},
+            "weather": [{"description": "stub"}],
+            "main": {"temp": 20.0},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    # The default listen backlog (5) makes bursts of connects stall on SYN retries
+    request_queue_size = 256
+
+
+def start_stub_server():
+    server = StubServer(("127.0.0.1", 0), StubWeatherHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/weather"
+
+
+def percentiles(samples):
+    arr = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(arr, 50)), 1),
+            "p99_ms": round(float(np.percentile(arr, 99)), 1),
+            "max_ms": round(float(arr.max()), 1)}
+
+
+def run_legacy(url, points):
+    def one(point):
+        response = requests.get(url, params={"lat": point[0], "lon": point[1], "appid": "x", "units": "metric"}, timeout=5)
+        response.raise_for_status()
+        response.json()
+        return time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=40) as pool:
+        # All requests arrive at once, so time spent queued for a worker counts toward latency
+        start = time.perf_counter()
+        finished = list(pool.map(one, points))
+        total = time.perf_counter() - start
+    return [t - start for t in finished], total
+
+
+async def run_async(points):
+    from weather_handler import get_weather_data_async, close_async_client, _get_async_client
+
+    # Building the client (SSL context, pool) is a one-off startup cost, not per-request latency
+    _get_async_client()
+
+    async def one(point):
+        start = time.perf_counter()
+        await get_weather_data_async(*point)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(one(p) for p in points))
+    total = time.perf_counter() - start
+    await close_async_client()
+    return latencies, total
+
+
+def main():
+    global STUB_DELAY_S
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--cells", type=int, default=10, help="distinct grid cells among the requests")
+    parser.add_argument("--delay-ms", type=float, default=50)
+    args = parser.parse_args()
+    STUB_DELAY_S = args.delay_ms / 1000
+
+    server, url = start_stub_server()
+    os.environ["OPENWEATHER_URL"] = url
+    os.environ["OPENWEATHER_API_KEY"] = "bench"
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+    points = [(10.0 + (i % args.cells), 60.0) for i in range(args.requests)]
+
+    legacy_latencies, legacy_total = run_legacy(url, points)
+    print(f"legacy requests.get ({args.requests} concurrent): total {legacy_total * 1000:.0f} ms, "
+          f"{percentiles(legacy_latencies)}")
+
+    async_latencies, async_total = asyncio.run(run_async(points))
+    print(f"async pooled+coalesced ({args.requests} concurrent): total {async_total * 1000:.0f} ms, "
+          f"{percentiles(async_latencies)}")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,485 @@
+import math
+import random
+
+import numpy as np
+
+R = 6371000  # Earth radius in meters
+DEG = 180 / math.pi
+
+# Process noise (stochastic), in degrees per axis
+PROCESS_NOISE_DEG = 0.05
+
+# Ensemble limits and output resolution
+MAX_PARTICLES = 500_000
+DENSITY_GRID_SIZE = 48
+CONTOUR_LEVELS = (0.5, 0.9, 0.95)
+SEARCH_AREA_LEVEL = 0.9
+
+# Leeway of common search objects: drift speed downwind and crosswind as
+# slope * wind speed (10 m, m/s) + offset (m/s). Crosswind leeway pushes an
+# object left or right of downwind (picked per particle), and every particle
+# draws its own slopes with the given spread, which is what makes the search
+# area of each class grow. "wreckage" is the legacy model: it moves with the wind.
+# process_noise scales the generic PROCESS_NOISE_DEG random walk per class; the
+# leeway classes carry their own spread, so it would only blur them together.
+LEEWAY_CLASSES = {
+    "wreckage": {
+        "label": "Wreckage (legacy, 100% of wind)",
+        "downwind_slope": 1.0, "downwind_offset": 0.0, "downwind_std": 0.0,
+        "crosswind_slope": 0.0, "crosswind_offset": 0.0, "crosswind_std": 0.0,
+        "process_noise": 1.0,
+    },
+    "life_raft": {
+        "label": "Life raft, 4-6 person, no drogue",
+        "downwind_slope": 0.037, "downwind_offset": 0.0, "downwind_std": 0.006,
+        "crosswind_slope": 0.012, "crosswind_offset": 0.0, "crosswind_std": 0.004,
+        "process_noise": 0.0,
+    },
+    "person_in_water": {
+        "label": "Person in water",
+        "downwind_slope": 0.011, "downwind_offset": 0.068, "downwind_std": 0.003,
+        "crosswind_slope": 0.004, "crosswind_offset": 0.0, "crosswind_std": 0.002,
+        "process_noise": 0.0,
+    },
+    "debris": {
+        "label": "Floating debris",
+        "downwind_slope": 0.02, "downwind_offset": 0.0, "downwind_std": 0.005,
+        "crosswind_slope": 0.007, "crosswind_offset": 0.0, "crosswind_std": 0.003,
+        "process_noise": 0.0,
+    },
+}
+
+
+def _convex_hull(points: np.ndarray) -> list:
+    """
+    Andrew's monotone chain hull over an (N, 2) array of [lat, lon] points.
+    Returns the hull as a closed list of [lat, lon] pairs.
+    """
+    pts = np.unique(points, axis=0)
+    if len(pts) < 3:
+        return [[round(float(a), 4), round(float(b), 4)] for a, b in pts]
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    pts = pts.tolist()
+    lower = []
+    for p in pts:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+
+    hull = lower[:-1] + upper[:-1]
+    hull.append(hull[0])
+    return [[round(a, 4), round(b, 4)] for a, b in hull]
+
+
+def summarize_ensemble(lats: np.ndarray, lons: np.ndarray, grid_size: int = DENSITY_GRID_SIZE) -> dict:
+    """
+    Turns a particle cloud into a normalized density grid and highest-density
+    contour polygons (50/90/95% of the probability mass).
+    """
+    lat_min, lat_max = float(lats.min()), float(lats.max())
+    lon_min, lon_max = float(lons.min()), float(lons.max())
+    # Avoid a degenerate grid when all particles collapse onto one point
+    pad = 1e-4
+    lat_edges = np.linspace(lat_min - pad, lat_max + pad, grid_size + 1)
+    lon_edges = np.linspace(lon_min - pad, lon_max + pad, grid_size + 1)
+
+    counts, _, _ = np.histogram2d(lats, lons, bins=(lat_edges, lon_edges))
+    density = counts / counts.sum()
+
+    # Highest-density region: sort cells by mass, take the smallest set reaching each level
+    flat = density.ravel()
+    order = np.argsort(flat)[::-1]
+    cumulative = np.cumsum(flat[order])
+
+    contours = []
+    for level in CONTOUR_LEVELS:
+        n_cells = int(np.searchsorted(cumulative, level) + 1)
+        cells = order[:n_cells]
+        rows, cols = np.unravel_index(cells, density.shape)
+        # Use the four corners of every selected cell so the hull encloses them fully
+        corners = np.concatenate([
+            np.column_stack((lat_edges[rows + dr], lon_edges[cols + dc]))
+            for dr in (0, 1) for dc in (0, 1)
+        ])
+        contours.append({
+            "level": level,
+            "polygon": _convex_hull(corners),
+        })
+
+    return {
+        "contours": contours,
+        "density": {
+            "lat_min": round(lat_edges[0], 4),
+            "lat_max": round(lat_edges[-1], 4),
+            "lon_min": round(lon_edges[0], 4),
+            "lon_max": round(lon_edges[-1], 4),
+            "shape": [grid_size, grid_size],
+            "cells": np.round(density, 5).tolist(),
+        },
+    }
+
+
+def polygon_area_km2(polygon: list) -> float:
+    """
+    Area of a closed [lat, lon] polygon (shoelace formula on a local
+    equirectangular projection; fine for search-area sized polygons).
+    """
+    if len(polygon) < 4:
+        return 0.0
+    pts = np.asarray(polygon, dtype=float)
+    km_per_deg = R / 1000 / DEG
+    y = pts[:, 0] * km_per_deg
+    x = pts[:, 1] * km_per_deg * math.cos(math.radians(pts[:, 0].mean()))
+    return abs(float(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))) / 2
+
+
+def start_offsets(last_known_lat: float, particles: int, start_cov_m, rng):
+    """
+    Latitude/longitude offsets (degrees) of particles drawn from the
+    uncertainty of the last known position: a 2x2 north/east covariance in
+    m^2, such as a tracked flight's position covariance.
+    """
+    cov = np.asarray(start_cov_m, dtype=float)
+    # Symmetric square root, so a (near) singular covariance still works
+    eigenvalues, eigenvectors = np.linalg.eigh(cov)
+    root = eigenvectors * np.sqrt(np.clip(eigenvalues, 0.0, None))
+    north, east = root @ rng.standard_normal((2, particles))
+    return north / R * DEG, east / (R * math.cos(math.radians(last_known_lat))) * DEG
+
+
+def leeway_coefficients(object_classes, particles_per_class: int, rng) -> dict:
+    """
+    Per-particle leeway coefficients for consecutive blocks of
+    particles_per_class particles, one block per class in LEEWAY_CLASSES.
+    The crosswind terms carry the particle's left/right sign.
+    """
+    n = len(object_classes) * particles_per_class
+
+    def column(key):
+        return np.repeat([LEEWAY_CLASSES[name][key] for name in object_classes], particles_per_class).astype(float)
+
+    side = rng.choice((-1.0, 1.0), size=n)
+    return {
+        "downwind_slope": column("downwind_slope") + column("downwind_std") * rng.standard_normal(n),
+        "downwind_offset": column("downwind_offset"),
+        "crosswind_slope": side * (column("crosswind_slope") + column("crosswind_std") * rng.standard_normal(n)),
+        "crosswind_offset": side * column("crosswind_offset"),
+        "process_noise": column("process_noise"),
+    }
+
+
+def apply_leeway(wind_u, wind_v, leeway: dict, out=None):
+    """
+    Drift velocity (m/s, east/north) of every particle for the given wind,
+    from its leeway coefficients. Calm air leaves particles where they are.
+    'out' is an optional (5, particles) work array to reuse between calls;
+    the result is then two of its rows.
+    """
+    if out is None:
+        out = np.empty((5, leeway["downwind_slope"].size))
+    speed, downwind, crosswind, drift_u, drift_v = out
+
+    np.hypot(wind_u, wind_v, out=speed)
+    np.multiply(leeway["downwind_slope"], speed, out=downwind)
+    downwind += leeway["downwind_offset"]
+    np.multiply(leeway["crosswind_slope"], speed, out=crosswind)
+    crosswind += leeway["crosswind_offset"]
+    # Unit vectors: downwind (u, v) / speed, crosswind to its right (v, -u) / speed.
+    # In calm air both wind components are 0, so the floor only avoids 0 / 0.
+    np.maximum(speed, 1e-12, out=speed)
+    np.reciprocal(speed, out=speed)
+    downwind *= speed
+    crosswind *= speed
+
+    np.multiply(downwind, wind_u, out=drift_u)
+    np.multiply(crosswind, wind_v, out=drift_v)
+    drift_u += drift_v
+    np.multiply(downwind, wind_v, out=drift_v)
+    np.multiply(crosswind, wind_u, out=downwind)
+    drift_v -= downwind
+    return drift_u, drift_v
+
+
+def _mean_std(values: np.ndarray, scratch: np.ndarray):
+    """
+    Mean and standard deviation of 'values', using 'scratch' (same size) instead of temporaries.
+    """
+    mean = float(values.mean())
+    np.subtract(values, mean, out=scratch)
+    np.square(scratch, out=scratch)
+    return mean, math.sqrt(float(scratch.mean()))
+
+
+def summarize_classes(lats: np.ndarray, lons: np.ndarray, object_classes, particles_per_class: int) -> dict:
+    """
+    Mean position, spread, probability contours and search area (km^2
+    inside the SEARCH_AREA_LEVEL contour) of each class's block of particles.
+    """
+    classes = {}
+    for i, name in enumerate(object_classes):
+        block = slice(i * particles_per_class, (i + 1) * particles_per_class)
+        class_lats, class_lons = lats[block], lons[block]
+        contours = summarize_ensemble(class_lats, class_lons)["contours"]
+        search_polygon = next(c["polygon"] for c in contours if c["level"] == SEARCH_AREA_LEVEL)
+        classes[name] = {
+            "label": LEEWAY_CLASSES[name]["label"],
+            "particles": particles_per_class,
+            "predicted_lat": round(float(class_lats.mean()), 4),
+            "predicted_lon": round(float(class_lons.mean()), 4),
+            "std_deg": [round(float(class_lats.std()), 5), round(float(class_lons.std()), 5)],
+            "search_area_km2": round(polygon_area_km2(search_polygon), 1),
+            "contours": contours,
+        }
+    return classes
+
+
+def calculate_drift_physics(last_known_lat: float, last_known_lon: float, wind_u: float, wind_v: float,
+                            hours: float, particles: int = 1, seed: int = None, start_cov_m=None) -> dict:
+    """
+    Core physics model for drift calculation (EKF-lite).
+    Returns detailed intermediate steps for visualization.
+
+    With particles > 1 the same model is run as a Monte Carlo ensemble in a
+    single vectorized pass, and the result gains an 'ensemble' block with the
+    particle statistics, probability contours and a density grid. The
+    ensemble starts spread over start_cov_m (see start_offsets) when given.
+    """
+    # Simple drift model: position += velocity * time
+    drift_lat_m = wind_v * 3600 * hours
+    drift_lon_m = wind_u * 3600 * hours
+
+    # Coordinate conversion
+    dlat = (drift_lat_m / R) * DEG
+    dlon = (drift_lon_m / (R * math.cos(math.radians(last_known_lat)))) * DEG
+
+    confidence = max(0, 100 - (hours * 2))
+
+    result = {
+        "predicted_lat": None,
+        "predicted_lon": None,
+        "confidence": round(confidence, 1),
+        "drift_vector_m": [round(drift_lat_m, 2), round(drift_lon_m, 2)],
+        "process_noise": None,
+        "dlat": round(dlat, 5),
+        "dlon": round(dlon, 5)
+    }
+
+    if particles <= 1:
+        rng = random.Random(seed) if seed is not None else random
+        noise_lat = rng.gauss(0, PROCESS_NOISE_DEG)
+        noise_lon = rng.gauss(0, PROCESS_NOISE_DEG)
+
+        result["predicted_lat"] = round(last_known_lat + dlat + noise_lat, 4)
+        result["predicted_lon"] = round(last_known_lon + dlon + noise_lon, 4)
+        result["process_noise"] = [round(noise_lat, 5), round(noise_lon, 5)]
+        return result
+
+    particles = min(int(particles), MAX_PARTICLES)
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0.0, PROCESS_NOISE_DEG, size=(2, particles))
+    lats = noise[0]
+    lats += last_known_lat + dlat
+    lons = noise[1]
+    lons += last_known_lon + dlon
+    if start_cov_m is not None:
+        start_lat, start_lon = start_offsets(last_known_lat, particles, start_cov_m, rng)
+        lats += start_lat
+        lons += start_lon
+
+    mean_lat = float(lats.mean())
+    mean_lon = float(lons.mean())
+    result["predicted_lat"] = round(mean_lat, 4)
+    result["predicted_lon"] = round(mean_lon, 4)
+    result["process_noise"] = [round(float(lats.std()), 5), round(float(lons.std()), 5)]
+    result["ensemble"] = {
+        "particles": particles,
+        "seed": seed,
+        "mean": [round(mean_lat, 4), round(mean_lon, 4)],
+        "std_deg": [round(float(lats.std()), 5), round(float(lons.std()), 5)],
+        **summarize_ensemble(lats, lons),
+    }
+    return result
+
+
+def wind_from_series(times_h, wind_u, wind_v):
+    """
+    Builds a time-varying wind callable from samples at times_h (hours since
+    signal loss). Values are linearly interpolated and held constant outside
+    the sampled window.
+    """
+    times_h = np.asarray(times_h, dtype=float)
+    wind_u = np.asarray(wind_u, dtype=float)
+    wind_v = np.asarray(wind_v, dtype=float)
+
+    def wind(t_hours, lats, lons):
+        return float(np.interp(t_hours, times_h, wind_u)), float(np.interp(t_hours, times_h, wind_v))
+
+    return wind
+
+
+def average_wind(wind, lat: float, lon: float, hours: float, step_minutes: float = 15.0):
+    """
+    Constant (u, v) stand-in for a wind callable in calculate_drift_physics:
+    the wind at the start point averaged over the horizon (sampled at the
+    midpoints of the integrator's steps). A (u, v) pair is returned as is.
+    """
+    if not callable(wind):
+        return float(wind[0]), float(wind[1])
+    steps = max(1, math.ceil(hours * 60 / step_minutes))
+    lats, lons = np.array([lat]), np.array([lon])
+    samples = [wind((k + 0.5) * hours / steps, lats, lons) for k in range(steps)]
+    return float(np.mean([u for u, _ in samples])), float(np.mean([v for _, v in samples]))
+
+
+def integrate_drift(last_known_lat: float, last_known_lon: float, wind, hours: float,
+                    step_minutes: float = 15.0, particles: int = 1, seed: int = None,
+                    object_classes=None, start_cov_m=None):
+    """
+    Time-stepped version of calculate_drift_physics.
+
+    'wind' is either a constant (u, v) pair in m/s or a callable
+    wind(t_hours, lats, lons) -> (u, v) returning scalars or per-particle arrays.
+    The integrator is a generator: it yields one summary dict per step and a
+    final record (with contours/density for ensembles). Particle state lives in
+    preallocated arrays that are updated in place, so memory stays flat no
+    matter how long the horizon or how fine the step.
+
+    With object_classes (names from LEEWAY_CLASSES) every class gets
+    'particles' particles, all classes advance together in the same arrays,
+    and the records carry per-class positions and search areas.
+    start_cov_m spreads the starting particles over the uncertainty of the
+    last known position (see start_offsets).
+    """
+    if not callable(wind):
+        const_u, const_v = float(wind[0]), float(wind[1])
+        wind = lambda t, lats, lons: (const_u, const_v)
+
+    rng = np.random.default_rng(seed)
+    leeway = None
+    if object_classes:
+        object_classes = list(object_classes)
+        particles_per_class = max(1, min(int(particles), MAX_PARTICLES // len(object_classes)))
+        leeway = leeway_coefficients(object_classes, particles_per_class, rng)
+        particles = particles_per_class * len(object_classes)
+
+    particles = max(1, min(int(particles), MAX_PARTICLES))
+    dt_h = step_minutes / 60.0
+    n_steps = max(1, int(math.ceil(hours / dt_h)))
+    dt_h = hours / n_steps
+    dt_s = dt_h * 3600
+
+    # Split the single-shot process noise across steps so the final spread matches
+    sigma_step = PROCESS_NOISE_DEG * math.sqrt(dt_h / hours)
+    noise_scale = sigma_step if leeway is None else sigma_step * leeway["process_noise"]
+
+    lats = np.full(particles, last_known_lat, dtype=float)
+    lons = np.full(particles, last_known_lon, dtype=float)
+    if start_cov_m is not None:
+        start_lat, start_lon = start_offsets(last_known_lat, particles, start_cov_m, rng)
+        lats += start_lat
+        lons += start_lon
+    scratch = np.empty(particles)
+    step_buf = np.empty(particles)
+    noise = np.empty(particles)
+    leeway_buf = None if leeway is None else np.empty((5, particles))
+
+    for step in range(1, n_steps + 1):
+        t_h = (step - 1) * dt_h
+        wind_u, wind_v = wind(t_h, lats, lons)
+        if leeway is not None:
+            wind_u, wind_v = apply_leeway(wind_u, wind_v, leeway, out=leeway_buf)
+
+        # Longitude step uses the current latitude of every particle
+        np.radians(lats, out=scratch)
+        np.cos(scratch, out=scratch)
+        np.multiply(scratch, R, out=scratch)
+        np.multiply(wind_u, dt_s * DEG, out=step_buf)
+        np.divide(step_buf, scratch, out=scratch)
+        lons += scratch
+
+        np.multiply(wind_v, dt_s / R * DEG, out=scratch)
+        lats += scratch
+
+        rng.standard_normal(out=noise)
+        noise *= noise_scale
+        lats += noise
+        rng.standard_normal(out=noise)
+        noise *= noise_scale
+        lons += noise
+
+        lat_mean, lat_std = _mean_std(lats, scratch)
+        lon_mean, lon_std = _mean_std(lons, scratch)
+        record = {
+            "step": step,
+            "t_hours": round(step * dt_h, 4),
+            "lat": round(lat_mean, 4),
+            "lon": round(lon_mean, 4),
+            "std_deg": [round(lat_std, 5), round(lon_std, 5)],
+        }
+        if leeway is not None:
+            class_lats = lats.reshape(len(object_classes), -1).mean(axis=1)
+            class_lons = lons.reshape(len(object_classes), -1).mean(axis=1)
+            record["classes"] = {name: [round(float(a), 4), round(float(b), 4)]
+                                 for name, a, b in zip(object_classes, class_lats, class_lons)}
+        yield record
+
+    final = {
+        "final": True,
+        "steps": n_steps,
+        "step_minutes": round(dt_h * 60, 3),
+        "predicted_lat": round(float(lats.mean()), 4),
+        "predicted_lon": round(float(lons.mean()), 4),
+        "confidence": round(max(0, 100 - (hours * 2)), 1),
+    }
+    if leeway is not None:
+        final["classes"] = summarize_classes(lats, lons, object_classes, particles_per_class)
+    elif particles > 1:
+        final["ensemble"] = {
+            "particles": particles,
+            "seed": seed,
+            **summarize_ensemble(lats, lons),
+        }
+    yield final
+
+
+def calculate_drift_batch(lats, lons, wind_u, wind_v, hours, seed: int = None) -> list:
+    """
+    Single-point drift for many events at once. All inputs may be scalars or
+    arrays of equal length; the physics runs as one array operation and the
+    results come back in input order, shaped like calculate_drift_physics().
+    """
+    lats, lons, wind_u, wind_v, hours = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (lats, lons, wind_u, wind_v, hours))
+    )
+
+    drift_lat_m = wind_v * 3600 * hours
+    drift_lon_m = wind_u * 3600 * hours
+    dlat = (drift_lat_m / R) * DEG
+    dlon = (drift_lon_m / (R * np.cos(np.radians(lats)))) * DEG
+
+    rng = np.random.default_rng(seed)
+    noise_lat, noise_lon = rng.normal(0.0, PROCESS_NOISE_DEG, size=(2, lats.size))
+    pred_lat = lats + dlat + noise_lat
+    pred_lon = lons + dlon + noise_lon
+    confidence = np.maximum(0, 100 - (hours * 2))
+
+    results = []
+    for i in range(lats.size):
+        results.append({
+            "predicted_lat": round(float(pred_lat[i]), 4),
+            "predicted_lon": round(float(pred_lon[i]), 4),
+            "confidence": round(float(confidence[i]), 1),
+            "drift_vector_m": [round(float(drift_lat_m[i]), 2), round(float(drift_lon_m[i]), 2)],
+            "process_noise": [round(float(noise_lat[i]), 5), round(float(noise_lon[i]), 5)],
+            "dlat": round(float(dlat[i]), 5),
+            "dlon": round(float(dlon[i]), 5)
+        })
+    return results
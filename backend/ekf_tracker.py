@@ -0,0 +1,319 @@
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+R = 6371000  # Earth radius in meters
+DEG = 180 / math.pi
+
+# Track store sizing: TRACK_CAPACITY slots, tracks without a report for TRACK_STALE_SECONDS are recycled
+TRACK_CAPACITY = int(os.getenv("TRACK_CAPACITY", "20000"))
+TRACK_STALE_SECONDS = float(os.getenv("TRACK_STALE_SECONDS", "3600"))
+
+# Filter tuning: spectral density (m^2/s^3) of the white-noise acceleration in the
+# constant-velocity model, and default report noise (ADS-B position, ground speed, track)
+TRACK_ACCEL_PSD = float(os.getenv("TRACK_ACCEL_PSD", "0.5"))
+POSITION_STD_M = 50.0
+SPEED_STD_MS = 1.0
+TRACK_STD_DEG = 2.0
+# Velocity uncertainty of a new track with no speed/track in its first report (~airliner cruise)
+INITIAL_SPEED_STD_MS = 150.0
+
+ELLIPSE_LEVEL = 0.95
+
+
+def covariance_ellipse(cov, level: float = ELLIPSE_LEVEL) -> dict:
+    """
+    Axes (m) and orientation (degrees clockwise from north) of the ellipse
+    holding 'level' of the probability of a 2x2 north/east covariance in m^2.
+    """
+    eigenvalues, eigenvectors = np.linalg.eigh(np.asarray(cov, dtype=float))
+    scale = math.sqrt(-2 * math.log(1 - level))  # chi-square quantile, 2 degrees of freedom
+    minor, major = (scale * math.sqrt(max(v, 0.0)) for v in eigenvalues)
+    north, east = eigenvectors[:, 1]
+    return {
+        "level": level,
+        "semi_major_m": round(major, 1),
+        "semi_minor_m": round(minor, 1),
+        "orientation_deg": round(math.degrees(math.atan2(east, north)) % 180, 1),
+    }
+
+
+def _process_noise(dt):
+    """
+    Continuous white-noise acceleration process noise for error states
+    (north m, east m, v_north, v_east), batched over dt.
+    """
+    q = TRACK_ACCEL_PSD
+    Q = np.zeros((dt.size, 4, 4))
+    for pos, vel in ((0, 2), (1, 3)):
+        Q[:, pos, pos] = q * dt ** 3 / 3
+        Q[:, pos, vel] = Q[:, vel, pos] = q * dt ** 2 / 2
+        Q[:, vel, vel] = q * dt
+    return Q
+
+
+class TrackStore:
+    """
+    Extended Kalman filter per tracked flight, in fixed-size arrays.
+
+    State is (lat, lon, v_north, v_east); the covariance is kept in meters
+    around the current position (error state), so it reads directly as a
+    position ellipse and does not care about the antimeridian. Each report
+    costs O(1): predict the flight's slot to the report time, then fold the
+    report in. update() does this for a whole batch of flights at once.
+    """
+
+    def __init__(self, capacity: int = TRACK_CAPACITY, stale_seconds: float = TRACK_STALE_SECONDS):
+        self.capacity = capacity
+        self.stale_seconds = stale_seconds
+        self.state = np.zeros((capacity, 4))
+        self.cov = np.zeros((capacity, 4, 4))
+        self.t = np.full(capacity, -np.inf)
+        self.reports = np.zeros(capacity, dtype=np.int64)
+        self.slots = {}    # flight_id -> slot
+        self.ids = [None] * capacity
+        self.free = list(range(capacity - 1, -1, -1))
+        self._lock = threading.Lock()
+        self.observations = 0
+        self.rejected = 0
+        self.evicted = 0
+
+    def _allocate(self, flight_id, now, keep=()):
+        """
+        Slot for a new flight, or None when every slot is in 'keep' (the
+        slots the current batch has already written).
+        """
+        if not self.free:
+            self.expire(now, keep)
+        if not self.free:
+            # Still full: recycle the slot that has gone longest without a report
+            active = np.array([slot for slot in self.slots.values() if slot not in keep], dtype=np.int64)
+            if not active.size:
+                return None
+            self._release(int(active[np.argmin(self.t[active])]))
+            self.evicted += 1
+        slot = self.free.pop()
+        self.slots[flight_id] = slot
+        self.ids[slot] = flight_id
+        return slot
+
+    def _release(self, slot):
+        del self.slots[self.ids[slot]]
+        self.ids[slot] = None
+        self.t[slot] = -np.inf
+        self.free.append(slot)
+
+    def expire(self, now: float = None, keep=()) -> int:
+        """
+        Frees the slots of flights with no report for stale_seconds, except those in 'keep'.
+        """
+        cutoff = (time.time() if now is None else now) - self.stale_seconds
+        stale = [slot for slot in self.slots.values() if self.t[slot] < cutoff and slot not in keep]
+        for slot in stale:
+            self._release(slot)
+        return len(stale)
+
+    def update(self, flight_ids, lats, lons, times=None, speeds=None, tracks=None, accuracy_m=None) -> dict:
+        """
+        Folds a batch of position reports into the tracks. 'speeds' (ground
+        speed, m/s) and 'tracks' (degrees true) are optional per report (NaN
+        or None = not reported), as is the position accuracy. Reports that are
+        not newer than a flight's current state are rejected. Several reports for one
+        flight are applied in time order. A full store makes room for new
+        flights by recycling stale or least recently reported tracks, but never
+        one this batch wrote; new flights that still do not fit are rejected.
+        """
+        n = len(flight_ids)
+        now = time.time()
+
+        def column(values, default):
+            if values is None:
+                return np.full(n, default, dtype=float)
+            return np.array([default if v is None else v for v in values], dtype=float)
+
+        times = column(times, now)
+        lats, lons = column(lats, np.nan), column(lons, np.nan)
+        speeds, tracks = column(speeds, np.nan), column(tracks, np.nan)
+        accuracy = column(accuracy_m, POSITION_STD_M)
+
+        counts = {"created": 0, "updated": 0, "rejected": 0}
+        written = set()    # slots this batch has updated or created
+        with self._lock:
+            # Rounds in which every flight appears at most once, earliest reports first
+            pending = np.argsort(times, kind="stable")
+            while pending.size:
+                _, first = np.unique([flight_ids[i] for i in pending.tolist()], return_index=True)
+                rows = pending[np.sort(first)]
+                self._apply([flight_ids[i] for i in rows.tolist()], lats[rows], lons[rows], times[rows],
+                            speeds[rows], tracks[rows], accuracy[rows], counts, written, now)
+                pending = np.delete(pending, first)
+            self.observations += n
+            self.rejected += counts["rejected"]
+        return counts
+
+    def _apply(self, flight_ids, lats, lons, times, speeds, tracks, accuracy, counts, written, now):
+        has_velocity = ~(np.isnan(speeds) | np.isnan(tracks))
+        track_rad = np.radians(np.nan_to_num(tracks))
+        speeds = np.nan_to_num(speeds)
+        v_north, v_east = speeds * np.cos(track_rad), speeds * np.sin(track_rad)
+
+        slots = np.array([self.slots.get(f, -1) for f in flight_ids], dtype=np.int64)
+        new = slots < 0
+        known = ~new
+        # Re-sent reports (same time) would count the same measurement twice
+        known[known] = times[known] > self.t[slots[known]]
+        counts["rejected"] += int((~new & ~known).sum())
+
+        if known.any():
+            self._update_known(slots[known], lats[known], lons[known], times[known], has_velocity[known],
+                               v_north[known], v_east[known], speeds[known], track_rad[known], accuracy[known])
+            counts["updated"] += int(known.sum())
+            written.update(slots[known].tolist())
+
+        # New flights last; their slots only get report times below, so the
+        # ones allocated so far are kept out of expiry and eviction explicitly
+        if new.any():
+            rows = []
+            for i in np.flatnonzero(new).tolist():
+                slot = self._allocate(flight_ids[i], now, written)
+                if slot is None:
+                    counts["rejected"] += 1
+                    continue
+                slots[i] = slot
+                written.add(slot)
+                rows.append(i)
+            if not rows:
+                return
+            rows = np.array(rows, dtype=np.int64)
+            s = slots[rows]
+            self.state[s] = np.column_stack((lats[rows], lons[rows], v_north[rows], v_east[rows]))
+            self.cov[s] = 0.0
+            self.cov[s, 0, 0] = self.cov[s, 1, 1] = accuracy[rows] ** 2
+            self.cov[s, 2, 2] = self.cov[s, 3, 3] = np.where(has_velocity[rows], SPEED_STD_MS, INITIAL_SPEED_STD_MS) ** 2
+            self.t[s] = times[rows]
+            self.reports[s] = 1
+            counts["created"] += len(rows)
+
+    def _update_known(self, slots, lats, lons, times, has_velocity, v_north, v_east, speeds, track_rad, accuracy):
+        """
+        Predicts known flights to their report times and folds the reports in
+        (position only, or position and velocity when speed/track came along).
+        """
+        self._predict(slots, times - self.t[slots])
+
+        # Position residual in meters north/east of the predicted position
+        lat = self.state[slots, 0]
+        d_north = (lats - lat) / DEG * R
+        d_east = ((lons - self.state[slots, 1] + 180) % 360 - 180) / DEG * R * np.cos(np.radians(lat))
+
+        for group, size in ((~has_velocity, 2), (has_velocity, 4)):
+            if not group.any():
+                continue
+            g = slots[group]
+            residual = np.column_stack((d_north[group], d_east[group]))
+            noise = np.zeros((len(g), size, size))
+            noise[:, 0, 0] = noise[:, 1, 1] = accuracy[group] ** 2
+            if size == 4:
+                residual = np.column_stack((residual, v_north[group] - self.state[g, 2], v_east[group] - self.state[g, 3]))
+                noise[:, 2:, 2:] = self._velocity_noise(speeds[group], track_rad[group])
+            self._correct(g, residual, np.eye(4)[:size], noise)
+
+        self.t[slots] = times
+        self.reports[slots] += 1
+
+    @staticmethod
+    def _velocity_noise(speeds, track_rad):
+        """
+        Ground speed / track noise mapped to north/east velocity noise (first-order, via the Jacobian).
+        """
+        J = np.empty((speeds.size, 2, 2))
+        J[:, 0, 0], J[:, 0, 1] = np.cos(track_rad), -speeds * np.sin(track_rad)
+        J[:, 1, 0], J[:, 1, 1] = np.sin(track_rad), speeds * np.cos(track_rad)
+        D = np.diag([SPEED_STD_MS ** 2, math.radians(TRACK_STD_DEG) ** 2])
+        return J @ D @ J.transpose(0, 2, 1)
+
+    def _predict(self, slots, dt):
+        """
+        Moves the slots' states dt seconds along their velocity (on the sphere) and grows their covariance.
+        """
+        x = self.state[slots]
+        x[:, 1] += x[:, 3] * dt / (R * np.cos(np.radians(x[:, 0]))) * DEG
+        x[:, 0] += x[:, 2] * dt / R * DEG
+        x[:, 1] = (x[:, 1] + 180) % 360 - 180
+        self.state[slots] = x
+
+        F = np.broadcast_to(np.eye(4), (len(slots), 4, 4)).copy()
+        F[:, 0, 2] = F[:, 1, 3] = dt
+        self.cov[slots] = F @ self.cov[slots] @ F.transpose(0, 2, 1) + _process_noise(dt)
+
+    def _correct(self, slots, residual, H, noise):
+        P = self.cov[slots]
+        S = H @ P @ H.T + noise
+        K = np.linalg.solve(S, H @ P).transpose(0, 2, 1)  # P H^T S^-1, with P and S symmetric
+        dx = (K @ residual[:, :, None])[:, :, 0]
+
+        x = self.state[slots]
+        x[:, 0] += dx[:, 0] / R * DEG
+        x[:, 1] += dx[:, 1] / (R * np.cos(np.radians(x[:, 0]))) * DEG
+        x[:, 2:] += dx[:, 2:]
+        self.state[slots] = x
+
+        # Joseph form keeps the covariance symmetric and positive definite
+        A = np.eye(4) - K @ H
+        self.cov[slots] = A @ P @ A.transpose(0, 2, 1) + K @ noise @ K.transpose(0, 2, 1)
+
+    def get(self, flight_id: str, at: float = None):
+        """
+        Latest estimate for a flight, or None. With 'at' (unix s) the estimate
+        is extrapolated to that time without changing the stored track.
+        """
+        with self._lock:
+            slot = self.slots.get(flight_id)
+            if slot is None:
+                return None
+            x, P, t = self.state[slot].copy(), self.cov[slot].copy(), float(self.t[slot])
+            reports = int(self.reports[slot])
+
+        if at is not None and at > t:
+            dt = np.array([at - t])
+            F = np.eye(4)
+            F[0, 2] = F[1, 3] = dt[0]
+            P = F @ P @ F.T + _process_noise(dt)[0]
+            x[1] = (x[1] + x[3] * dt[0] / (R * math.cos(math.radians(x[0]))) * DEG + 180) % 360 - 180
+            x[0] += x[2] * dt[0] / R * DEG
+            t = float(at)
+
+        return {
+            "flight_id": flight_id,
+            "lat": round(float(x[0]), 5),
+            "lon": round(float(x[1]), 5),
+            "velocity_ms": [round(float(x[2]), 2), round(float(x[3]), 2)],
+            "speed_ms": round(float(math.hypot(x[2], x[3])), 2),
+            "track_deg": round(math.degrees(math.atan2(x[3], x[2])) % 360, 1),
+            "t": t,
+            "reports": reports,
+            "position_cov_m2": P[:2, :2].tolist(),
+            "ellipse": covariance_ellipse(P[:2, :2]),
+        }
+
+    def stats(self) -> dict:
+        return {
+            "tracks": len(self.slots),
+            "capacity": self.capacity,
+            "observations": self.observations,
+            "rejected": self.rejected,
+            "evicted": self.evicted,
+        }
+
+    def __len__(self):
+        return len(self.slots)
+
+
+track_store = TrackStore()
+
+
+def get_track_stats() -> dict:
+    return track_store.stats()
@@ -0,0 +1,178 @@
+import json
+import math
+import os
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+
+# Comprehensive list of MRCCs and emergency contacts ('range' is the service radius in km)
+MRCC_DATABASE = [
+    {"country": "USA", "agency": "US Coast Guard", "number": "+1-800-323-7233", "lat": 38.0, "lon": -77.0, "range": 5000}, # Changed to East/Central
+    {"country": "USA (Pacific)", "agency": "US Coast Guard Pacific Area", "number": "+1-510-437-3701", "lat": 37.0, "lon": -122.0, "range": 3000},
+    {"country": "UK", "agency": "HM Coastguard", "number": "999 / 112", "lat": 54.0, "lon": -2.0, "range": 1000},
+    {"country": "Australia", "agency": "JRCC Australia", "number": "+61-2-6230-6811", "lat": -25.0, "lon": 133.0, "range": 4000},
+    {"country": "New Zealand", "agency": "RCCNZ", "number": "+64-4-577-8030", "lat": -41.0, "lon": 174.0, "range": 2000},
+    {"country": "China", "agency": "China MRCC", "number": "+86-10-6529-2218", "lat": 35.0, "lon": 104.0, "range": 3000},
+    {"country": "India", "agency": "Indian Coast Guard", "number": "1554", "lat": 20.0, "lon": 78.0, "range": 3000},
+    {"country": "Japan", "agency": "Japan Coast Guard", "number": "118", "lat": 36.0, "lon": 138.0, "range": 2000},
+    {"country": "Brazil", "agency": "Salvamar Brasil", "number": "185", "lat": -14.0, "lon": -51.0, "range": 4000},
+    {"country": "South Africa", "agency": "MRCC Cape Town", "number": "+27-21-938-3300", "lat": -30.0, "lon": 25.0, "range": 2500},
+    {"country": "France", "agency": "CROSS Gris-Nez", "number": "+33-3-21-87-21-87", "lat": 46.0, "lon": 2.0, "range": 1500},
+    {"country": "Spain", "agency": "Salvamento Marítimo", "number": "+34-900-202-202", "lat": 40.0, "lon": -4.0, "range": 1000},
+    {"country": "Italy", "agency": "Guardia Costiera", "number": "1530", "lat": 41.0, "lon": 12.0, "range": 1000},
+    {"country": "Canada", "agency": "JRCC Halifax/Victoria", "number": "1-800-567-5111", "lat": 56.0, "lon": -106.0, "range": 5000},
+    {"country": "Russia", "agency": "MRCC Moscow", "number": "+7-495-626-10-52", "lat": 61.0, "lon": 105.0, "range": 6000},
+    {"country": "Indonesia", "agency": "BASARNAS", "number": "115", "lat": -0.7, "lon": 113.9, "range": 3000},
+    {"country": "Philippines", "agency": "Philippine Coast Guard", "number": "+63-2-527-3877", "lat": 12.8, "lon": 121.7, "range": 1500},
+]
+
+# Optional GeoJSON FeatureCollection of SAR regions (Polygon/MultiPolygon features
+# with 'country', 'agency' and 'number' properties, split at the antimeridian)
+SAR_REGIONS_PATH = os.getenv("SAR_REGIONS_PATH")
+SAR_GRID_DEG = 5.0
+
+
+def unit_vectors(lats, lons):
+    """
+    (N, 3) unit-sphere vectors for arrays of lat/lon in degrees.
+    """
+    lat = np.radians(np.asarray(lats, dtype=float))
+    lon = np.radians(np.asarray(lons, dtype=float))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+class MRCCIndex:
+    """
+    Nearest rescue centre by great-circle distance, honouring each centre's
+    service range. Centres are stored as precomputed unit vectors so a query
+    is a single matrix-vector product, correct across the antimeridian and
+    near the poles.
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.vectors = unit_vectors([e["lat"] for e in self.entries], [e["lon"] for e in self.entries])
+        self.ranges_km = np.array([e.get("range", np.inf) for e in self.entries], dtype=float)
+
+    def nearest(self, lat, lon):
+        """
+        Returns (entry, distance_km, within_range). The closest centre whose
+        range covers the point wins; if none does, the closest overall is
+        returned with within_range=False.
+        """
+        q = unit_vectors([lat], [lon])[0]
+        dists = EARTH_RADIUS_KM * np.arccos(np.clip(self.vectors @ q, -1.0, 1.0))
+        in_range = dists <= self.ranges_km
+        if in_range.any():
+            i = int(np.argmin(np.where(in_range, dists, np.inf)))
+            return self.entries[i], float(dists[i]), True
+        i = int(np.argmin(dists))
+        return self.entries[i], float(dists[i]), False
+
+
+class SARRegionIndex:
+    """
+    Point-in-polygon lookup for SAR regions. Polygon bounding boxes are
+    bucketed on a coarse lat/lon grid, so a query only tests the few polygons
+    registered in its cell.
+    """
+
+    def __init__(self, features):
+        self.regions = []  # (properties, bbox, [ring arrays])
+        self.cells = {}
+        for feature in features:
+            geometry = feature.get("geometry") or {}
+            if geometry.get("type") == "Polygon":
+                polygons = [geometry["coordinates"]]
+            elif geometry.get("type") == "MultiPolygon":
+                polygons = geometry["coordinates"]
+            else:
+                continue
+            for polygon in polygons:
+                rings = [np.asarray(ring, dtype=float) for ring in polygon]
+                outer = rings[0]
+                bbox = (outer[:, 1].min(), outer[:, 0].min(), outer[:, 1].max(), outer[:, 0].max())
+                region_id = len(self.regions)
+                self.regions.append((feature.get("properties", {}), bbox, rings))
+                for cell in self._cells_for_bbox(bbox):
+                    self.cells.setdefault(cell, []).append(region_id)
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f).get("features", []))
+
+    @staticmethod
+    def _cell(lat, lon):
+        return int(math.floor(lat / SAR_GRID_DEG)), int(math.floor(lon / SAR_GRID_DEG))
+
+    def _cells_for_bbox(self, bbox):
+        min_lat, min_lon, max_lat, max_lon = bbox
+        r0, c0 = self._cell(min_lat, min_lon)
+        r1, c1 = self._cell(max_lat, max_lon)
+        for r in range(r0, r1 + 1):
+            for c in range(c0, c1 + 1):
+                yield r, c
+
+    @staticmethod
+    def _ring_contains(ring, lat, lon):
+        # Even-odd ray casting over all edges at once; ring is (N, 2) of [lon, lat]
+        x0, y0 = ring[:-1, 0], ring[:-1, 1]
+        x1, y1 = ring[1:, 0], ring[1:, 1]
+        crosses = (y0 > lat) != (y1 > lat)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_at = x0 + (lat - y0) * (x1 - x0) / (y1 - y0)
+        return bool(np.count_nonzero(crosses & (lon < x_at)) % 2)
+
+    def find(self, lat, lon):
+        """
+        Properties of the SAR region containing the point, or None.
+        """
+        for region_id in self.cells.get(self._cell(lat, lon), ()):
+            properties, (min_lat, min_lon, max_lat, max_lon), rings = self.regions[region_id]
+            if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                continue
+            if self._ring_contains(rings[0], lat, lon) and \
+                    not any(self._ring_contains(hole, lat, lon) for hole in rings[1:]):
+                return properties
+        return None
+
+    def __len__(self):
+        return len(self.regions)
+
+
+# Built once at import; lookups never rebuild the tables
+mrcc_index = MRCCIndex(MRCC_DATABASE)
+sar_index = SARRegionIndex.from_geojson(SAR_REGIONS_PATH) if SAR_REGIONS_PATH else None
+
+
+def lookup_helpline(lat: float, lon: float) -> dict:
+    """
+    Rescue contact for a position: the SAR region containing it when region
+    data is loaded, otherwise the nearest MRCC by great-circle distance.
+    """
+    lon = (float(lon) + 180) % 360 - 180
+    lat = float(lat)
+
+    if sar_index is not None:
+        region = sar_index.find(lat, lon)
+        if region is not None:
+            return {
+                "country": region.get("country", "Unknown"),
+                "agency": region.get("agency", region.get("name", "Unknown")),
+                "number": region.get("number", "N/A"),
+                "match": "sar_region",
+                "within_range": True,
+            }
+
+    entry, dist_km, within_range = mrcc_index.nearest(lat, lon)
+    return {
+        "country": entry["country"],
+        "agency": entry["agency"],
+        "number": entry["number"],
+        "distance_approx": f"{int(dist_km)} km",
+        "match": "mrcc",
+        "within_range": within_range,
+    }
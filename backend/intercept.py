@@ -0,0 +1,92 @@
+import math
+import os
+
+import numpy as np
+
+from ais_handler import haversine_np
+from drift_physics import integrate_drift, R, DEG
+from search_planner import SEARCH_SPEED_KN, KM_PER_NM
+
+# A vessel has reached a particle cloud once it is within this many standard
+# deviations (along the cloud's wider axis) of the cloud's mean position
+INTERCEPT_CLOUD_SIGMA = float(os.getenv("INTERCEPT_CLOUD_SIGMA", "2.0"))
+
+
+def drift_track(lat: float, lon: float, wind, hours: float, step_minutes: float = 15.0,
+                particles: int = 1, seed: int = None, start_cov_m=None) -> dict:
+    """
+    The predicted target path as arrays: t_hours (0 = now), lat/lon of the
+    mean position and, for ensembles, the radius (km) of the particle cloud
+    at every step.
+    """
+    steps = [record for record in integrate_drift(lat, lon, wind, hours, step_minutes=step_minutes,
+                                                  particles=particles, seed=seed, start_cov_m=start_cov_m)
+             if not record.get("final")]
+    start_std = [0.0, 0.0]
+    if start_cov_m is not None:
+        cov = np.asarray(start_cov_m, dtype=float)
+        start_std = [math.sqrt(cov[0, 0]) / R * DEG, math.sqrt(cov[1, 1]) / (R * math.cos(math.radians(lat))) * DEG]
+
+    t_hours = np.array([0.0] + [s["t_hours"] for s in steps])
+    lats = np.array([lat] + [s["lat"] for s in steps])
+    lons = np.array([lon] + [s["lon"] for s in steps])
+    std = np.array([start_std] + [s["std_deg"] for s in steps])
+    km_per_deg = R / 1000 / DEG
+    spread_km = np.maximum(std[:, 0] * km_per_deg, std[:, 1] * km_per_deg * np.cos(np.radians(lats)))
+    radius_km = INTERCEPT_CLOUD_SIGMA * spread_km if particles > 1 else np.zeros_like(lats)
+    return {"t_hours": t_hours, "lat": lats, "lon": lons, "radius_km": radius_km}
+
+
+def intercept_times(vessel_lats, vessel_lons, speeds_kn, track: dict):
+    """
+    Earliest time (hours from now) each vessel can meet the drifting target,
+    as one broadcast over vessels x track steps. A vessel can make step k if
+    the straight run to the target's position there (less the cloud radius)
+    takes no longer than t_hours[k]; the first such step is refined by
+    interpolating between it and the step before.
+
+    Returns (eta_hours, lat, lon, reachable). Vessels that cannot catch the
+    target within the horizon get the time to its final position instead,
+    with reachable False.
+    """
+    speeds_kmh = np.asarray(speeds_kn, dtype=float) * KM_PER_NM
+    t = track["t_hours"]
+    dist = haversine_np(np.asarray(vessel_lats, dtype=float)[:, None], np.asarray(vessel_lons, dtype=float)[:, None],
+                        track["lat"][None, :], track["lon"][None, :])
+    run_h = np.maximum(dist - track["radius_km"][None, :], 0.0) / speeds_kmh[:, None]
+    slack = run_h - t[None, :]                      # <= 0 once the vessel can be there in time
+
+    ok = slack <= 0
+    reachable = ok.any(axis=1)
+    k = np.where(reachable, ok.argmax(axis=1), t.size - 1)
+    prev = np.maximum(k - 1, 0)
+    rows = np.arange(k.size)
+
+    s_prev, s_k = slack[rows, prev], slack[rows, k]
+    frac = np.where((k > 0) & reachable, s_prev / np.maximum(s_prev - s_k, 1e-12), 1.0)
+    eta = np.where(reachable, t[prev] + frac * (t[k] - t[prev]), run_h[:, -1])
+    lat = track["lat"][prev] + frac * (track["lat"][k] - track["lat"][prev])
+    lon = track["lon"][prev] + frac * (track["lon"][k] - track["lon"][prev])
+    return eta, lat, lon, reachable
+
+
+def rank_responders(vessels: list, track: dict, limit: int = None) -> list:
+    """
+    Vessels ordered by how soon they can reach the target, each with its ETA
+    and meeting point. Vessels without a speed use SEARCH_SPEED_KN.
+    """
+    if not vessels:
+        return []
+    speeds = [v.get("speed_kn") or SEARCH_SPEED_KN for v in vessels]
+    eta, lat, lon, reachable = intercept_times([v["lat"] for v in vessels], [v["lon"] for v in vessels],
+                                               speeds, track)
+    # Catchable vessels first, then the rest by time to the final position
+    order = np.lexsort((eta, ~reachable))[:limit]
+    return [{
+        **vessels[i],
+        "speed_kn": speeds[i],
+        "eta_hours": round(float(eta[i]), 3),
+        "intercept_lat": round(float(lat[i]), 4),
+        "intercept_lon": round(float(lon[i]), 4),
+        "within_horizon": bool(reachable[i]),
+    } for i in order.tolist()]
@@ -0,0 +1,68 @@
+import hashlib
+import json
+import os
+import re
+
+from ttl_cache import TTLCache, SqliteStore, MISS
+
+# Agent response cache settings. AGENT_CACHE_BACKEND is "memory", "sqlite" or "off";
+# the sqlite backend keeps a memory LRU in front of AGENT_CACHE_DB.
+AGENT_CACHE_BACKEND = os.getenv("AGENT_CACHE_BACKEND", "memory")
+AGENT_CACHE_DB = os.getenv("AGENT_CACHE_DB", "agent_cache.db")
+AGENT_CACHE_TTL = float(os.getenv("AGENT_CACHE_TTL", "900"))
+AGENT_CACHE_SIZE = int(os.getenv("AGENT_CACHE_SIZE", "512"))
+# Coordinates in prompts are snapped to this grid so nearby clicks share an answer
+AGENT_CACHE_GRID_DEG = float(os.getenv("AGENT_CACHE_GRID_DEG", "0.1"))
+
+_COORD_RE = re.compile(r"\b(latitude|longitude|lat|lon)\b(\s*[:=]?\s*)(-?\d+(?:\.\d+)?)", re.IGNORECASE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str, grid_deg: float = AGENT_CACHE_GRID_DEG) -> str:
+    """
+    Lower-cases, collapses whitespace and quantizes coordinates in a prompt.
+    """
+    def snap(match):
+        value = round(float(match.group(3)) / grid_deg) * grid_deg
+        return f"{match.group(1)}{match.group(2)}{value:.4f}"
+
+    return _SPACE_RE.sub(" ", _COORD_RE.sub(snap, query)).strip().lower()
+
+
+def cache_key(query: str, context: dict = None) -> str:
+    """
+    Key for a prompt plus the tool outputs/inputs it depends on (context).
+    """
+    payload = normalize_query(query) + "\n" + json.dumps(context or {}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _build_cache():
+    if AGENT_CACHE_BACKEND == "off":
+        return None
+    store = SqliteStore(AGENT_CACHE_DB, table="agent_responses") if AGENT_CACHE_BACKEND == "sqlite" else None
+    return TTLCache(maxsize=AGENT_CACHE_SIZE, ttl=AGENT_CACHE_TTL, store=store)
+
+
+response_cache = _build_cache()
+
+
+def get_cached_response(key: str):
+    if response_cache is None:
+        return MISS
+    return response_cache.get(key)
+
+
+def store_response(key: str, result: dict):
+    if response_cache is None:
+        return
+    # Keep only the JSON-safe parts of an agent result
+    cacheable = {k: v for k, v in result.items() if isinstance(v, (str, int, float, bool, type(None)))}
+    if "output" in cacheable:
+        response_cache.set(key, cacheable)
+
+
+def get_response_cache_stats() -> dict:
+    if response_cache is None:
+        return {"backend": "off"}
+    return {"backend": AGENT_CACHE_BACKEND, **response_cache.stats()}
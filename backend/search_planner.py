@@ -0,0 +1,237 @@
+import math
+import os
+import threading
+import uuid
+
+import numpy as np
+
+from ais_handler import haversine_np
+from ttl_cache import TTLCache, MISS
+
+# Search effort model (classic search theory): one sweep of a cell at track
+# spacing = sweep width gives coverage SWEEP_COVERAGE and a probability of
+# detection of 1 - exp(-coverage). Repeated sweeps of a cell compound.
+SWEEP_COVERAGE = 1.0
+POD_PER_SWEEP = 1 - math.exp(-SWEEP_COVERAGE)
+
+# Defaults for vessels known only by their AIS position
+SEARCH_SPEED_KN = float(os.getenv("SEARCH_SPEED_KN", "12"))
+SEARCH_SWEEP_WIDTH_KM = float(os.getenv("SEARCH_SWEEP_WIDTH_KM", "3"))
+KM_PER_NM = 1.852
+
+# Plans are kept for re-planning; SEARCH_PLAN_TTL seconds after their last use they are dropped
+SEARCH_PLAN_TTL = float(os.getenv("SEARCH_PLAN_TTL", "3600"))
+SEARCH_PLAN_CACHE_SIZE = int(os.getenv("SEARCH_PLAN_CACHE_SIZE", "256"))
+
+
+class SearchGrid:
+    """
+    Probability-of-containment (POC) grid in the layout of the drift
+    ensemble's "density" block: rows run south to north between lat_min and
+    lat_max, columns west to east. Only cells with probability are kept.
+    """
+
+    def __init__(self, lat_min, lat_max, lon_min, lon_max, cells):
+        try:
+            poc = np.asarray(cells, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError("grid cells must be rows of numbers, all the same length")
+        if poc.ndim != 2 or poc.size == 0:
+            raise ValueError("grid cells must be a non-empty 2D array")
+        if not np.isfinite(poc).all():
+            raise ValueError("grid probabilities must be finite")
+        if (poc < 0).any():
+            raise ValueError("grid probabilities must not be negative")
+        if poc.sum() <= 0:
+            raise ValueError("grid has no probability to search")
+        if poc.sum() > 1:
+            poc = poc / poc.sum()
+        self.shape = poc.shape
+        rows, cols = self.shape
+        dlat = (lat_max - lat_min) / rows
+        dlon = (lon_max - lon_min) / cols
+
+        self.rows, self.cols = np.nonzero(poc)
+        self.poc = poc[self.rows, self.cols]
+        self.lats = lat_min + (self.rows + 0.5) * dlat
+        self.lons = lon_min + (self.cols + 0.5) * dlon
+        km_per_deg = math.pi / 180 * 6371
+        self.areas_km2 = (dlat * km_per_deg) * (dlon * km_per_deg * np.cos(np.radians(self.lats)))
+
+    @classmethod
+    def from_density(cls, density: dict) -> "SearchGrid":
+        return cls(density["lat_min"], density["lat_max"], density["lon_min"], density["lon_max"], density["cells"])
+
+    def __len__(self):
+        return self.poc.size
+
+
+class SearchPlan:
+    """
+    Greedy search tasking: repeatedly gives the vessel/cell pair with the
+    highest probability of success per hour (remaining probability x POD,
+    over transit plus sweep time) to that vessel, until no vessel has time
+    left for another cell. Each vessel's best cell is cached, so one
+    assignment only rescores the vessel that moved and the cell that was
+    searched, not the whole vessels x cells matrix.
+    """
+
+    def __init__(self, grid: SearchGrid, vessels: list, hours: float):
+        if not vessels:
+            raise ValueError("a search plan needs at least one vessel")
+        self.id = uuid.uuid4().hex
+        self.grid = grid
+        self.hours = hours
+        self.vessels = [dict(v) for v in vessels]
+        for v in self.vessels:
+            v["speed_kn"] = v.get("speed_kn") or SEARCH_SPEED_KN
+            v["sweep_width_km"] = v.get("sweep_width_km") or SEARCH_SWEEP_WIDTH_KM
+        self.index = {str(v["id"]): i for i, v in enumerate(self.vessels)}
+        self.lock = threading.Lock()
+
+        n = len(self.vessels)
+        self.speed_kmh = np.array([v["speed_kn"] * KM_PER_NM for v in self.vessels])
+        sweep_rate = self.speed_kmh * np.array([v["sweep_width_km"] for v in self.vessels])  # km^2/h
+        self.sweep_hours = grid.areas_km2[None, :] / sweep_rate[:, None]
+
+        self.remaining = grid.poc.copy()       # probability not yet found in each cell
+        self.sweeps = {}                       # cell -> vessels that swept it, in sweep order
+        self.position = np.array([[v["lat"], v["lon"]] for v in self.vessels], dtype=float).reshape(n, 2)
+        self.hours_left = np.full(n, float(hours))
+        self.tasks = [[] for _ in range(n)]    # per vessel: (cell, hours)
+
+        self.score = np.full((n, len(grid)), -np.inf)
+        self.best = np.zeros(n, dtype=np.int64)
+        for v in range(n):
+            self._score_row(v)
+        self._assign(range(n))
+
+    def _cost(self, v, cells=slice(None)):
+        transit = haversine_np(self.position[v, 0], self.position[v, 1],
+                               self.grid.lats[cells], self.grid.lons[cells]) / self.speed_kmh[v]
+        return transit + self.sweep_hours[v, cells]
+
+    def _score_row(self, v):
+        cost = self._cost(v)
+        gain = self.remaining * POD_PER_SWEEP
+        self.score[v] = np.where((cost <= self.hours_left[v]) & (gain > 0), gain / np.maximum(cost, 1e-9), -np.inf)
+        self.best[v] = int(np.argmax(self.score[v]))
+
+    def _assign(self, vessels):
+        """
+        Runs the greedy loop over the given vessels (rows); the others keep their tasks.
+        """
+        vessels = np.asarray(list(vessels), dtype=np.int64)
+        while vessels.size:
+            row_best = self.score[vessels, self.best[vessels]]
+            k = int(np.argmax(row_best))
+            if not np.isfinite(row_best[k]):
+                break
+            v = int(vessels[k])
+            c = int(self.best[v])
+
+            hours = float(self._cost(v, [c])[0])
+            self.tasks[v].append((c, hours))
+            self.sweeps.setdefault(c, []).append(v)
+            self._update_remaining(c)
+            self.hours_left[v] -= hours
+            self.position[v] = (self.grid.lats[c], self.grid.lons[c])
+            self._score_row(v)
+
+            # Cell c is worth less to everyone now; only rows whose best was c need a new argmax
+            others = vessels[vessels != v]
+            finite = np.isfinite(self.score[others, c])
+            self.score[others[finite], c] *= 1 - POD_PER_SWEEP
+            for u in others[self.best[others] == c].tolist():
+                self.best[u] = int(np.argmax(self.score[u]))
+
+    def _update_remaining(self, c):
+        # Sweeps compound: each one finds POD of what the earlier ones missed
+        self.remaining[c] = self.grid.poc[c] * (1 - POD_PER_SWEEP) ** len(self.sweeps.get(c, ()))
+
+    def _gains(self):
+        """
+        Probability found by every task, per vessel in task order. The k-th
+        sweep of a cell (by any vessel) finds poc * (1 - POD)^k * POD.
+        """
+        found = {}
+        for c, vessels in self.sweeps.items():
+            for k, v in enumerate(vessels):
+                found.setdefault((v, c), []).append(float(self.grid.poc[c] * (1 - POD_PER_SWEEP) ** k * POD_PER_SWEEP))
+        # A vessel's repeat sweeps of a cell take its entries there in order
+        return [[found[(v, c)].pop(0) for c, _ in tasks] for v, tasks in enumerate(self.tasks)]
+
+    def move_vessel(self, vessel_id: str, lat: float, lon: float, hours: float = None):
+        """
+        Re-plans one vessel from a new position (and, optionally, a new time
+        budget). Its previous sweeps are removed from the cells it searched,
+        so what is left there (and what the other vessels' sweeps found) is
+        exactly as if it had never searched them; then only its own tasks are
+        rebuilt and the other vessels keep theirs.
+        """
+        v = self.index[str(vessel_id)]
+        for c in {c for c, _ in self.tasks[v]}:
+            self.sweeps[c] = [u for u in self.sweeps[c] if u != v]
+            if not self.sweeps[c]:
+                del self.sweeps[c]
+            self._update_remaining(c)
+        self.tasks[v] = []
+        self.vessels[v]["lat"], self.vessels[v]["lon"] = lat, lon
+        self.position[v] = (lat, lon)
+        self.hours_left[v] = self.hours if hours is None else hours
+        self._score_row(v)
+        self._assign([v])
+
+    def to_dict(self) -> dict:
+        grid = self.grid
+        vessels = []
+        for v, (vessel, gains) in enumerate(zip(self.vessels, self._gains())):
+            tasks = self.tasks[v]
+            vessels.append({
+                **vessel,
+                "hours_used": round(sum(h for _, h in tasks), 2),
+                "pos": round(sum(gains), 4),
+                "cells": [{
+                    "row": int(grid.rows[c]),
+                    "col": int(grid.cols[c]),
+                    "lat": round(float(grid.lats[c]), 4),
+                    "lon": round(float(grid.lons[c]), 4),
+                    "hours": round(h, 2),
+                    "pos": round(g, 5),
+                } for (c, h), g in zip(tasks, gains)],
+            })
+        return {
+            "plan_id": self.id,
+            "hours": self.hours,
+            "cumulative_pos": round(float(grid.poc.sum() - self.remaining.sum()), 4),
+            "total_poc": round(float(grid.poc.sum()), 4),
+            "grid": {"shape": list(grid.shape), "cells": len(grid)},
+            "vessels": vessels,
+        }
+
+
+search_plans = TTLCache(maxsize=SEARCH_PLAN_CACHE_SIZE, ttl=SEARCH_PLAN_TTL)
+
+
+def create_plan(density: dict, vessels: list, hours: float) -> dict:
+    plan = SearchPlan(SearchGrid.from_density(density), vessels, hours)
+    search_plans.set(plan.id, plan)
+    return plan.to_dict()
+
+
+def replan_vessel(plan_id: str, vessel_id: str, lat: float, lon: float, hours: float = None):
+    """
+    Updated plan after one vessel moved, or None if the plan is gone. Raises
+    KeyError for a vessel that is not part of the plan.
+    """
+    plan = search_plans.get(plan_id)
+    if plan is MISS:
+        return None
+    with plan.lock:
+        plan.move_vessel(vessel_id, lat, lon, hours)
+        search_plans.set(plan_id, plan)  # refresh the TTL
+        return plan.to_dict()
+
+
+def get_search_plan_stats() -> dict:
+    return search_plans.stats()
@@ -1,17 +1,30 @@
 
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import sys
 import os
 import json
+import asyncio
 
 # Add current dir to path to find agent
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from agent import run_agent, ekf_trajectory, calculate_drift_physics
-from ais_handler import fetch_nearby_ships
+from agent import run_agent_async, warm_up_agent, AgentSaturated, llm_gate
+from drift_physics import calculate_drift_physics, calculate_drift_batch, integrate_drift, wind_from_series, average_wind, MAX_PARTICLES, LEEWAY_CLASSES
+from ais_handler import fetch_nearby_ships, ingestor, frame_stats
+from tool_router import dispatch_async, get_router_stats
+from weather_handler import get_weather_data, get_weather_data_async, get_weather_batch, get_weather_cache_stats, close_async_client, weather_cache_key
+from response_cache import get_response_cache_stats
+from terrain import describe_terrain, get_recon_stats
+from wind_field import wind_fields, get_wind_field_stats
+from ekf_tracker import track_store, get_track_stats
+from search_planner import create_plan, replan_vessel, get_search_plan_stats
+from intercept import drift_track, rank_responders
+from starlette.concurrency import run_in_threadpool
 
 app = FastAPI()
 
@@ -28,28 +41,149 @@ class PredictRequest(BaseModel):
     query: str
     lat: float
     lon: float
+    # Skip the agent response cache for this request
+    no_cache: bool = False
 
 @app.get("/")
 def health_check():
     return {"status": "AI Agent Online", "model": "Llama-3-70b via Groq"}
 
+# Set AIS_BACKGROUND=1 on long-running servers to keep a live AIS vessel table fed by one
+# AISStream subscription. Off by default and always off on Vercel, where every cold start
+# would open its own subscription for the life of one invocation; /api/ships then falls
+# back to a short per-request snapshot.
+AIS_BACKGROUND = os.getenv("AIS_BACKGROUND", "0") == "1" and not os.getenv("VERCEL")
+
+# Set AGENT_WARMUP=1 on long-running servers to build the agent right after startup
+# instead of on the first /predict (serverless keeps the default: build on demand)
+AGENT_WARMUP = os.getenv("AGENT_WARMUP", "0") == "1"
+
+@app.on_event("startup")
+async def start_background_workers():
+    if AIS_BACKGROUND:
+        ingestor.start()
+    if AGENT_WARMUP:
+        asyncio.ensure_future(warm_up_agent())
+
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await ingestor.stop()
+    await close_async_client()
+
+@app.get("/metrics")
+def get_metrics():
+    """
+    Runtime counters for caches and background workers.
+    """
+    return {
+        "weather_cache": get_weather_cache_stats(),
+        "agent_cache": get_response_cache_stats(),
+        "llm": llm_gate.stats(),
+        "ais": ingestor.stats(),
+        "ais_frames": frame_stats.snapshot(),
+        "tool_router": get_router_stats(),
+        "recon": get_recon_stats(),
+        "wind_field": get_wind_field_stats(),
+        "tracks": get_track_stats(),
+        "search_plans": get_search_plan_stats(),
+    }
+
 @app.post("/predict")
-def predict_crash_zone(request: PredictRequest):
+async def predict_crash_zone(request: PredictRequest):
     """
     Endpoint for the AI Agent.
     Receives current signal loss location and runs the agent to predict crash site.
+    Runs on the event loop with a bounded number of concurrent LLM calls;
+    answers 429 when the queue is full.
     """
     try:
-        # Construct a natural language query for the agent if not provided specifically
-        full_query = (
-            f"{request.query} "
-            f"The last known position was Latitude {request.lat}, Longitude {request.lon}. "
-            f"Assume a wind vector of 10 m/s North-East for 6 hours drift."
-        )
+        full_query = _predict_query(request)
         
-        result = run_agent(full_query)
+        result = await run_agent_async(full_query, use_cache=not request.no_cache, context=_predict_context(request))
         return result
         
+    except AgentSaturated as e:
+        raise _agent_busy(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _agent_busy(e: AgentSaturated) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail={"error": "AI agent is busy, retry shortly", "queue_depth": e.queue_depth},
+        headers={"Retry-After": "5"}
+    )
+
+class WindSample(BaseModel):
+    t_hours: float
+    u: float
+    v: float
+
+class PredictBatchRequest(BaseModel):
+    events: List[PredictRequest] = Field(..., max_length=100)
+
+# Agent calls of one batch run side by side, at most this many at a time
+PREDICT_BATCH_WORKERS = int(os.getenv("PREDICT_BATCH_WORKERS", "4"))
+
+def _predict_query(request: PredictRequest) -> str:
+    # Construct a natural language query for the agent if not provided specifically
+    return (
+        f"{request.query} "
+        f"The last known position was Latitude {request.lat}, Longitude {request.lon}. "
+        f"Assume a wind vector of 10 m/s North-East for 6 hours drift."
+    )
+
+def _predict_context(request: PredictRequest) -> dict:
+    # Answers depend on the live weather the tools see, so the cache key
+    # carries the weather cell and its time bucket
+    return {"weather": weather_cache_key(request.lat, request.lon)}
+
+@app.post("/predict/batch")
+async def predict_crash_zone_batch(request: PredictBatchRequest):
+    """
+    Runs /predict for many events in one round trip.
+    The drift physics for every event is computed in one vectorized pass
+    (weather deduplicated by grid cell), identical agent queries are only
+    run once, and results are returned in request order.
+    Agent calls go through the same LLM gate as /predict, at most
+    PREDICT_BATCH_WORKERS at a time; answers 429 when the gate is full.
+    """
+    try:
+        events = request.events
+        if not events:
+            return {"results": [], "count": 0}
+
+        winds = await run_in_threadpool(_resolve_winds, events)
+        physics = calculate_drift_batch(
+            [e.lat for e in events], [e.lon for e in events],
+            [w[0] for w in winds], [w[1] for w in winds],
+            6.0
+        )
+
+        queries = [_predict_query(e) for e in events]
+        unique = {}
+        for query, event in zip(queries, events):
+            unique.setdefault(query, event)
+
+        slots = asyncio.Semaphore(max(1, PREDICT_BATCH_WORKERS))
+
+        async def run(query):
+            event = unique[query]
+            async with slots:
+                return await run_agent_async(query, use_cache=not event.no_cache, context=_predict_context(event))
+
+        answers = dict(zip(unique, await asyncio.gather(*(run(q) for q in unique))))
+
+        results = []
+        for query, physics_data, (_, _, source) in zip(queries, physics, winds):
+            result = dict(answers[query])
+            result["physics"] = physics_data
+            result["physics_source"] = source
+            results.append(result)
+        return {"results": results, "count": len(results)}
+
+    except AgentSaturated as e:
+        raise _agent_busy(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -57,54 +191,268 @@ class SimulationRequest(BaseModel):
     lat: float
     lon: float
     radius: int = 300
+    # Monte Carlo ensemble size (1 = single-point prediction) and RNG seed
+    particles: int = Field(1, ge=1, le=MAX_PARTICLES)
+    seed: Optional[int] = None
+    # Drift horizon and integrator step (used by the streaming endpoint)
+    hours: float = Field(4.5, gt=0, le=240)
+    step_minutes: float = Field(15.0, ge=1, le=360)
+    # Optional time-varying wind; overrides local wind fields and live weather when provided
+    wind_series: Optional[List[WindSample]] = None
+    # Search objects (see drift_physics.LEEWAY_CLASSES) to compute separate search areas for
+    object_classes: Optional[List[Literal[tuple(LEEWAY_CLASSES)]]] = None
+    # Start from this flight's last tracked position and its uncertainty (see /api/tracks)
+    flight_id: Optional[str] = None
+
+# Particles per object class when the request does not ask for an ensemble
+LEEWAY_PARTICLES = int(os.getenv("LEEWAY_PARTICLES", "2000"))
 
-from weather_handler import get_weather_data
+def _resolve_wind(lat: float, lon: float, weather: dict = None):
+    """
+    Returns (wind_u, wind_v, source) from live weather, or static fallbacks.
+    Pass 'weather' to reuse a reading that was already fetched.
+    """
+    # Defaults
+    wind_u = 12.5
+    wind_v = 4.2
+    source = "Static Fallback"
+
+    # Try to get real weather
+    if weather is None:
+        weather = get_weather_data(lat, lon)
+    if weather:
+        wind_u = weather["wind_u"]
+        wind_v = weather["wind_v"]
+        source = f"Live: {weather['description']} ({weather['wind_speed']} m/s)"
+    return wind_u, wind_v, source
+
+def _field_wind(lat: float, lon: float):
+    """
+    Returns (wind_u, wind_v, source) from a local forecast grid covering the
+    point right now, or None. No network I/O.
+    """
+    field = wind_fields.covering(lat, lon)
+    if field is None:
+        return None
+    wind_u, wind_v = field.sample(lat, lon)
+    return wind_u, wind_v, f"Wind Field: {field.name}"
+
+def _resolve_winds(events) -> list:
+    """
+    _resolve_wind for many events. Events covered by a local wind field skip
+    the weather lookup; the rest are fetched once per grid cell.
+    """
+    local = [_field_wind(e.lat, e.lon) for e in events]
+    weather = iter(get_weather_batch([(e.lat, e.lon) for e, w in zip(events, local) if w is None]))
+    return [w or _resolve_wind(e.lat, e.lon, next(weather)) for e, w in zip(events, local)]
+
+def _track_start(request: SimulationRequest):
+    """
+    Returns (request, start_cov_m, start): for a tracked flight_id the request
+    moves to the track's latest position, start_cov_m is its position
+    covariance and 'start' describes the track; otherwise (request, None, None).
+    """
+    track = track_store.get(request.flight_id) if request.flight_id else None
+    if track is None:
+        return request, None, None
+    start = {"flight_id": track["flight_id"], "t": track["t"], "ellipse": track["ellipse"]}
+    return request.model_copy(update={"lat": track["lat"], "lon": track["lon"]}), track["position_cov_m2"], start
+
+def _search_areas(request: SimulationRequest, wind, start_cov_m=None) -> dict:
+    """
+    Per-class search areas from one leeway run: every requested object class
+    drifts in the same particle arrays, under the wind from _drift_wind.
+    """
+    particles = request.particles if request.particles > 1 else LEEWAY_PARTICLES
+    *_, final = integrate_drift(request.lat, request.lon, wind, request.hours,
+                                step_minutes=request.step_minutes, particles=particles, seed=request.seed,
+                                object_classes=list(dict.fromkeys(request.object_classes)), start_cov_m=start_cov_m)
+    return final["classes"]
 
 @app.post("/simulate-drift")
-def simulate_drift_physics(request: SimulationRequest):
+async def simulate_drift_physics(request: SimulationRequest):
     """
     Returns the raw physics calculation steps for visualization.
     Fetches real-time weather for accuracy.
+    With object_classes, also returns a search area per object class
+    ("search_areas"), all classes computed in one leeway run.
+    With a tracked flight_id, the drift starts from the track's last
+    position and ensembles from its uncertainty ellipse.
+    The wind (request series, local wind field, or live/static wind) is
+    resolved once and drives both; the single-shot physics uses its
+    average over the horizon.
     """
     try:
-        # Defaults
-        wind_u = 12.5
-        wind_v = 4.2
-        source = "Static Fallback"
-        
-        # Try to get real weather
-        weather = get_weather_data(request.lat, request.lon)
-        if weather:
-            wind_u = weather["wind_u"]
-            wind_v = weather["wind_v"]
-            source = f"Live: {weather['description']} ({weather['wind_speed']} m/s)"
-            
-        hours = 4.5
+        request, start_cov_m, start = _track_start(request)
+        wind, inputs = await _drift_wind_async(request)
+        hours = request.hours
+        wind_u, wind_v = average_wind(wind, request.lat, request.lon, hours, request.step_minutes)
         
-        physics_data = calculate_drift_physics(request.lat, request.lon, wind_u, wind_v, hours)
+        # Large ensembles are CPU work; keep them off the event loop
+        physics_data = await run_in_threadpool(
+            calculate_drift_physics,
+            request.lat, request.lon, wind_u, wind_v, hours,
+            particles=request.particles, seed=request.seed, start_cov_m=start_cov_m
+        )
         
-        return {
-            "physics": physics_data,
-            "inputs": {
-                "wind_u_ms": round(wind_u, 2),
-                "wind_v_ms": round(wind_v, 2),
-                "drift_hours": hours,
-                "source": source
-            }
-        }
+        inputs.update({"wind_u_ms": round(wind_u, 2), "wind_v_ms": round(wind_v, 2), "drift_hours": hours})
+        response = {"physics": physics_data, "inputs": inputs}
+        if start is not None:
+            response["inputs"]["start"] = start
+        if request.object_classes:
+            response["search_areas"] = await run_in_threadpool(_search_areas, request, wind, start_cov_m)
+        return response
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _drift_wind(request: SimulationRequest, weather: dict = None):
+    """
+    Returns (wind, inputs) for the time-stepped integrator: the request's
+    wind series, else a local wind field, else live/static wind. Pass
+    'weather' to reuse a reading that was already fetched.
+    """
+    field = None if request.wind_series else wind_fields.covering(request.lat, request.lon)
+    if request.wind_series:
+        samples = sorted(request.wind_series, key=lambda w: w.t_hours)
+        wind = wind_from_series([w.t_hours for w in samples], [w.u for w in samples], [w.v for w in samples])
+        return wind, {"wind_samples": len(samples), "source": "Request Wind Series"}
+    if field is not None:
+        # Every particle samples the gridded forecast at its own position and time
+        return field.sampler(), {"wind_field": field.name, "source": f"Wind Field: {field.name}"}
+    wind_u, wind_v, source = _resolve_wind(request.lat, request.lon, weather)
+    return (wind_u, wind_v), {"wind_u_ms": round(wind_u, 2), "wind_v_ms": round(wind_v, 2), "source": source}
+
+async def _drift_wind_async(request: SimulationRequest):
+    """
+    _drift_wind with live weather from the async client, so the event loop never blocks on it.
+    """
+    if request.wind_series or wind_fields.covering(request.lat, request.lon) is not None:
+        return _drift_wind(request)
+    weather = await get_weather_data_async(request.lat, request.lon)
+    # {} = looked up and nothing found: use the static fallback rather than fetching again
+    return _drift_wind(request, weather or {})
+
+@app.post("/simulate-drift/stream")
+def stream_drift_trajectory(request: SimulationRequest):
+    """
+    Streams the time-stepped drift trajectory as NDJSON, one line per step,
+    so the map can draw the track while the integrator is still running.
+    The first line carries the inputs, the last one the final prediction.
+    """
+    request, start_cov_m, start = _track_start(request)
+    wind, inputs = _drift_wind(request)
+    object_classes = list(dict.fromkeys(request.object_classes or []))
+    inputs.update({"drift_hours": request.hours, "step_minutes": request.step_minutes, "particles": request.particles})
+    if object_classes:
+        inputs["object_classes"] = object_classes
+    if start is not None:
+        inputs["start"] = start
+
+    def generate():
+        yield json.dumps({"inputs": inputs}) + "\n"
+        for record in integrate_drift(request.lat, request.lon, wind, request.hours,
+                                      step_minutes=request.step_minutes,
+                                      particles=request.particles, seed=request.seed,
+                                      object_classes=object_classes, start_cov_m=start_cov_m):
+            yield json.dumps(record) + "\n"
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+class TrackObservation(BaseModel):
+    flight_id: str
+    lat: float = Field(..., ge=-90, le=90)
+    lon: float
+    # Report time (unix s, default now), ground speed (m/s), true track (degrees) and position accuracy (m)
+    t: Optional[float] = None
+    speed_ms: Optional[float] = Field(None, ge=0)
+    track_deg: Optional[float] = None
+    accuracy_m: Optional[float] = Field(None, gt=0)
+
+class TrackBatchRequest(BaseModel):
+    observations: List[TrackObservation] = Field(..., max_length=20000)
+
+@app.post("/api/tracks/observe")
+def observe_tracks(request: TrackBatchRequest):
+    """
+    Folds a batch of ADS-B / last-known position reports into the EKF track
+    store in one vectorized update.
+    """
+    observations = request.observations
+    counts = track_store.update(
+        [o.flight_id for o in observations],
+        [o.lat for o in observations], [o.lon for o in observations],
+        times=[o.t for o in observations],
+        speeds=[o.speed_ms for o in observations],
+        tracks=[o.track_deg for o in observations],
+        accuracy_m=[o.accuracy_m for o in observations]
+    )
+    return {**counts, "tracks": len(track_store)}
+
+@app.get("/api/tracks/{flight_id}")
+def get_track(flight_id: str, at: Optional[float] = None):
+    """
+    Latest EKF estimate for a flight with its 95% position ellipse;
+    'at' (unix s) extrapolates it, e.g. to the time of signal loss.
+    """
+    track = track_store.get(flight_id, at)
+    if track is None:
+        raise HTTPException(status_code=404, detail="Flight is not tracked")
+    return track
+
+class DriftBatchRequest(BaseModel):
+    events: List[SimulationRequest] = Field(..., max_length=500)
+
+@app.post("/simulate-drift/batch")
+def simulate_drift_batch(request: DriftBatchRequest):
+    """
+    Single-point drift for many signal-loss events in one call.
+    Weather is fetched once per grid cell and the physics for all events runs
+    as one vectorized pass. Results are returned in request order.
+    Ensemble and streaming options are ignored in batch mode.
+    """
+    try:
+        events = request.events
+        if not events:
+            return {"results": [], "count": 0}
+
+        winds = _resolve_winds(events)
+
+        physics = calculate_drift_batch(
+            [e.lat for e in events], [e.lon for e in events],
+            [w[0] for w in winds], [w[1] for w in winds],
+            [e.hours for e in events]
+        )
+
+        results = []
+        for event, (wind_u, wind_v, source), physics_data in zip(events, winds, physics):
+            results.append({
+                "physics": physics_data,
+                "inputs": {
+                    "wind_u_ms": round(wind_u, 2),
+                    "wind_v_ms": round(wind_v, 2),
+                    "drift_hours": event.hours,
+                    "source": source
+                }
+            })
+        return {"results": results, "count": len(results)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+class ShipsRequest(BaseModel):
+    lat: float
+    lon: float
+    radius: int = 300
+    # Only return the closest N vessels (e.g. "closest 10 able to respond")
+    limit: Optional[int] = Field(None, ge=1)
+
 @app.post("/api/ships")
-async def get_nearby_ships(request: SimulationRequest):
+async def get_nearby_ships(request: ShipsRequest):
     """
     Fetches real-time ship data from AISStream.io near the crash site.
+    Ships come back sorted by distance.
     """
     try:
-        ships = await fetch_nearby_ships(request.lat, request.lon, request.radius)
-        
-        # Sort by distance
-        ships.sort(key=lambda x: x["distance_km"])
+        ships = await fetch_nearby_ships(request.lat, request.lon, request.radius, limit=request.limit)
         
         return {"ships": ships, "count": len(ships)}
     except Exception as e:
@@ -112,46 +460,177 @@ async def get_nearby_ships(request: SimulationRequest):
         # Return empty list on error instead of 500 to avoid breaking UI
         return {"ships": [], "count": 0, "error": str(e)}
 
+class ResponderVessel(BaseModel):
+    id: str
+    name: Optional[str] = None
+    lat: float
+    lon: float
+    speed_kn: Optional[float] = Field(None, gt=0)
+
+class InterceptRequest(SimulationRequest):
+    # Omit to rank the live AIS vessels within 'radius' km
+    vessels: Optional[List[ResponderVessel]] = Field(None, max_length=5000)
+    limit: Optional[int] = Field(None, ge=1)
+
+@app.post("/api/ships/intercept")
+async def rank_intercepts(request: InterceptRequest):
+    """
+    Ranks vessels by the earliest time they can reach the drifting target
+    (its mean position, or the edge of the particle cloud for ensembles),
+    rather than by distance to the last known point.
+    Like /api/ships, failures return an empty ranking with an error.
+    """
+    try:
+        request, start_cov_m, start = _track_start(request)
+        if request.vessels is not None:
+            vessels = [v.model_dump() for v in request.vessels]
+        else:
+            ships = await fetch_nearby_ships(request.lat, request.lon, request.radius)
+            vessels = [{**s, "id": str(s["mmsi"])} for s in ships]
+        wind, inputs = await run_in_threadpool(_drift_wind, request)
+
+        track = await run_in_threadpool(drift_track, request.lat, request.lon, wind, request.hours,
+                                        request.step_minutes, request.particles, request.seed, start_cov_m)
+        responders = rank_responders(vessels, track, limit=request.limit)
+        inputs.update({"drift_hours": request.hours, "step_minutes": request.step_minutes,
+                       "particles": request.particles})
+        if start is not None:
+            inputs["start"] = start
+        return {"responders": responders, "count": len(responders), "inputs": inputs}
+    except Exception as e:
+        print(f"Intercept Error: {e}")
+        # Same shape as /api/ships on failure so the UI keeps working
+        return {"responders": [], "count": 0, "error": str(e)}
+
+class ProbabilityGrid(BaseModel):
+    # Same layout as the drift ensemble's "density" block (rows south to north)
+    lat_min: float
+    lat_max: float
+    lon_min: float
+    lon_max: float
+    cells: List[List[float]]
+
+class SearchVessel(BaseModel):
+    id: str
+    name: Optional[str] = None
+    lat: float
+    lon: float
+    speed_kn: Optional[float] = Field(None, gt=0)
+    sweep_width_km: Optional[float] = Field(None, gt=0)
+
+class SearchPlanRequest(BaseModel):
+    grid: ProbabilityGrid
+    # Omit to task the live AIS vessels nearest the grid
+    vessels: Optional[List[SearchVessel]] = Field(None, max_length=500)
+    hours: float = Field(6, gt=0, le=72)
+    radius: int = 300
+    limit: int = Field(30, ge=1)
+
+class VesselMove(BaseModel):
+    vessel_id: str
+    lat: float
+    lon: float
+    # Time the vessel has left; defaults to the plan's full window
+    hours: Optional[float] = Field(None, gt=0, le=72)
+
+@app.post("/api/search-plan")
+async def plan_search(request: SearchPlanRequest):
+    """
+    Assigns probability grid cells to vessels so the cumulative probability
+    of success over the search window is as high as the greedy planner can
+    make it. Vessels default to the ships AIS reports near the grid
+    (502 when AIS cannot be reached, 422 when it reports none).
+    """
+    grid = request.grid
+    if request.vessels is not None:
+        vessels = [v.model_dump() for v in request.vessels]
+    else:
+        try:
+            ships = await fetch_nearby_ships((grid.lat_min + grid.lat_max) / 2, (grid.lon_min + grid.lon_max) / 2,
+                                             request.radius, limit=request.limit)
+        except Exception as e:
+            print(f"AIS Error: {e}")
+            raise HTTPException(status_code=502, detail=f"AIS unavailable: {e}")
+        if not ships:
+            raise HTTPException(status_code=422, detail="No AIS vessels near the grid")
+        vessels = [{"id": str(s["mmsi"]), "name": s.get("name"), "lat": s["lat"], "lon": s["lon"]} for s in ships]
+    try:
+        return await run_in_threadpool(create_plan, grid.model_dump(), vessels, request.hours)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/api/search-plan/{plan_id}/vessel")
+def move_search_vessel(plan_id: str, move: VesselMove):
+    """
+    Re-plans one vessel of an existing plan from its new position; the other
+    vessels keep their assignments.
+    """
+    try:
+        plan = replan_vessel(plan_id, move.vessel_id, move.lat, move.lon, move.hours)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Vessel is not part of this plan")
+    if plan is None:
+        raise HTTPException(status_code=404, detail="Search plan expired or unknown")
+    return plan
+
 class HelplineRequest(BaseModel):
     lat: float
     lon: float
 
+async def _helpline_via_agent(lat: float, lon: float) -> dict:
+    """
+    Asks the AI agent for the rescue centre and scrapes JSON from its answer.
+    """
+    # Prompt the agent to use its lookup tool
+    prompt = (
+        f"Find the nearest Maritime Rescue Coordination Center (MRCC) for Latitude {lat}, Longitude {lon}. "
+        f"Use the lookup_helpline_info tool."
+        f"Return ONLY a JSON object with keys: 'country', 'agency', 'number'. "
+        f"Do not include any other text."
+    )
+    
+    result = await run_agent_async(prompt)
+    
+    # Attempt to parse JSON from agent output if it's a string
+    output = result.get("output", "{}")
+    try:
+        # Clean up potential markdown code blocks
+        clean_output = output.replace("```json", "").replace("```", "").strip()
+        # Sometimes agent returns text before JSON, try to find the JSON brackes
+        if "{" in clean_output:
+            clean_output = clean_output[clean_output.find("{"):clean_output.rfind("}")+1]
+            
+        data = json.loads(clean_output)
+        return data
+    except:
+        # Fallback if parsing fails - try to extract from raw output or use default
+        return {
+            "country": "Unknown Region",
+            "agency": "Global Distress Channel",
+            "number": "112",
+            "raw_output": output
+        }
+
 @app.post("/api/rescue-helpline")
-def get_rescue_helpline(request: HelplineRequest):
+async def get_rescue_helpline(request: HelplineRequest):
     """
-    Uses the AI agent to find the nearest rescue coordination center.
+    Finds the nearest rescue coordination center.
+    Answered directly from the local MRCC/SAR index when it has a confident
+    match; the AI agent is only consulted otherwise (behind the same LLM gate
+    as /predict, so it answers 429 when that is full). 'path' says which was used.
     """
     try:
-        # Prompt the agent to use its lookup tool
-        prompt = (
-            f"Find the nearest Maritime Rescue Coordination Center (MRCC) for Latitude {request.lat}, Longitude {request.lon}. "
-            f"Use the lookup_helpline_info tool."
-            f"Return ONLY a JSON object with keys: 'country', 'agency', 'number'. "
-            f"Do not include any other text."
+        routed = await dispatch_async(
+            "rescue_helpline",
+            lambda: _helpline_via_agent(request.lat, request.lon),
+            lat=request.lat, lon=request.lon
         )
-        
-        result = run_agent(prompt)
-        
-        # Attempt to parse JSON from agent output if it's a string
-        output = result.get("output", "{}")
-        try:
-            # Clean up potential markdown code blocks
-            clean_output = output.replace("```json", "").replace("```", "").strip()
-            # Sometimes agent returns text before JSON, try to find the JSON brackes
-            if "{" in clean_output:
-                clean_output = clean_output[clean_output.find("{"):clean_output.rfind("}")+1]
-                
-            data = json.loads(clean_output)
-            return data
-        except:
-            # Fallback if parsing fails - try to extract from raw output or use default
-            return {
-                "country": "Unknown Region",
-                "agency": "Global Distress Channel",
-                "number": "112",
-                "raw_output": output
-            }
-            
+        data = dict(routed["result"])
+        data["path"] = routed["path"]
+        return data
+
+    except AgentSaturated as e:
+        raise _agent_busy(e)
     except Exception as e:
         print(f"Agent Error: {e}")
         return {
@@ -161,7 +640,6 @@ def get_rescue_helpline(request: HelplineRequest):
         }
 
 from sms_handler import send_crash_alert
-from agent import analyze_terrain
 
 class ValidationRequest(BaseModel):
     lat: float
@@ -180,24 +658,19 @@ def trigger_sms_alert(request: AlertRequest):
     """
     return send_crash_alert(request.lat, request.lon, request.flight_id, request.wind_data)
 
+class ReconRequest(BaseModel):
+    lat: float
+    lon: float
+    enrich: bool = False  # add a (cached, rate-limited) web search for land/coast cells
+
 @app.post("/api/recon")
-def get_recon_data(request: ValidationRequest):
+def get_recon_data(request: ReconRequest):
     """
     Analyzes terrain and location context.
-    Using ValidationRequest (lat/lon) for simplicity.
+    Land vs sea comes from the bundled terrain raster; web search is opt-in enrichment.
     """
     try:
-        # We can call the tool directly as a function since it's a @tool
-        # But @tool makes it a StructuredTool object.
-        # We can access the underlying function or invoke it.
-        # Simplest is to just invoke it if it was designed as a standalone, 
-        # but here we can just use the function logic or better yet, asking the agent or just search.
-        # Actually, let's just use the logic inside valid for direct call if we extracted it, 
-        # but since it's wrapped, let's just use the search directly here or call the agent.
-        # Calling the agent might be overkill for just a search, but let's use the tool we defined.
-        
-        # Accessing the func from the tool
-        result = analyze_terrain.invoke({"lat": request.lat, "lon": request.lon})
+        result = describe_terrain(request.lat, request.lon, request.enrich)
         return {"recon": result}
     except Exception as e:
         return {"recon": "Recon unavailable", "error": str(e)}
@@ -0,0 +1,213 @@
+import math
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from ttl_cache import TTLCache, SqliteStore, MISS
+
+# Land/sea raster built by scripts/build_terrain_raster.py (2-bit codes, memory-mapped)
+TERRAIN_RASTER_PATH = os.getenv(
+    "TERRAIN_RASTER_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "terrain.bin")
+)
+RASTER_MAGIC = b"TERRAIN1"
+RASTER_HEADER = struct.Struct(">IId")
+
+# Web-search enrichment: results are cached per RECON_GRID_DEG cell for RECON_CACHE_TTL
+# seconds (set RECON_CACHE_DB to keep them across restarts), and live searches are
+# spaced at least RECON_SEARCH_INTERVAL_S apart. RECON_WEB_SEARCH=0 disables them.
+RECON_WEB_SEARCH = os.getenv("RECON_WEB_SEARCH", "1") == "1"
+RECON_GRID_DEG = float(os.getenv("RECON_GRID_DEG", "0.25"))
+RECON_CACHE_TTL = float(os.getenv("RECON_CACHE_TTL", str(7 * 24 * 3600)))
+RECON_CACHE_NEGATIVE_TTL = float(os.getenv("RECON_CACHE_NEGATIVE_TTL", "300"))
+RECON_CACHE_SIZE = int(os.getenv("RECON_CACHE_SIZE", "4096"))
+RECON_CACHE_DB = os.getenv("RECON_CACHE_DB")
+RECON_SEARCH_INTERVAL_S = float(os.getenv("RECON_SEARCH_INTERVAL_S", "2"))
+
+OCEAN, COASTAL_WATERS, COASTLINE, LAND = range(4)
+TERRAIN_CLASSES = {
+    OCEAN: "open ocean",
+    COASTAL_WATERS: "coastal waters",
+    COASTLINE: "coastline",
+    LAND: "land",
+}
+TERRAIN_NOTES = {
+    OCEAN: "No land in this cell: surface search and drift modelling apply.",
+    COASTAL_WATERS: "Mostly water with land nearby: expect shoreline and shallow-water debris.",
+    COASTLINE: "Mostly land with open water nearby: search both the shore and the water.",
+    LAND: "Inland site: ground search teams, no sea drift.",
+}
+
+
+class TerrainRaster:
+    """
+    Memory-mapped global land/sea raster. Only the pages touched by lookups
+    are read from disk, so opening it is effectively free.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(RASTER_MAGIC)) != RASTER_MAGIC:
+                raise ValueError(f"{path} is not a terrain raster")
+            self.rows, self.cols, self.cell_deg = RASTER_HEADER.unpack(f.read(RASTER_HEADER.size))
+        self.path = path
+        self.packed = np.memmap(
+            path, dtype=np.uint8, mode="r",
+            offset=len(RASTER_MAGIC) + RASTER_HEADER.size,
+            shape=(self.rows, self.cols // 4)
+        )
+
+    def _cell(self, lat, lon):
+        row = min(max(int((90.0 - lat) / self.cell_deg), 0), self.rows - 1)
+        col = int(((lon + 180.0) % 360.0) / self.cell_deg) % self.cols
+        return row, col
+
+    def classify(self, lat: float, lon: float) -> int:
+        """
+        Terrain code (OCEAN .. LAND) of the cell containing the point.
+        """
+        row, col = self._cell(float(lat), float(lon))
+        return (int(self.packed[row, col >> 2]) >> ((col & 3) * 2)) & 3
+
+    def classify_many(self, lats, lons) -> np.ndarray:
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        rows = np.clip(((90.0 - lats) / self.cell_deg).astype(np.int64), 0, self.rows - 1)
+        cols = (((lons + 180.0) % 360.0) / self.cell_deg).astype(np.int64) % self.cols
+        return (self.packed[rows, cols >> 2] >> ((cols & 3) * 2).astype(np.uint8)) & 3
+
+
+def _load_raster():
+    if not os.path.exists(TERRAIN_RASTER_PATH):
+        print(f"Warning: terrain raster not found at {TERRAIN_RASTER_PATH}. Recon falls back to web search.")
+        return None
+    try:
+        return TerrainRaster(TERRAIN_RASTER_PATH)
+    except Exception as e:
+        print(f"Terrain raster error: {e}")
+        return None
+
+
+terrain_raster = _load_raster()
+
+recon_cache = TTLCache(
+    maxsize=RECON_CACHE_SIZE,
+    ttl=RECON_CACHE_TTL,
+    store=SqliteStore(RECON_CACHE_DB, table="recon") if RECON_CACHE_DB else None
+)
+
+
+class SearchLimiter:
+    """
+    Spaces outbound searches at least 'interval' seconds apart; callers that
+    would have to wait are turned away instead of queued.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._next_allowed = 0.0
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._next_allowed:
+                self.rejected += 1
+                return False
+            self._next_allowed = now + self.interval
+            self.allowed += 1
+            return True
+
+
+search_limiter = SearchLimiter(RECON_SEARCH_INTERVAL_S)
+
+
+def recon_cell_key(lat: float, lon: float) -> str:
+    return f"{math.floor(lat / RECON_GRID_DEG)}:{math.floor(lon / RECON_GRID_DEG)}"
+
+
+def _web_search(lat: float, lon: float) -> str:
+    from langchain_community.tools import DuckDuckGoSearchRun
+
+    query = f"What is the geography and terrain at coordinates {lat}, {lon}? Is it ocean, desert, mountain, or city? Nearest landmark?"
+    return DuckDuckGoSearchRun().invoke(query)
+
+
+def web_enrichment(lat: float, lon: float):
+    """
+    Cached web-search description of the grid cell around the point, or None
+    when search is disabled, rate-limited or failing.
+    """
+    key = recon_cell_key(lat, lon)
+    cached = recon_cache.get(key)
+    if cached is not MISS:
+        return cached
+    if not RECON_WEB_SEARCH or not search_limiter.try_acquire():
+        return None
+
+    try:
+        result = _web_search(lat, lon)
+        recon_cache.set(key, result)
+        return result
+    except Exception as e:
+        print(f"Terrain search error: {e}")
+        recon_cache.set(key, None, ttl=RECON_CACHE_NEGATIVE_TTL)
+        return None
+
+
+def recon(lat: float, lon: float, enrich: bool = False) -> dict:
+    """
+    Terrain context for a position. The bundled raster answers land vs sea
+    locally; with enrich=True, non-ocean cells are also described by a
+    (cached, rate-limited) web search.
+    """
+    lat = float(lat)
+    lon = (float(lon) + 180) % 360 - 180
+    result = {"lat": lat, "lon": lon, "terrain": None, "is_ocean": None, "source": "raster"}
+
+    if terrain_raster is not None:
+        code = terrain_raster.classify(lat, lon)
+        result.update({
+            "terrain": TERRAIN_CLASSES[code],
+            "is_ocean": code in (OCEAN, COASTAL_WATERS),
+            "summary": f"{TERRAIN_CLASSES[code].capitalize()} at {lat:.3f}, {lon:.3f}. {TERRAIN_NOTES[code]}",
+        })
+        if not enrich or code == OCEAN:
+            return result
+    else:
+        result.update({"source": "web", "summary": "Terrain raster unavailable."})
+
+    enrichment = web_enrichment(lat, lon)
+    if enrichment:
+        result["enrichment"] = enrichment
+        if terrain_raster is None:
+            result["summary"] = enrichment
+    return result
+
+
+def describe_terrain(lat: float, lon: float, enrich: bool = False) -> str:
+    """
+    recon() flattened into the text shown in the dashboard recon panel.
+    """
+    result = recon(lat, lon, enrich)
+    if result.get("enrichment") and result["source"] == "raster":
+        return f"{result['summary']}\n\n{result['enrichment']}"
+    return result["summary"]
+
+
+def get_recon_stats() -> dict:
+    return {
+        "raster": None if terrain_raster is None else {
+            "path": terrain_raster.path,
+            "shape": [terrain_raster.rows, terrain_raster.cols],
+            "cell_deg": terrain_raster.cell_deg,
+        },
+        "cache": recon_cache.stats(),
+        "searches_allowed": search_limiter.allowed,
+        "searches_rate_limited": search_limiter.rejected,
+    }
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import sys
+import time
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from langchain_core.tools import tool
+
+import agent
+
+
+@tool
+def slow_lookup(seconds: float) -> str:
+    """Sleeps, then answers."""
+    time.sleep(seconds)
+    return "done"
+
+
+def test_tool_calls_run_concurrently_with_budgets(monkeypatch):
+    monkeypatch.setitem(agent.TOOL_TIMEOUTS, "slow_lookup", 0.5)
+    wrapped = agent._timed_tool(slow_lookup)
+
+    async def one_turn():
+        timings = []
+        agent._tool_timings.set(timings)
+        start = time.perf_counter()
+        results = await asyncio.gather(
+            wrapped.ainvoke({"seconds": 0.3}),
+            wrapped.ainvoke({"seconds": 0.3}),
+            wrapped.ainvoke({"seconds": 1.0}),
+        )
+        return results, time.perf_counter() - start, timings
+
+    results, elapsed, timings = asyncio.run(one_turn())
+
+    assert results[:2] == ["done", "done"]
+    assert "timed out" in results[2]
+    # Concurrent: bounded by the slowest budget, not the sum of the calls
+    assert elapsed < 1.0
+    assert sorted(t["status"] for t in timings) == ["ok", "ok", "timeout"]
+
+
+def test_agent_is_built_once_on_first_use(monkeypatch):
+    built = []
+    monkeypatch.setattr(agent, "agent_instance", None)
+    monkeypatch.setattr(agent, "_agent_initialized", False)
+    monkeypatch.setattr(agent, "create_agent", lambda: built.append(1) or "executor")
+
+    assert agent.get_agent() == "executor"
+    assert agent.get_agent() == "executor"
+    assert built == [1]
+
+    names = [t.name for t in agent.build_tools()]
+    assert names == ["lookup_helpline_info", "ekf_trajectory", "analyze_terrain", "debris_ml_predict"]
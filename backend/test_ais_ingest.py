@@ -0,0 +1,121 @@
+import asyncio
+import json
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from websockets.asyncio.server import serve
+
+from ais_handler import AISIngestor, VesselIndex, haversine_distance, haversine_np, nearest_k
+
+
+def position_frame(mmsi, lat, lon, name):
+    return json.dumps({
+        "MessageType": "PositionReport",
+        "MetaData": {"ShipName": name, "CallSign": "TEST"},
+        "Message": {"PositionReport": {"UserID": mmsi, "Latitude": lat, "Longitude": lon}},
+    })
+
+
+FRAMES = [
+    position_frame(1, 10.0, 60.0, "NEAR"),
+    position_frame(2, 10.5, 60.5, "CLOSE"),
+    position_frame(3, -30.0, 10.0, "FAR"),
+    position_frame(4, 10.0, 179.9, "DATELINE"),
+    position_frame(1, 10.1, 60.1, "NEAR"),
+]
+
+
+async def replay(websocket):
+    await websocket.recv()  # subscription message
+    for frame in FRAMES:
+        await websocket.send(frame)
+    await websocket.wait_closed()
+
+
+def test_ingestor_answers_radius_queries_from_memory():
+    async def scenario():
+        async with serve(replay, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            index = VesselIndex()
+            ingestor = AISIngestor(index, uri=f"ws://127.0.0.1:{port}")
+            ingestor.start()
+            for _ in range(100):
+                if ingestor.frames == len(FRAMES):
+                    break
+                await asyncio.sleep(0.01)
+            await ingestor.stop()
+            assert ingestor.stats()["vessels"] == 4
+            return index
+
+    index = asyncio.run(scenario())
+
+    assert len(index) == 4
+    near = sorted(s["name"] for s in index.query_radius(10.0, 60.0, 100))
+    assert near == ["CLOSE", "NEAR"]
+    # Radius queries wrap across the antimeridian
+    assert [s["mmsi"] for s in index.query_radius(10.0, -179.9, 50)] == [4]
+
+
+def test_stale_positions_expire():
+    index = VesselIndex(stale_seconds=60)
+    index.upsert(1, 10.0, 60.0, "OLD", "A", seen=0)
+    index.upsert(2, 10.0, 60.0, "NEW", "B")
+
+    assert [s["mmsi"] for s in index.query_radius(10.0, 60.0, 10)] == [2]
+    assert index.expire() == 1
+    assert len(index) == 1
+
+
+def test_vectorized_distance_and_top_k_match_scalar():
+    lats = [10.0, 12.0, 10.2, -5.0, 10.05]
+    lons = [60.0, 61.0, 60.1, 40.0, 60.0]
+
+    dists = haversine_np(10.0, 60.0, lats, lons)
+    for d, a, b in zip(dists, lats, lons):
+        assert abs(d - haversine_distance(10.0, 60.0, a, b)) < 1e-6
+
+    idx, top = nearest_k(10.0, 60.0, lats, lons, k=2)
+    assert idx.tolist() == [0, 4]
+    assert nearest_k(10.0, 60.0, lats, lons, radius_km=100)[0].tolist() == [0, 4, 2]
+
+
+def test_recording_replays_into_ingestor(tmp_path):
+    from ais_replay import FrameRecorder, read_frames, serve_replay
+
+    path = str(tmp_path / "capture.aisrec")
+    with FrameRecorder(path) as recorder:
+        for i, frame in enumerate(FRAMES):
+            recorder.write(frame, ts=1000.0 + i)
+    assert [f.decode() for _, f in read_frames(path)] == FRAMES
+
+    async def scenario():
+        async with await serve_replay(path, port=0, speed=0) as server:
+            port = server.sockets[0].getsockname()[1]
+            index = VesselIndex()
+            ingestor = AISIngestor(index, uri=f"ws://127.0.0.1:{port}")
+            ingestor.start()
+            for _ in range(100):
+                if ingestor.frames == len(FRAMES):
+                    break
+                await asyncio.sleep(0.01)
+            await ingestor.stop()
+            return index
+
+    assert len(asyncio.run(scenario())) == 4
+
+
+def test_fast_decode_rejects_out_of_area_frames_before_parsing():
+    from ais_handler import FrameStats, decode_position_frame
+
+    stats = FrameStats()
+    area = (9.0, 59.0, 11.0, 61.0)
+    accepted = [decode_position_frame(f, area, stats) for f in FRAMES]
+    decode_position_frame(b'{"MessageType": "ShipStaticData"}', area, stats)
+
+    assert [p[0] for p in accepted if p] == [1, 2, 1]
+    assert stats.totals == {"received": 6, "decoded": 3, "rejected": 3, "accepted": 3, "errors": 0}
+    # Areas crossing the antimeridian wrap
+    assert decode_position_frame(FRAMES[3], (9.0, 179.0, 11.0, -179.0), stats)[0] == 4
@@ -0,0 +1,159 @@
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from drift_physics import (calculate_drift_physics, integrate_drift, apply_leeway, leeway_coefficients,
+                           polygon_area_km2, wind_from_series, PROCESS_NOISE_DEG)
+
+
+def test_single_point_matches_legacy_shape():
+    result = calculate_drift_physics(10.0, 60.0, 12.5, 4.2, 4.5, seed=7)
+
+    assert set(result) == {
+        "predicted_lat", "predicted_lon", "confidence", "drift_vector_m",
+        "process_noise", "dlat", "dlon"
+    }
+    assert result == calculate_drift_physics(10.0, 60.0, 12.5, 4.2, 4.5, seed=7)
+
+
+def test_ensemble_contours_and_density():
+    result = calculate_drift_physics(10.0, 60.0, 12.5, 4.2, 4.5, particles=50_000, seed=1)
+    ensemble = result["ensemble"]
+
+    assert ensemble["particles"] == 50_000
+    # Ensemble mean should sit on the deterministic drift
+    assert abs(result["predicted_lat"] - (10.0 + result["dlat"])) < 0.01
+    assert abs(result["predicted_lon"] - (60.0 + result["dlon"])) < 0.01
+
+    levels = [c["level"] for c in ensemble["contours"]]
+    assert levels == [0.5, 0.9, 0.95]
+    for contour in ensemble["contours"]:
+        assert contour["polygon"][0] == contour["polygon"][-1]
+
+    cells = ensemble["density"]["cells"]
+    assert abs(sum(map(sum, cells)) - 1.0) < 1e-3
+
+
+def test_integrator_converges_to_single_step_model():
+    records = list(integrate_drift(10.0, 60.0, (12.5, 4.2), 4.5, step_minutes=10, particles=20_000, seed=3))
+    final = records[-1]
+    reference = calculate_drift_physics(10.0, 60.0, 12.5, 4.2, 4.5, particles=20_000, seed=3)
+
+    assert final["final"] and final["steps"] == 27
+    assert [r["step"] for r in records[:-1]] == list(range(1, 28))
+    assert abs(final["predicted_lat"] - reference["predicted_lat"]) < 0.01
+    assert abs(final["predicted_lon"] - reference["predicted_lon"]) < 0.02
+
+
+def test_leeway_splits_downwind_and_crosswind():
+    leeway = leeway_coefficients(["wreckage", "life_raft"], 1000, np.random.default_rng(0))
+    wind_u, wind_v = np.full(2000, 10.0), np.zeros(2000)
+    drift_u, drift_v = apply_leeway(wind_u, wind_v, leeway)
+
+    # Wreckage moves with the wind; rafts drift a few percent downwind, veering to either side
+    assert np.allclose(drift_u[:1000], 10.0) and np.allclose(drift_v[:1000], 0.0)
+    assert abs(drift_u[1000:].mean() - 0.37) < 0.01
+    assert (drift_v[1000:] > 0).any() and (drift_v[1000:] < 0).any()
+    # Calm air: no direction, no drift
+    assert apply_leeway(np.zeros(2000), np.zeros(2000), leeway)[0].max() == 0.0
+
+
+def test_object_classes_get_separate_search_areas():
+    classes = ["wreckage", "life_raft", "person_in_water"]
+    records = list(integrate_drift(10.0, 60.0, (12.5, 4.2), 12, particles=4_000, seed=5, object_classes=classes))
+    final = records[-1]
+
+    assert set(records[0]["classes"]) == set(final["classes"]) == set(classes)
+    assert "ensemble" not in final
+    wreckage, raft, piw = (final["classes"][name] for name in classes)
+    assert wreckage["particles"] == raft["particles"] == 4_000
+
+    legacy = calculate_drift_physics(10.0, 60.0, 12.5, 4.2, 12)
+    assert abs(wreckage["predicted_lat"] - (10.0 + legacy["dlat"])) < 0.01
+    assert abs(wreckage["predicted_lon"] - (60.0 + legacy["dlon"])) < 0.02
+    # Rafts catch more wind than swimmers and spread further
+    assert raft["predicted_lon"] > piw["predicted_lon"] > 60.0
+    assert raft["search_area_km2"] > piw["search_area_km2"] > 0
+    # Only the legacy class gets the generic random walk, so the leeway classes
+    # keep their own (much tighter) spread and separate from each other
+    assert max(piw["std_deg"]) < PROCESS_NOISE_DEG / 2
+    assert raft["predicted_lon"] - piw["predicted_lon"] > 2 * max(piw["std_deg"])
+    assert min(wreckage["std_deg"]) > 0.8 * PROCESS_NOISE_DEG
+
+
+def test_integrator_steps_do_not_allocate_particle_arrays():
+    import tracemalloc
+
+    particles = 100_000
+    for classes in (None, ["life_raft", "debris"]):
+        steps = integrate_drift(10.0, 60.0, wind_from_series([0, 6], [2, -6], [8, 1]), 6,
+                                particles=particles, seed=1, object_classes=classes)
+        tracemalloc.start()
+        try:
+            next(steps)  # buffers are set up before the first step
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            for _ in range(10):
+                next(steps)
+            assert tracemalloc.get_traced_memory()[1] - base < particles
+        finally:
+            tracemalloc.stop()
+
+
+def test_polygon_area():
+    square = [[0, 0], [0, 1], [1, 1], [1, 0], [0, 0]]
+    assert abs(polygon_area_km2(square) - 12364) < 10
+
+
+def test_search_areas_match_streamed_classes_for_a_wind_series():
+    import json
+
+    from fastapi.testclient import TestClient
+
+    import server
+
+    client = TestClient(server.app)
+    body = {"lat": 10.0, "lon": 60.0, "hours": 6, "particles": 500, "seed": 4,
+            "object_classes": ["life_raft", "debris"],
+            "wind_series": [{"t_hours": 0, "u": 2.0, "v": 8.0}, {"t_hours": 6, "u": -6.0, "v": 1.0}]}
+
+    areas = client.post("/simulate-drift", json=body).json()["search_areas"]
+    streamed = json.loads(client.post("/simulate-drift/stream", json=body).text.splitlines()[-1])["classes"]
+    assert areas == streamed
+
+
+def test_simulate_drift_resolves_the_wind_once(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+
+    def blocking(*args, **kwargs):
+        raise AssertionError("blocking weather fetch")
+
+    fetches = []
+
+    async def live(lat, lon):
+        fetches.append((lat, lon))
+        return {"wind_u": 3.0, "wind_v": -1.0, "description": "breeze", "wind_speed": 3.2}
+
+    monkeypatch.setattr(server, "get_weather_data", blocking)
+    monkeypatch.setattr(server, "get_weather_data_async", live)
+    client = TestClient(server.app)
+
+    # Live wind: one async lookup drives the physics and the search areas
+    body = {"lat": 10.0, "lon": 60.0, "hours": 6, "particles": 500, "seed": 4, "object_classes": ["debris"]}
+    out = client.post("/simulate-drift", json=body).json()
+    assert len(fetches) == 1
+    assert (out["inputs"]["wind_u_ms"], out["inputs"]["wind_v_ms"]) == (3.0, -1.0)
+
+    # A wind series is used everywhere, the physics taking its mean over the horizon
+    body["wind_series"] = [{"t_hours": 0, "u": 2.0, "v": 8.0}, {"t_hours": 6, "u": -6.0, "v": 1.0}]
+    out = client.post("/simulate-drift", json=body).json()
+    assert len(fetches) == 1
+    assert out["inputs"]["source"] == "Request Wind Series"
+    assert (out["inputs"]["wind_u_ms"], out["inputs"]["wind_v_ms"]) == (-2.0, 4.5)
+    assert out["physics"]["dlon"] < 0 < out["physics"]["dlat"]
@@ -0,0 +1,107 @@
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from drift_physics import integrate_drift, start_offsets
+from ekf_tracker import TrackStore, covariance_ellipse, R, DEG
+
+
+def fly(n_reports, speed=200.0, track=45.0, noise_m=50.0, seed=0):
+    """
+    Noisy reports along a straight, constant-speed course from (10, 60), one every 10 s.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n_reports) * 10.0
+    north = speed * math.cos(math.radians(track)) * t + rng.normal(0, noise_m, n_reports)
+    east = speed * math.sin(math.radians(track)) * t + rng.normal(0, noise_m, n_reports)
+    lats = 10.0 + north / R * DEG
+    lons = 60.0 + east / (R * math.cos(math.radians(10.0))) * DEG
+    return t, lats, lons
+
+
+def test_filter_recovers_course_and_shrinks_uncertainty():
+    store = TrackStore(capacity=8)
+    t, lats, lons = fly(60)
+    for i in range(60):
+        store.update(["AB12CD"], [lats[i]], [lons[i]], times=[t[i]])
+    track = store.get("AB12CD")
+
+    assert abs(track["speed_ms"] - 200) < 5 and abs(track["track_deg"] - 45) < 2
+    assert track["reports"] == 60
+    assert track["ellipse"]["semi_major_m"] < 150
+
+    later = store.get("AB12CD", at=t[-1] + 600)
+    assert later["ellipse"]["semi_major_m"] > 10 * track["ellipse"]["semi_major_m"]
+    assert store.get("AB12CD")["t"] == t[-1]  # extrapolating does not touch the track
+
+
+def test_batched_update_matches_sequential_reports():
+    t, lats, lons = fly(20)
+    speeds, tracks = np.full(20, 200.0), np.full(20, 45.0)
+    sequential = TrackStore(capacity=4)
+    for i in range(20):
+        sequential.update(["A"], [lats[i]], [lons[i]], times=[t[i]], speeds=[speeds[i]], tracks=[tracks[i]])
+
+    # Same reports for the same flight in one shuffled batch, plus a second flight
+    order = np.random.default_rng(1).permutation(20)
+    batched = TrackStore(capacity=4)
+    counts = batched.update(["A"] * 20 + ["B"], list(lats[order]) + [0.0], list(lons[order]) + [0.0],
+                            times=list(t[order]) + [5.0], speeds=list(speeds[order]) + [None],
+                            tracks=list(tracks[order]) + [None])
+
+    assert counts == {"created": 2, "updated": 19, "rejected": 0}
+    a, b = sequential.get("A"), batched.get("A")
+    assert abs(a["lat"] - b["lat"]) < 1e-9 and abs(a["lon"] - b["lon"]) < 1e-9
+    assert np.allclose(a["position_cov_m2"], b["position_cov_m2"])
+
+
+def test_stale_reports_rejected_and_full_store_recycles_oldest():
+    now = time.time()
+    store = TrackStore(capacity=2, stale_seconds=3600)
+    store.update(["A", "B"], [0, 1], [0, 1], times=[now - 100, now - 200])
+    assert store.update(["A", "A"], [0, 0], [0, 0], times=[now - 110, now - 100])["rejected"] == 2
+
+    store.update(["C"], [2], [2])
+    assert store.get("B") is None and store.get("A") is not None and len(store) == 2
+    assert store.stats()["evicted"] == 1
+
+
+def test_batch_larger_than_the_store_keeps_its_own_tracks():
+    now = time.time()
+    store = TrackStore(capacity=2)
+    counts = store.update(["A", "B", "C"], [0, 1, 2], [0, 1, 2], times=[now - 3, now - 2, now - 1])
+    assert counts == {"created": 2, "updated": 0, "rejected": 1}
+    assert store.get("A") is not None and store.get("B") is not None and len(store) == 2
+
+    # An older track makes way first; new flights never push out each other
+    store = TrackStore(capacity=3)
+    store.update(["A"], [0], [0], times=[now - 100])
+    counts = store.update(["B", "C", "D", "E"], [1, 2, 3, 4], [1, 2, 3, 4], times=[now] * 4)
+    assert counts == {"created": 3, "updated": 0, "rejected": 1}
+    assert store.get("A") is None
+    assert all(store.get(f) is not None for f in "BCD")
+    assert store.stats()["evicted"] == 1
+
+
+def test_ellipse_seeds_drift_start():
+    ellipse = covariance_ellipse([[4e6, 0], [0, 1e6]])
+    assert ellipse["orientation_deg"] == 0.0
+    assert abs(ellipse["semi_major_m"] / ellipse["semi_minor_m"] - 2) < 1e-3
+
+    north, east = start_offsets(10.0, 100_000, [[4e6, 0], [0, 1e6]], np.random.default_rng(0))
+    assert abs(np.std(north) / DEG * R - 2000) < 30
+    assert abs(np.std(east) / DEG * R * math.cos(math.radians(10)) - 1000) < 15
+
+    point = list(integrate_drift(10.0, 60.0, (5.0, 0.0), 1, particles=20_000, seed=2))[-1]
+    spread = list(integrate_drift(10.0, 60.0, (5.0, 0.0), 1, particles=20_000, seed=2,
+                                  start_cov_m=[[4e8, 0], [0, 1e6]]))[-1]
+    assert abs(spread["predicted_lat"] - point["predicted_lat"]) < 0.01
+    # A 20 km north/south start uncertainty stretches the cloud that way
+    polygon = np.array(spread["ensemble"]["contours"][1]["polygon"])
+    assert np.ptp(polygon[:, 0]) > np.ptp(polygon[:, 1])
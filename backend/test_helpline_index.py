@@ -0,0 +1,48 @@
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from helpline_index import MRCCIndex, SARRegionIndex, lookup_helpline
+
+
+def test_great_circle_handles_antimeridian():
+    index = MRCCIndex([
+        {"agency": "West", "lat": 0.0, "lon": 179.0, "range": 500},
+        {"agency": "Far", "lat": 0.0, "lon": 160.0, "range": 5000},
+    ])
+
+    entry, dist, within = index.nearest(0.0, -179.5)
+    assert entry["agency"] == "West" and within
+    assert 160 < dist < 170
+
+
+def test_range_cutoff_prefers_covering_centre():
+    index = MRCCIndex([
+        {"agency": "Small", "lat": 0.0, "lon": 0.0, "range": 100},
+        {"agency": "Large", "lat": 0.0, "lon": 20.0, "range": 3000},
+    ])
+
+    assert index.nearest(0.0, 5.0)[0]["agency"] == "Large"
+    assert index.nearest(0.0, 0.5)[0]["agency"] == "Small"
+    assert index.nearest(60.0, -120.0)[2] is False
+
+
+def test_sar_region_polygon_lookup():
+    square = [[[10, 10], [20, 10], [20, 20], [10, 20], [10, 10]],
+              [[14, 14], [16, 14], [16, 16], [14, 16], [14, 14]]]
+    index = SARRegionIndex([{"type": "Feature", "properties": {"agency": "RCC Test"},
+                             "geometry": {"type": "Polygon", "coordinates": square}}])
+
+    assert index.find(12.0, 12.0)["agency"] == "RCC Test"
+    assert index.find(15.0, 15.0) is None  # inside the hole
+    assert index.find(25.0, 12.0) is None
+
+
+def test_lookup_keeps_legacy_fields():
+    result = lookup_helpline(51.0, -1.0)
+
+    assert result["agency"] == "HM Coastguard"
+    assert result["within_range"]
+    assert {"country", "agency", "number", "distance_approx"} <= set(result)
@@ -0,0 +1,87 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from intercept import drift_track, intercept_times, rank_responders
+from search_planner import KM_PER_NM
+
+
+def straight_track(east_kmh, hours=12, step_minutes=5):
+    """
+    Noise-free point target moving east along the equator from (0, 0).
+    """
+    t = np.linspace(0, hours, int(hours * 60 / step_minutes) + 1)
+    return {"t_hours": t, "lat": np.zeros_like(t), "lon": east_kmh * t / 111.195, "radius_km": np.zeros_like(t)}
+
+
+def test_stationary_target_eta_is_distance_over_speed():
+    track = straight_track(0.0)
+    eta, lat, lon, reachable = intercept_times([0.0, 1.0], [1.0, 0.0], [10.0, 20.0], track)
+
+    expected = np.array([111.19 / (10 * KM_PER_NM), 111.19 / (20 * KM_PER_NM)])
+    assert np.allclose(eta, expected, rtol=0.01)
+    assert reachable.all() and np.allclose(lat, 0, atol=1e-3)
+
+
+def test_drifting_target_is_met_downwind():
+    # Target drifts east at 18 km/h; vessels start 50 km east and west of it
+    track = straight_track(18.0, hours=10)
+    ahead, behind = rank_responders([{"id": "behind", "lat": 0.0, "lon": -0.45},
+                                     {"id": "ahead", "lat": 0.0, "lon": 0.45}], track)
+
+    assert ahead["id"] == "ahead" and ahead["within_horizon"]
+    # Closing speed is 22.2 + 18 km/h head-on
+    assert abs(ahead["eta_hours"] - 0.45 * 111.195 / (12 * KM_PER_NM + 18)) < 0.01
+    assert ahead["intercept_lon"] > 0
+
+    # 22.2 km/h chasing 18 km/h gains 4.2 km/h: ~12 h, past the 10 h horizon
+    assert not behind["within_horizon"]
+
+
+def test_particle_cloud_is_reached_before_its_centre():
+    point = drift_track(0.0, 0.0, (1.0, 0.0), 6)
+    cloud = drift_track(0.0, 0.0, (1.0, 0.0), 6, particles=5000, seed=3, start_cov_m=[[1e8, 0], [0, 1e8]])
+    assert abs(cloud["radius_km"][0] - 20) < 0.1
+
+    vessel = ([0.5], [0.0], [12.0])
+    assert intercept_times(*vessel, cloud)[0][0] < intercept_times(*vessel, point)[0][0]
+
+
+def test_hundreds_of_vessels_rank_interactively():
+    rng = np.random.default_rng(0)
+    track = drift_track(10.0, 60.0, (12.5, 4.2), 24, particles=2000, seed=1)
+    vessels = [{"id": str(i), "lat": float(10 + rng.normal(0, 2)), "lon": float(60 + rng.normal(0, 2)),
+                "speed_kn": float(rng.uniform(8, 30))} for i in range(1000)]
+
+    start = time.perf_counter()
+    ranked = rank_responders(vessels, track, limit=10)
+    assert time.perf_counter() - start < 0.1
+
+    assert len(ranked) == 10
+    etas = [r["eta_hours"] for r in ranked]
+    assert etas == sorted(etas)
+
+
+def test_intercept_endpoint_reports_ais_failures(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import socket
+
+    import ais_handler
+    import server
+
+    # Nothing listens on the port, so the real AIS snapshot fails to connect
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(ais_handler, "AIS_STREAM_URL", f"ws://127.0.0.1:{port}")
+    response = TestClient(server.app).post("/api/ships/intercept", json={"lat": 10.0, "lon": 60.0})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["responders"] == [] and body["count"] == 0 and body["error"]
@@ -0,0 +1,107 @@
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fastapi.testclient import TestClient
+
+import agent
+import server
+from response_cache import normalize_query, response_cache
+
+
+def test_normalize_query_snaps_coordinates():
+    a = normalize_query("Where did it go?  Latitude 10.012, Longitude 60.049")
+    b = normalize_query("where did it go? latitude 10.04, longitude 59.96")
+
+    assert a == b
+
+
+def test_repeated_predict_skips_agent_execution(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    monkeypatch.setenv("LLM_BACKEND", "mock")
+    executor = agent.create_agent()
+    calls = []
+
+    class CountingAgent:
+        async def ainvoke(self, payload):
+            calls.append(payload)
+            return await executor.ainvoke(payload)
+
+    monkeypatch.setattr(agent, "agent_instance", CountingAgent())
+    response_cache.clear()
+    client = TestClient(server.app)
+    body = {"query": "Predict the crash zone.", "lat": 12.31, "lon": 45.62}
+
+    first = client.post("/predict", json=body).json()
+    second = client.post("/predict", json={**body, "lat": 12.32}).json()
+    third = client.post("/predict", json={**body, "no_cache": True}).json()
+
+    assert first["output"] == second["output"] == third["output"]
+    assert second["cached"] is True
+    assert len(calls) == 2
+
+
+def test_predict_returns_429_when_agent_queue_is_full(monkeypatch):
+    import asyncio
+
+    class SlowAgent:
+        async def ainvoke(self, payload):
+            await asyncio.sleep(0.2)
+            return {"output": "slow"}
+
+    monkeypatch.setattr(agent, "agent_instance", SlowAgent())
+    monkeypatch.setattr(agent.llm_gate, "limit", 1)
+    monkeypatch.setattr(agent.llm_gate, "max_queue", 0)
+    monkeypatch.setattr(agent.llm_gate, "_semaphore", None)
+
+    async def burst():
+        return await asyncio.gather(
+            agent.run_agent_async("first", use_cache=False),
+            agent.run_agent_async("second", use_cache=False),
+            return_exceptions=True,
+        )
+
+    first, second = asyncio.run(burst())
+    assert first["output"] == "slow"
+    assert isinstance(second, agent.AgentSaturated)
+
+    monkeypatch.setattr(agent.llm_gate, "_semaphore", None)
+    monkeypatch.setattr(agent.llm_gate, "max_queue", 1)
+    result = asyncio.run(agent.run_agent_async("third", use_cache=False, timeout=0.05))
+    assert "output" in result  # timed out, fell back to the manual path
+    assert agent.llm_gate.timeouts >= 1
+
+
+def test_batch_and_helpline_agent_calls_go_through_the_llm_gate(monkeypatch):
+    import asyncio
+
+    peak = {"now": 0, "max": 0}
+
+    class SlowAgent:
+        async def ainvoke(self, payload):
+            peak["now"] += 1
+            peak["max"] = max(peak["max"], peak["now"])
+            await asyncio.sleep(0.02)
+            peak["now"] -= 1
+            return {"output": payload["input"][:20]}
+
+    monkeypatch.setattr(agent, "agent_instance", SlowAgent())
+    monkeypatch.setattr(agent.llm_gate, "limit", 2)
+    monkeypatch.setattr(agent.llm_gate, "max_queue", 8)
+    monkeypatch.setattr(agent.llm_gate, "_semaphore", None)
+    monkeypatch.setattr(server, "PREDICT_BATCH_WORKERS", 8)
+    client = TestClient(server.app)
+
+    events = [{"query": f"Event {i}.", "lat": 10.0 + i, "lon": 60.0, "no_cache": True} for i in range(6)]
+    batch = client.post("/predict/batch", json={"events": events})
+    assert batch.status_code == 200 and batch.json()["count"] == 6
+    assert peak["max"] == 2
+
+    # With no room left in the gate both paths answer 429 instead of calling the LLM
+    monkeypatch.setattr(agent.llm_gate, "limit", 0)
+    monkeypatch.setattr(agent.llm_gate, "max_queue", 0)
+    assert client.post("/predict/batch", json={"events": events[:1]}).status_code == 429
+    # Southern Ocean: no confident local match, so the helpline defers to the agent
+    assert client.post("/api/rescue-helpline", json={"lat": -65.0, "lon": -120.0}).status_code == 429
@@ -0,0 +1,147 @@
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from search_planner import SearchGrid, SearchPlan, POD_PER_SWEEP, create_plan, replan_vessel
+
+
+def blob_grid(size=40, centre=(0.5, 0.5), spread=0.1):
+    """
+    Gaussian probability blob on a 1x1 degree grid at the equator.
+    """
+    axis = (np.arange(size) + 0.5) / size
+    lat, lon = np.meshgrid(axis, axis, indexing="ij")
+    cells = np.exp(-((lat - centre[0]) ** 2 + (lon - centre[1]) ** 2) / (2 * spread ** 2))
+    return {"lat_min": 0.0, "lat_max": 1.0, "lon_min": 0.0, "lon_max": 1.0, "cells": (cells / cells.sum()).tolist()}
+
+
+def test_vessel_searches_the_most_likely_cells_first():
+    plan = SearchPlan(SearchGrid.from_density(blob_grid()), [{"id": "A", "lat": 0.5, "lon": 0.5}], hours=4)
+    out = plan.to_dict()
+    cells = out["vessels"][0]["cells"]
+
+    assert (cells[0]["row"], cells[0]["col"]) in {(19, 19), (19, 20), (20, 19), (20, 20)}
+    assert out["vessels"][0]["hours_used"] <= 4
+    assert abs(out["cumulative_pos"] - out["vessels"][0]["pos"]) < 1e-3
+    # Each sweep finds POD of what is left in the cell
+    assert abs(cells[0]["pos"] - max(max(r) for r in blob_grid()["cells"]) * POD_PER_SWEEP) < 1e-5
+
+
+def test_more_vessels_and_time_find_more():
+    grid = blob_grid()
+    one = create_plan(grid, [{"id": "A", "lat": 0.5, "lon": 0.5}], hours=3)
+    two = create_plan(grid, [{"id": "A", "lat": 0.5, "lon": 0.5}, {"id": "B", "lat": 0.4, "lon": 0.6}], hours=3)
+    longer = create_plan(grid, [{"id": "A", "lat": 0.5, "lon": 0.5}], hours=6)
+    assert two["cumulative_pos"] > one["cumulative_pos"]
+    assert longer["cumulative_pos"] > one["cumulative_pos"]
+
+    # A vessel too far away to reach the area in time gets nothing
+    far = create_plan(grid, [{"id": "A", "lat": 0.5, "lon": 0.5}, {"id": "F", "lat": 20.0, "lon": 20.0}], hours=3)
+    assert far["vessels"][1]["cells"] == []
+
+
+def test_moving_one_vessel_replans_only_that_vessel():
+    vessels = [{"id": str(i), "lat": 0.5 + 0.1 * np.sin(i), "lon": 0.5 + 0.1 * np.cos(i)} for i in range(6)]
+    plan = create_plan(blob_grid(), vessels, hours=3)
+    moved = replan_vessel(plan["plan_id"], "2", 0.9, 0.9)
+
+    for before, after in zip(plan["vessels"], moved["vessels"]):
+        if before["id"] != "2":
+            assert [(c["row"], c["col"]) for c in before["cells"]] == [(c["row"], c["col"]) for c in after["cells"]]
+    assert moved["vessels"][2]["lat"] == 0.9
+    assert moved["vessels"][2]["cells"][0] != plan["vessels"][2]["cells"][0]
+
+    # Moving it back restores the original tasking exactly
+    restored = replan_vessel(plan["plan_id"], "2", vessels[2]["lat"], vessels[2]["lon"])
+    assert restored["vessels"][2]["cells"] == plan["vessels"][2]["cells"]
+    assert restored["cumulative_pos"] == plan["cumulative_pos"]
+
+    assert replan_vessel("missing", "2", 0, 0) is None
+
+
+def test_moving_a_vessel_off_shared_cells_keeps_the_others_sweeps():
+    # Two vessels on a small 2x2 grid end up sweeping the same cells repeatedly
+    grid = SearchGrid(0.0, 0.1, 0.0, 0.1, [[0.4, 0.3], [0.2, 0.1]])
+    plan = SearchPlan(grid, [{"id": "a", "lat": 0.05, "lon": 0.05}, {"id": "b", "lat": 0.05, "lon": 0.05}], hours=3)
+    assert {c for c, _ in plan.tasks[0]} & {c for c, _ in plan.tasks[1]}
+
+    plan.move_vessel("a", 0.05, 0.05, hours=0)
+    out = plan.to_dict()
+
+    assert out["vessels"][0]["cells"] == []
+    b_sweeps = np.bincount([c for c, _ in plan.tasks[1]], minlength=len(grid))
+    assert np.allclose(plan.remaining, grid.poc * (1 - POD_PER_SWEEP) ** b_sweeps)
+    assert abs(out["cumulative_pos"] - out["vessels"][1]["pos"]) < 1e-3
+    # b's five sweeps still count (undoing a's sweeps additively used to wipe them out)
+    assert out["cumulative_pos"] > 0.6
+
+
+def test_unusable_grids_and_empty_fleets_are_rejected():
+    import pytest
+
+    bad = {
+        "ragged": [[0.5, 0.2], [0.3]],
+        "all zero": [[0.0, 0.0], [0.0, 0.0]],
+        "not finite": [[float("nan"), 0.5], [0.2, 0.3]],
+        "negative": [[-0.1, 0.5], [0.3, 0.3]],
+        "flat": [0.5, 0.5],
+    }
+    for cells in bad.values():
+        with pytest.raises(ValueError):
+            SearchGrid(0.0, 1.0, 0.0, 1.0, cells)
+
+    with pytest.raises(ValueError, match="at least one vessel"):
+        create_plan(blob_grid(size=4), [], hours=3)
+
+
+def test_thousands_of_cells_and_dozens_of_vessels_plan_quickly():
+    rng = np.random.default_rng(0)
+    density = {"lat_min": 0.0, "lat_max": 3.0, "lon_min": 0.0, "lon_max": 3.0,
+               "cells": (rng.random((80, 80)) ** 4).tolist()}
+    vessels = [{"id": str(i), "lat": float(rng.uniform(0, 3)), "lon": float(rng.uniform(0, 3))} for i in range(40)]
+
+    start = time.perf_counter()
+    plan = create_plan(density, vessels, hours=6)
+    assert time.perf_counter() - start < 1.0
+    assert 0 < plan["cumulative_pos"] <= plan["total_poc"] <= 1
+    assert plan["grid"]["cells"] == 6400
+
+
+def closed_ais_stream(monkeypatch):
+    """
+    Points the AIS snapshot at a local port nothing listens on.
+    """
+    import socket
+
+    import ais_handler
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    monkeypatch.setattr(ais_handler, "AIS_STREAM_URL", f"ws://127.0.0.1:{port}")
+
+
+def test_search_plan_endpoint_reports_ais_failures(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    import server
+
+    client = TestClient(server.app)
+    closed_ais_stream(monkeypatch)
+    assert client.post("/api/search-plan", json={"grid": blob_grid(size=4)}).status_code == 502
+
+    async def no_ships(*args, **kwargs):
+        return []
+
+    monkeypatch.setattr(server, "fetch_nearby_ships", no_ships)
+    response = client.post("/api/search-plan", json={"grid": blob_grid(size=4)})
+    assert response.status_code == 422
+
+    zero = {**blob_grid(size=4), "cells": [[0.0] * 4] * 4}
+    response = client.post("/api/search-plan", json={"grid": zero, "vessels": [{"id": "A", "lat": 0.5, "lon": 0.5}]})
+    assert response.status_code == 400 and "no probability" in response.json()["detail"]
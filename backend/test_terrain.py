@@ -0,0 +1,68 @@
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import terrain
+from ttl_cache import TTLCache
+
+
+def write_raster(path, codes, cell_deg):
+    rows, cols = codes.shape
+    quads = codes.reshape(rows, cols // 4, 4).astype(np.uint8)
+    packed = quads[..., 0] | (quads[..., 1] << 2) | (quads[..., 2] << 4) | (quads[..., 3] << 6)
+    with open(path, "wb") as f:
+        f.write(terrain.RASTER_MAGIC)
+        f.write(terrain.RASTER_HEADER.pack(rows, cols, cell_deg))
+        f.write(packed.astype(np.uint8).tobytes())
+
+
+def test_raster_lookup_matches_codes(tmp_path):
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 4, (18, 36))
+    path = tmp_path / "terrain.bin"
+    write_raster(path, codes, 10.0)
+    raster = terrain.TerrainRaster(str(path))
+
+    lats = rng.uniform(-89.9, 89.9, 500)
+    lons = rng.uniform(-180, 180, 500)
+    expected = codes[((90 - lats) // 10).astype(int), ((lons + 180) // 10).astype(int)]
+    assert np.array_equal(raster.classify_many(lats, lons), expected)
+    assert [raster.classify(a, o) for a, o in zip(lats[:50], lons[:50])] == expected[:50].tolist()
+
+    # Longitudes wrap and the poles clamp to the edge rows
+    assert raster.classify(5, 185) == raster.classify(5, -175)
+    assert raster.classify(90, 0) == codes[0, 18]
+    assert raster.classify(-90, 0) == codes[-1, 18]
+
+
+def test_bundled_raster_knows_land_from_sea():
+    assert terrain.terrain_raster is not None
+    assert terrain.recon(30.0, -40.0)["terrain"] == "open ocean"   # mid-Atlantic
+    assert terrain.recon(48.0, 10.0)["terrain"] == "land"          # Bavaria
+    assert terrain.recon(-25.0, 134.0)["is_ocean"] is False        # central Australia
+
+
+def test_enrichment_is_cached_per_cell_and_rate_limited(monkeypatch):
+    calls = []
+    monkeypatch.setattr(terrain, "_web_search", lambda lat, lon: calls.append((lat, lon)) or "Alpine foothills")
+    monkeypatch.setattr(terrain, "recon_cache", TTLCache(maxsize=16, ttl=60))
+    monkeypatch.setattr(terrain, "search_limiter", terrain.SearchLimiter(60))
+    monkeypatch.setattr(terrain, "RECON_WEB_SEARCH", True)
+
+    # Ocean cells never search, and plain recon never searches
+    assert "enrichment" not in terrain.recon(30.0, -40.0, enrich=True)
+    assert "enrichment" not in terrain.recon(48.0, 10.0)
+
+    assert terrain.recon(48.0, 10.0, enrich=True)["enrichment"] == "Alpine foothills"
+    assert terrain.recon(48.01, 10.01, enrich=True)["enrichment"] == "Alpine foothills"
+    assert len(calls) == 1
+
+    # A different cell inside the limiter interval gets the local answer only
+    result = terrain.recon(45.0, 7.0, enrich=True)
+    assert result["terrain"] == "land" and "enrichment" not in result
+    assert len(calls) == 1
+    assert terrain.search_limiter.rejected == 1
@@ -0,0 +1,26 @@
+import os
+import sys
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from tool_router import dispatch, get_router_stats
+
+
+def test_helpline_answers_locally_when_confident():
+    def agent():
+        raise AssertionError("agent should not be called")
+
+    routed = dispatch("rescue_helpline", agent, lat=51.0, lon=-1.0)
+
+    assert routed["path"] == "local"
+    assert routed["result"]["agency"] == "HM Coastguard"
+
+
+def test_helpline_defers_to_agent_without_confident_match():
+    # Southern Ocean, outside every MRCC's range
+    routed = dispatch("rescue_helpline", lambda: {"agency": "from agent"}, lat=-65.0, lon=-120.0)
+
+    assert routed["path"] == "agent"
+    assert routed["result"] == {"agency": "from agent"}
+    assert get_router_stats()["rescue_helpline"]["agent"] >= 1
@@ -0,0 +1,141 @@
+import asyncio
+import os
+import sys
+
+import httpx
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import weather_handler
+from ttl_cache import TTLCache, SqliteStore, MISS
+
+
+def test_lru_eviction_and_ttl():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISS
+    assert cache.get("a") == 1
+    cache.set("d", None, ttl=-1)
+    assert cache.get("d") is MISS
+    assert cache.stats()["expirations"] == 1
+
+
+def test_sqlite_layer_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.db")
+    TTLCache(store=SqliteStore(path)).set("cell", {"wind_u": 1.5})
+
+    assert TTLCache(store=SqliteStore(path)).get("cell") == {"wind_u": 1.5}
+
+
+def test_sqlite_layer_purges_expired_rows(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = TTLCache(store=SqliteStore(path, purge_every=3))
+    cache.set("old-1", 1, ttl=-1)
+    cache.set("old-2", 2, ttl=-1)
+    cache.set("fresh", 3)  # third write triggers a purge
+
+    def rows(store):
+        return store._conn.execute("SELECT key FROM cache").fetchall()
+
+    assert rows(cache.store) == [("fresh",)]
+
+    cache.set("old-3", 4, ttl=-1)
+    reopened = SqliteStore(path)
+    assert rows(reopened) == [("fresh",)]
+
+
+def test_weather_is_fetched_once_per_cell(monkeypatch):
+    calls = []
+
+    class Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"wind": {"speed": 10, "deg": 90}, "weather": [{"description": "clear"}]}
+
+    def fake_get(url, params=None, timeout=None):
+        calls.append(params)
+        return Response()
+
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+    monkeypatch.setattr(weather_handler._session, "get", fake_get)
+    weather_handler.weather_cache.clear()
+
+    first = weather_handler.get_weather_data(12.01, 45.01)
+    second = weather_handler.get_weather_data(12.02, 45.02)
+
+    assert first == second
+    assert len(calls) == 1
+    assert weather_handler.get_weather_cache_stats()["hits"] == 1
+
+
+def _stub_async_weather(monkeypatch, calls, release):
+    """
+    Points the async weather client at a mock transport for the running
+    loop. Every upstream request is counted and held until 'release' is set.
+    """
+    async def handler(request):
+        calls.append(request.url.params["lat"])
+        await release.wait()
+        return httpx.Response(200, json={"wind": {"speed": 10, "deg": 90}, "weather": [{"description": "clear"}]})
+
+    monkeypatch.setenv("OPENWEATHER_API_KEY", "test")
+    weather_handler.weather_cache.clear()
+    weather_handler._inflight.clear()
+    monkeypatch.setattr(weather_handler, "_async_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(weather_handler, "_async_client_loop", asyncio.get_running_loop())
+
+
+def test_async_lookups_for_one_cell_share_one_fetch(monkeypatch):
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        _stub_async_weather(monkeypatch, calls, release)
+        lookups = [asyncio.ensure_future(weather_handler.get_weather_data_async(12.01 + i * 0.01, 45.01))
+                   for i in range(10)]
+        await asyncio.sleep(0.01)
+        release.set()
+        return await asyncio.gather(*lookups)
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(r == results[0] for r in results) and results[0]["wind_speed"] == 10
+    assert weather_handler._inflight == {}
+
+
+def test_cancelled_caller_does_not_cancel_shared_fetch(monkeypatch):
+    calls = []
+
+    async def scenario():
+        release = asyncio.Event()
+        _stub_async_weather(monkeypatch, calls, release)
+        first = asyncio.ensure_future(weather_handler.get_weather_data_async(12.01, 45.01))
+        others = [asyncio.ensure_future(weather_handler.get_weather_data_async(12.02, 45.02)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*others)
+        return first, results
+
+    first, results = asyncio.run(scenario())
+    assert first.cancelled()
+    assert len(calls) == 1
+    assert all(r is not None and r["wind_speed"] == 10 for r in results)
+
+
+def test_async_client_is_rebuilt_for_a_new_event_loop():
+    async def client():
+        return weather_handler._get_async_client()
+
+    first = asyncio.run(client())
+    second = asyncio.run(client())
+    assert first is not second
+    asyncio.run(weather_handler.close_async_client())
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from drift_physics import integrate_drift
+from wind_field import WindField, WindFieldStore, write_wind_field
+
+T0 = 1_700_000_000.0
+
+
+def linear_field(path, lats, lons, steps=3, dt_s=3600.0):
+    # u/v linear in time, lat and lon, which trilinear interpolation reproduces exactly
+    t, y, x = np.meshgrid(np.arange(steps) * dt_s, lats, lons, indexing="ij")
+    write_wind_field(path, T0, dt_s, lats, lons, 2 + t / 3600 + 0.5 * y, -1 + 0.25 * x)
+    return WindField(str(path))
+
+
+def test_trilinear_interpolation_is_exact_on_linear_fields(tmp_path):
+    # North-to-south rows, like most forecast products
+    field = linear_field(tmp_path / "gfs.wind", np.arange(60, 39, -2.0), np.arange(-40, -9, 2.5))
+    rng = np.random.default_rng(0)
+    lats, lons = rng.uniform(40, 60, 100_000), rng.uniform(-40, -10, 100_000)
+    at = T0 + rng.uniform(0, 7200, 100_000)
+
+    u, v = field.interpolate(at, lats, lons)
+    assert u.shape == (100_000,)
+    assert np.allclose(u, 2 + (at - T0) / 3600 + 0.5 * lats, atol=1e-4)
+    assert np.allclose(v, -1 + 0.25 * lons, atol=1e-4)
+
+    # Times outside the window are held, positions off the grid take the edge value
+    assert field.sample(50, -20, T0 + 10 * 3600) == field.sample(50, -20, T0 + 7200)
+    assert field.sample(80, -20, T0) == field.sample(60, -20, T0)
+    assert field.covers(50, -20, T0 + 100) and not field.covers(50, 20, T0 + 100)
+    assert not field.covers(50, -20, T0 + 3 * 3600)
+
+
+def test_global_grid_wraps_across_the_antimeridian(tmp_path):
+    lons = np.arange(0, 360, 10.0)
+    wind_u = np.zeros((1, 3, 36))
+    wind_u[..., -1] = 10.0  # 350E column
+    write_wind_field(tmp_path / "global.wind", T0, 3600, [-10, 0, 10], lons, wind_u, np.zeros_like(wind_u))
+    field = WindField(str(tmp_path / "global.wind"))
+
+    assert field.wraps and field.covers(0, -175, T0)
+    assert abs(field.sample(0, 355, T0)[0] - 5.0) < 1e-6
+    assert field.sample(0, -5, T0) == field.sample(0, 355, T0)
+
+
+def test_sampler_drives_the_integrator(tmp_path):
+    lats, lons = np.arange(0, 21, 5.0), np.arange(50, 71, 5.0)
+    wind_u = np.full((2, 5, 5), 12.5)
+    write_wind_field(tmp_path / "flat.wind", T0, 6 * 3600, lats, lons, wind_u, np.full_like(wind_u, 4.2))
+    field = WindField(str(tmp_path / "flat.wind"))
+
+    gridded = list(integrate_drift(10.0, 60.0, field.sampler(T0), 4.5, particles=5_000, seed=3))[-1]
+    constant = list(integrate_drift(10.0, 60.0, (12.5, 4.2), 4.5, particles=5_000, seed=3))[-1]
+    assert gridded["predicted_lat"] == constant["predicted_lat"]
+    assert gridded["predicted_lon"] == constant["predicted_lon"]
+
+
+def test_store_picks_up_new_forecasts(tmp_path):
+    store = WindFieldStore(str(tmp_path / "wind"))
+    assert store.covering(50, -20, T0) is None
+
+    os.makedirs(tmp_path / "wind")
+    linear_field(tmp_path / "wind" / "old.wind", np.arange(40, 61, 5.0), np.arange(-40, -9, 5.0))
+    write_wind_field(tmp_path / "wind" / "new.wind", T0 + 3600, 3600, [40, 60], [-40, -10],
+                     np.zeros((2, 2, 2)), np.zeros((2, 2, 2)))
+    (tmp_path / "wind" / "notes.txt").write_text("ignored")
+
+    assert store.covering(50, -20, T0).name == "old.wind"
+    assert store.covering(50, -20, T0 + 3600).name == "new.wind"
+    assert [f["name"] for f in store.stats()["fields"]] == ["new.wind", "old.wind"]
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from helpline_index import lookup_helpline
+
+# Deterministic request types that can be answered from local tools.
+# A handler returns its result when it is confident, or None to defer to the agent.
+_routes = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def register_route(intent: str, handler):
+    _routes[intent] = handler
+
+
+def _count(intent: str, path: str, elapsed_ms: float):
+    with _lock:
+        entry = _stats.setdefault(intent, {"local": 0, "agent": 0, "local_ms_total": 0.0})
+        entry[path] += 1
+        if path == "local":
+            entry["local_ms_total"] += elapsed_ms
+
+
+def _route_locally(intent: str, start: float, kwargs: dict):
+    handler = _routes.get(intent)
+    if handler is None:
+        return None
+    try:
+        result = handler(**kwargs)
+    except Exception as e:
+        print(f"Local route '{intent}' failed: {e}. Deferring to agent.")
+        result = None
+    if result is None:
+        return None
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _count(intent, "local", elapsed_ms)
+    return {"result": result, "path": "local", "latency_ms": round(elapsed_ms, 3)}
+
+
+def _routed_to_agent(intent: str, start: float, result) -> dict:
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    _count(intent, "agent", elapsed_ms)
+    return {"result": result, "path": "agent", "latency_ms": round(elapsed_ms, 3)}
+
+
+def dispatch(intent: str, agent_fallback, **kwargs) -> dict:
+    """
+    Answers 'intent' from its local handler when it has a confident match,
+    otherwise calls agent_fallback(). Returns {"result", "path", "latency_ms"}
+    where path is "local" or "agent".
+    """
+    start = time.perf_counter()
+    routed = _route_locally(intent, start, kwargs)
+    if routed is not None:
+        return routed
+    return _routed_to_agent(intent, start, agent_fallback())
+
+
+async def dispatch_async(intent: str, agent_fallback, **kwargs) -> dict:
+    """
+    dispatch() for async agent fallbacks (e.g. run_agent_async behind llm_gate).
+    """
+    start = time.perf_counter()
+    routed = _route_locally(intent, start, kwargs)
+    if routed is not None:
+        return routed
+    return _routed_to_agent(intent, start, await agent_fallback())
+
+
+def get_router_stats() -> dict:
+    with _lock:
+        stats = {}
+        for intent, entry in _stats.items():
+            total = entry["local"] + entry["agent"]
+            stats[intent] = {
+                "local": entry["local"],
+                "agent": entry["agent"],
+                "llm_avoided_ratio": round(entry["local"] / total, 3) if total else 0.0,
+                "avg_local_ms": round(entry["local_ms_total"] / entry["local"], 4) if entry["local"] else None,
+            }
+        return stats
+
+
+def _helpline_route(lat: float, lon: float):
+    # Only a covering SAR region or an in-range MRCC counts as a confident match
+    result = lookup_helpline(lat, lon)
+    return result if result["within_range"] else None
+
+
+register_route("rescue_helpline", _helpline_route)
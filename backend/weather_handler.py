@@ -1,54 +1,195 @@
 import os
+import time
+import asyncio
 import requests
+import httpx
 import math
 
+from ttl_cache import TTLCache, SqliteStore, MISS
+
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "https://api.openweathermap.org/data/2.5/weather")
+
+# Grid used to share one weather reading between nearby points (degrees)
+WEATHER_CELL_DEG = float(os.getenv("WEATHER_CELL_DEG", "0.25"))
+
+# Cache settings: successful readings live for WEATHER_CACHE_TTL seconds,
+# failures are remembered for WEATHER_CACHE_NEGATIVE_TTL so a dead API is not hammered.
+# Set WEATHER_CACHE_DB to a sqlite path to keep the cache across restarts.
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", "600"))
+WEATHER_CACHE_NEGATIVE_TTL = float(os.getenv("WEATHER_CACHE_NEGATIVE_TTL", "60"))
+WEATHER_CACHE_SIZE = int(os.getenv("WEATHER_CACHE_SIZE", "2048"))
+WEATHER_CACHE_DB = os.getenv("WEATHER_CACHE_DB")
+
+# Upper bound on concurrent connections held by the async client
+WEATHER_MAX_CONNECTIONS = int(os.getenv("WEATHER_MAX_CONNECTIONS", "100"))
+
+# Keep-alive session so sync lookups reuse TLS connections
+_session = requests.Session()
+
+weather_cache = TTLCache(
+    maxsize=WEATHER_CACHE_SIZE,
+    ttl=WEATHER_CACHE_TTL,
+    store=SqliteStore(WEATHER_CACHE_DB, table="weather") if WEATHER_CACHE_DB else None
+)
+
+def weather_cell(lat: float, lon: float, cell_deg: float = WEATHER_CELL_DEG) -> tuple:
+    """
+    Quantizes a coordinate to the weather grid cell it falls in.
+    """
+    return (math.floor(lat / cell_deg), math.floor(lon / cell_deg))
+
+def weather_cache_key(lat: float, lon: float) -> str:
+    """
+    Cache key: grid cell plus the current TTL-sized time bucket, so readings
+    roll over on a fixed schedule even if the entry has not yet been evicted.
+    """
+    cell_lat, cell_lon = weather_cell(lat, lon)
+    bucket = int(time.time() // WEATHER_CACHE_TTL) if WEATHER_CACHE_TTL > 0 else 0
+    return f"{cell_lat}:{cell_lon}:{bucket}"
+
+def _weather_params(lat: float, lon: float, api_key: str) -> dict:
+    return {
+        "lat": lat,
+        "lon": lon,
+        "appid": api_key,
+        "units": "metric"  # m/s for wind speed
+    }
+
+def parse_weather_response(data: dict) -> dict:
+    """
+    Converts an OpenWeatherMap payload into our wind-component dictionary.
+    """
+    # Extract wind data
+    wind_speed = data.get("wind", {}).get("speed", 0) # m/s
+    wind_deg = data.get("wind", {}).get("deg", 0)     # degrees (meteorological)
+
+    # Convert meteorological wind direction (coming FROM) to mathematical (going TO)
+    # Mathematical 0 is East, 90 is North.
+    # Wind 0 deg (North) means blowing FROM North (blowing South) -> Math 270 (-90)
+    # U = -speed * sin(deg)
+    # V = -speed * cos(deg)
+
+    wind_rad = math.radians(wind_deg)
+    wind_u = -wind_speed * math.sin(wind_rad)
+    wind_v = -wind_speed * math.cos(wind_rad)
+
+    return {
+        "wind_speed": wind_speed,
+        "wind_deg": wind_deg,
+        "wind_u": wind_u,
+        "wind_v": wind_v,
+        "description": data.get("weather", [{}])[0].get("description", "unknown"),
+        "temp": data.get("main", {}).get("temp"),
+        "source": "OpenWeatherMap (Real-time)"
+    }
+
 def get_weather_data(lat: float, lon: float) -> dict:
     """
     Fetches real-time weather data from OpenWeatherMap for the given coordinates.
     Returns a dictionary with wind components and other relevant data.
+    Readings are cached per grid cell (see weather_cache_key).
     """
     api_key = os.getenv("OPENWEATHER_API_KEY")
     if not api_key:
         print("Warning: OPENWEATHER_API_KEY not found. Using default wind model.")
         return None
 
-    url = "https://api.openweathermap.org/data/2.5/weather"
-    params = {
-        "lat": lat,
-        "lon": lon,
-        "appid": api_key,
-        "units": "metric"  # m/s for wind speed
-    }
+    key = weather_cache_key(lat, lon)
+    cached = weather_cache.get(key)
+    if cached is not MISS:
+        return cached
+
+    params = _weather_params(lat, lon, api_key)
+
+    try:
+        response = _session.get(OPENWEATHER_URL, params=params, timeout=5)
+        response.raise_for_status()
+        weather = parse_weather_response(response.json())
+        weather_cache.set(key, weather)
+        return weather
+
+    except Exception as e:
+        print(f"Weather API Error: {e}")
+        weather_cache.set(key, None, ttl=WEATHER_CACHE_NEGATIVE_TTL)
+        return None
+
+# Shared async client (one connection pool per event loop) and in-flight fetches by cache key
+_async_client = None
+_async_client_loop = None
+_inflight = {}
+
+def _get_async_client() -> httpx.AsyncClient:
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client_loop is not loop:
+        _async_client = httpx.AsyncClient(
+            timeout=5,
+            limits=httpx.Limits(max_connections=WEATHER_MAX_CONNECTIONS, max_keepalive_connections=20)
+        )
+        _async_client_loop = loop
+        _inflight.clear()
+    return _async_client
+
+async def _fetch_weather_async(key: str, lat: float, lon: float, api_key: str) -> dict:
+    params = _weather_params(lat, lon, api_key)
 
     try:
-        response = requests.get(url, params=params, timeout=5)
+        response = await _get_async_client().get(OPENWEATHER_URL, params=params)
         response.raise_for_status()
-        data = response.json()
-
-        # Extract wind data
-        wind_speed = data.get("wind", {}).get("speed", 0) # m/s
-        wind_deg = data.get("wind", {}).get("deg", 0)     # degrees (meteorological)
-
-        # Convert meteorological wind direction (coming FROM) to mathematical (going TO)
-        # Mathematical 0 is East, 90 is North.
-        # Wind 0 deg (North) means blowing FROM North (blowing South) -> Math 270 (-90)
-        # U = -speed * sin(deg)
-        # V = -speed * cos(deg)
-        
-        wind_rad = math.radians(wind_deg)
-        wind_u = -wind_speed * math.sin(wind_rad)
-        wind_v = -wind_speed * math.cos(wind_rad)
-
-        return {
-            "wind_speed": wind_speed,
-            "wind_deg": wind_deg,
-            "wind_u": wind_u,
-            "wind_v": wind_v,
-            "description": data.get("weather", [{}])[0].get("description", "unknown"),
-            "temp": data.get("main", {}).get("temp"),
-            "source": "OpenWeatherMap (Real-time)"
-        }
+        weather = parse_weather_response(response.json())
+        weather_cache.set(key, weather)
+        return weather
 
     except Exception as e:
         print(f"Weather API Error: {e}")
+        weather_cache.set(key, None, ttl=WEATHER_CACHE_NEGATIVE_TTL)
         return None
+
+async def get_weather_data_async(lat: float, lon: float) -> dict:
+    """
+    Async variant of get_weather_data for use inside the event loop.
+    Shares the cache with the sync path, reuses pooled connections, and
+    coalesces concurrent requests for the same grid cell into one fetch.
+    """
+    api_key = os.getenv("OPENWEATHER_API_KEY")
+    if not api_key:
+        print("Warning: OPENWEATHER_API_KEY not found. Using default wind model.")
+        return None
+
+    key = weather_cache_key(lat, lon)
+    cached = weather_cache.get(key)
+    if cached is not MISS:
+        return cached
+
+    _get_async_client()
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_weather_async(key, lat, lon, api_key))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shield so one cancelled caller does not cancel the fetch for everyone else
+    return await asyncio.shield(task)
+
+async def close_async_client():
+    global _async_client, _async_client_loop
+    if _async_client is not None:
+        await _async_client.aclose()
+    _async_client = None
+    _async_client_loop = None
+
+def get_weather_batch(points: list) -> list:
+    """
+    Fetches weather for a list of (lat, lon) points, issuing one lookup per
+    grid cell. Results are returned in the same order as the points.
+    """
+    by_cell = {}
+    results = []
+    for lat, lon in points:
+        cell = weather_cell(lat, lon)
+        if cell not in by_cell:
+            by_cell[cell] = get_weather_data(lat, lon)
+        results.append(by_cell[cell])
+    return results
+
+def get_weather_cache_stats() -> dict:
+    return weather_cache.stats()
@@ -0,0 +1,218 @@
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+# Gridded surface-wind forecasts written by scripts/build_wind_field.py (float32 u/v, memory-mapped).
+# Every *.wind file in WIND_FIELD_DIR is picked up; drop new forecasts in and they are used on the next lookup.
+WIND_FIELD_DIR = os.getenv(
+    "WIND_FIELD_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "wind")
+)
+FIELD_MAGIC = b"WINDFLD1"
+# time steps, lat rows, lon cols, first time (unix s), time step (s), first lat, lat step, first lon, lon step
+FIELD_HEADER = struct.Struct(">IIIdddddd")
+
+
+def _axis_index(position, size):
+    """
+    Lower grid index and weight of the upper neighbour for fractional
+    positions, clamped to the axis.
+    """
+    position = np.clip(position, 0, size - 1)
+    lower = np.minimum(np.floor(position).astype(np.int64), max(size - 2, 0))
+    return lower, position - lower
+
+
+class WindField:
+    """
+    One forecast file: u/v wind (m/s) on a regular (time, lat, lon) grid,
+    memory-mapped so only the cells touched by lookups are read from disk.
+    Positions outside the grid take the nearest edge value and times outside
+    the forecast window are held at the first/last step.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(FIELD_MAGIC)) != FIELD_MAGIC:
+                raise ValueError(f"{path} is not a wind field")
+            (self.steps, self.rows, self.cols, self.t0, self.dt_s,
+             self.lat0, self.dlat, self.lon0, self.dlon) = FIELD_HEADER.unpack(f.read(FIELD_HEADER.size))
+        self.path = path
+        self.name = os.path.basename(path)
+        self.data = np.memmap(
+            path, dtype=">f4", mode="r",
+            offset=len(FIELD_MAGIC) + FIELD_HEADER.size,
+            shape=(2, self.steps, self.rows, self.cols)
+        )
+        self.t_end = self.t0 + (self.steps - 1) * self.dt_s
+        self.wraps = abs(self.cols * self.dlon - 360.0) < 1e-6
+        lats = (self.lat0, self.lat0 + (self.rows - 1) * self.dlat)
+        self.lat_min, self.lat_max = min(lats), max(lats)
+        self.lon_span = (self.cols - 1) * abs(self.dlon)
+
+    def _lon_offset(self, lons):
+        """
+        Degrees east of the grid's first column, taking the short way round for regional grids.
+        """
+        offset = (np.asarray(lons, dtype=float) - self.lon0) * np.sign(self.dlon)
+        if self.wraps:
+            return offset % 360.0
+        centre = self.lon_span / 2
+        return (offset - centre + 180.0) % 360.0 - 180.0 + centre
+
+    def covers(self, lat: float, lon: float, at: float = None) -> bool:
+        """
+        True if the point is on the grid and 'at' (unix s, default now) is inside the forecast window.
+        """
+        at = time.time() if at is None else at
+        if not (self.t0 <= at <= self.t_end and self.lat_min <= lat <= self.lat_max):
+            return False
+        return self.wraps or 0.0 <= float(self._lon_offset(lon)) <= self.lon_span
+
+    def interpolate(self, at, lats, lons):
+        """
+        Trilinear (time, lat, lon) interpolation of u/v at any number of
+        positions. 'at' is a unix time, either one for all positions or one
+        per position. Returns float64 arrays shaped like the inputs.
+        """
+        at, lats, lons = np.broadcast_arrays(*(np.asarray(x, dtype=float) for x in (at, lats, lons)))
+        t_lo, t_w = _axis_index((at - self.t0) / self.dt_s if self.dt_s else np.zeros(at.shape), self.steps)
+        y_lo, y_w = _axis_index((lats - self.lat0) / self.dlat, self.rows)
+        x_pos = self._lon_offset(lons) / abs(self.dlon)
+        if self.wraps:
+            x_lo = np.floor(x_pos).astype(np.int64) % self.cols
+            x_w = x_pos - np.floor(x_pos)
+            x_hi = (x_lo + 1) % self.cols
+        else:
+            x_lo, x_w = _axis_index(x_pos, self.cols)
+            x_hi = np.minimum(x_lo + 1, self.cols - 1)
+        t_hi = np.minimum(t_lo + 1, self.steps - 1)
+        y_hi = np.minimum(y_lo + 1, self.rows - 1)
+
+        # Flat offsets and weights of the 8 surrounding grid nodes, shared by u and v
+        corners = []
+        for t_idx, tw in ((t_lo, 1 - t_w), (t_hi, t_w)):
+            for y_idx, yw in ((y_lo, 1 - y_w), (y_hi, y_w)):
+                row = (t_idx * self.rows + y_idx) * self.cols
+                for x_idx, xw in ((x_lo, 1 - x_w), (x_hi, x_w)):
+                    corners.append((row + x_idx, tw * yw * xw))
+
+        flat = self.data.reshape(2, -1)
+        u = np.zeros(lats.shape)
+        v = np.zeros(lats.shape)
+        for offset, weight in corners:
+            u += flat[0, offset] * weight
+            v += flat[1, offset] * weight
+        return u, v
+
+    def sample(self, lat: float, lon: float, at: float = None):
+        """
+        (wind_u, wind_v) in m/s at one point, at 'at' (unix s, default now).
+        """
+        u, v = self.interpolate(time.time() if at is None else at, lat, lon)
+        return float(u), float(v)
+
+    def sampler(self, start: float = None):
+        """
+        Wind callable for drift_physics.integrate_drift: t_hours counts from
+        'start' (unix s, default now) and every particle gets its own wind.
+        """
+        start = time.time() if start is None else start
+
+        def wind(t_hours, lats, lons):
+            return self.interpolate(start + t_hours * 3600.0, lats, lons)
+
+        return wind
+
+
+def write_wind_field(path, t0: float, dt_s: float, lats, lons, wind_u, wind_v):
+    """
+    Writes a wind field file. 'lats'/'lons' are the evenly spaced grid axes,
+    wind_u/wind_v arrays shaped (time, lat, lon). The file is written next to
+    its destination and renamed into place, so readers never see a partial grid.
+    """
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+    data = np.stack([np.asarray(wind_u), np.asarray(wind_v)]).astype(">f4")
+    if data.ndim != 4 or data.shape[2:] != (lats.size, lons.size):
+        raise ValueError("wind arrays must be shaped (time, lat, lon) to match the axes")
+    dlat = float(lats[1] - lats[0]) if lats.size > 1 else 1.0
+    dlon = float(lons[1] - lons[0]) if lons.size > 1 else 1.0
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(FIELD_MAGIC)
+        f.write(FIELD_HEADER.pack(data.shape[1], lats.size, lons.size, float(t0), float(dt_s),
+                                  float(lats[0]), dlat, float(lons[0]), dlon))
+        f.write(data.tobytes())
+    os.replace(tmp, path)
+
+
+class WindFieldStore:
+    """
+    The forecast files in a directory. The listing is re-read when the
+    directory changes; files that fail to open are skipped with a warning.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.fields = []
+        self._mtime = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.directory).st_mtime_ns
+        except FileNotFoundError:
+            self.fields, self._mtime = [], None
+            return
+        if mtime == self._mtime:
+            return
+        fields = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".wind"):
+                continue
+            try:
+                fields.append(WindField(os.path.join(self.directory, name)))
+            except Exception as e:
+                print(f"Wind field error ({name}): {e}")
+        # Latest forecast first
+        self.fields = sorted(fields, key=lambda f: -f.t0)
+        self._mtime = mtime
+
+    def covering(self, lat: float, lon: float, at: float = None):
+        """
+        The most recent field that covers the point at 'at' (default now), or None.
+        """
+        at = time.time() if at is None else at
+        with self._lock:
+            self._refresh()
+            fields = self.fields
+        for field in fields:
+            if field.covers(lat, lon, at):
+                self.hits += 1
+                return field
+        self.misses += 1
+        return None
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refresh()
+            return {
+                "fields": [{"name": f.name, "shape": [f.steps, f.rows, f.cols],
+                            "start": f.t0, "end": f.t_end} for f in self.fields],
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+wind_fields = WindFieldStore(WIND_FIELD_DIR)
+
+
+def get_wind_field_stats() -> dict:
+    return wind_fields.stats()
@@ -1,12 +1,267 @@
+import argparse
+import hashlib
 import json
 import math
 import os
-from datetime import datetime
+import time
 
-def analyze_risk():
+import numpy as np
+
+from crash_store import load_store
+
+# Severity score weights and saturation points (0-10 scale)
+FATALITY_WEIGHT = 0.7
+INCIDENT_WEIGHT = 0.3
+FATALITY_SCALE = 500
+INCIDENT_SCALE = 50
+
+# A zone's trend is only called Increasing/Decreasing when the least-squares
+# slope of its yearly incident counts is this likely to be non-zero
+TREND_CONFIDENCE = 0.9
+
+# Per-zone hashes and aggregate contributions from the last run, for incremental updates
+STATE_PATH = os.getenv("ANALYTICS_STATE_PATH", os.path.join(os.getcwd(), 'build', 'analytics_state.json'))
+STATE_VERSION = 2
+
+
+def year_histograms(zone_idx, years, fatalities, n_zones, first_year, last_year):
+    """
+    One pass over the incident rows: per-zone incident counts, fatality sums
+    and a (zones x years) histogram of incidents per year. Rows with zone -1
+    are ignored; undated rows (year 0) count toward totals but not the histogram.
+    """
+    zone_idx = np.asarray(zone_idx, dtype=np.int64)
+    years = np.asarray(years, dtype=np.int64)
+    keep = zone_idx >= 0
+    zone_idx, years = zone_idx[keep], years[keep]
+    fatalities = np.nan_to_num(np.asarray(fatalities, dtype=np.float64)[keep])
+
+    counts = np.bincount(zone_idx, minlength=n_zones)
+    fatality_sums = np.bincount(zone_idx, weights=fatalities, minlength=n_zones)
+
+    n_years = last_year - first_year + 1
+    dated = (years >= first_year) & (years <= last_year)
+    flat = zone_idx[dated] * n_years + (years[dated] - first_year)
+    histogram = np.bincount(flat, minlength=n_zones * n_years).reshape(n_zones, n_years)
+    return counts, fatality_sums, histogram
+
+
+def trend_regression(histogram, first_year):
+    """
+    Least-squares slope (incidents/year per year) of every row of a
+    (zones x years) histogram, plus the two-sided confidence that the slope is
+    non-zero (normal approximation to the slope's t statistic).
+    """
+    n_zones, n_years = histogram.shape
+    if n_years < 3:
+        return np.zeros(n_zones), np.zeros(n_zones)
+    x = np.arange(first_year, first_year + n_years, dtype=np.float64)
+    xc = x - x.mean()
+    sxx = float(xc @ xc)
+
+    y = histogram.astype(np.float64)
+    slope = (y @ xc) / sxx
+    residuals = y - y.mean(axis=1, keepdims=True) - slope[:, None] * xc
+    sigma2 = (residuals ** 2).sum(axis=1) / (n_years - 2)
+    stderr = np.sqrt(sigma2 / sxx)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(stderr > 0, np.abs(slope) / stderr, np.where(slope != 0, np.inf, 0.0))
+    confidence = np.array([math.erf(v / math.sqrt(2)) for v in t.tolist()])
+    return slope, confidence
+
+
+def classify_trend(slope, confidence):
+    return np.where(confidence < TREND_CONFIDENCE, "Stable", np.where(slope > 0, "Increasing", "Decreasing"))
+
+
+def severity_scores(counts, fatality_sums):
+    severity = np.minimum(fatality_sums / FATALITY_SCALE, 1.0) * 10 * FATALITY_WEIGHT + \
+               np.minimum(counts / INCIDENT_SCALE, 1.0) * 10 * INCIDENT_WEIGHT
+    return np.minimum(severity, 10.0)
+
+
+def drift_vectors(lats):
+    """
+    Prevailing surface wind (m/s) by latitude band: trade winds, westerlies, polar easterlies.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    abs_lat = np.abs(lats)
+    bands = [abs_lat < 30, abs_lat < 60]
+    u = np.select(bands, [-5.0, 8.0], -3.0)
+    v = np.select(bands, [np.where(lats > 0, -2.0, 2.0), 2.0], -1.0)
+    return u, v
+
+
+def zone_rows(store, zones):
+    """
+    Zone index (into 'zones') of every incident in the store, -1 if it is in none.
+    """
+    lookup = np.full(len(store.dictionaries["geo"]) + 1, -1, dtype=np.int64)
+    for i, zone in enumerate(zones):
+        # Clustered zones list every location they cover; older hand-made zones only have a name
+        for place in zone.get("places", [zone["name"]]):
+            code = store.code("geo", place)
+            if code >= 0:
+                lookup[code] = i
+    # Code -1 (not geocoded) indexes the trailing -1 slot
+    return lookup[np.asarray(store.geo)]
+
+
+def year_range(years):
+    dated_years = np.asarray(years)[np.asarray(years) > 0]
+    if not dated_years.size:
+        return 0, 0
+    return int(dated_years.min()), int(dated_years.max())
+
+
+def zone_entries(zones, zone_idx, years, fatalities, first_year, last_year):
+    """
+    Analytics entry for each zone, plus the zone's contribution to the global
+    aggregates ({"count", "fatalities"}; its yearHistogram is in the entry).
+    """
+    counts, fatality_sums, histogram = year_histograms(zone_idx, years, fatalities, len(zones), first_year, last_year)
+    slope, confidence = trend_regression(histogram, first_year)
+    trends = classify_trend(slope, confidence)
+    severity = severity_scores(counts, fatality_sums)
+    u_wind, v_wind = drift_vectors([zone["lat"] for zone in zones])
+
+    results = []
+    for i, zone in enumerate(zones):
+        active = np.flatnonzero(histogram[i])
+        entry = {
+            "name": zone['name'],
+            "lat": zone['lat'],
+            "lon": zone['lon'],
+            "severityScore": round(float(severity[i]), 1),
+            "trend": str(trends[i]),
+            "trendSlope": round(float(slope[i]) * 10, 4),  # incidents/year, change per decade
+            "trendConfidence": round(float(confidence[i]), 3),
+            "yearHistogram": {str(first_year + j): int(histogram[i, j]) for j in active.tolist()},
+            "primaryRisk": zone['primaryRisk'],
+            "driftVector": {"u": float(u_wind[i]), "v": float(v_wind[i])},
+            "fatalities": int(round(fatality_sums[i]))
+        }
+        results.append((entry, {"count": int(counts[i]), "fatalities": float(fatality_sums[i])}))
+    return results
+
+
+def merge_contribution(global_stats, entry, contribution, sign=1):
+    """
+    Adds (sign=1) or removes (sign=-1) one zone's share of the global aggregates.
+    """
+    global_stats["totalIncidents"] += sign * contribution["count"]
+    global_stats["totalFatalities"] += sign * contribution["fatalities"]
+    year_trend = global_stats["yearTrend"]
+    for year, count in entry["yearHistogram"].items():
+        total = year_trend.get(year, 0) + sign * count
+        if total:
+            year_trend[year] = total
+        else:
+            year_trend.pop(year, None)
+
+
+def build_output(zone_list, global_stats):
+    year_trend = global_stats["yearTrend"]
+    analytics_data = {
+        "globalStats": {
+            "totalIncidents": int(global_stats["totalIncidents"]),
+            "totalFatalities": int(round(global_stats["totalFatalities"])),
+            "mostDangerousZone": "",
+            "yearTrend": {year: year_trend[year] for year in sorted(year_trend, key=int)}
+        },
+        "zones": zone_list
+    }
+
+    # Identify most dangerous (first zone with the top rounded score)
+    if zone_list:
+        most_dangerous = max(zone_list, key=lambda x: x['severityScore'])
+        analytics_data["globalStats"]["mostDangerousZone"] = most_dangerous['name']
+    return analytics_data
+
+
+def compute_analytics(zones, zone_idx, years, fatalities):
+    first_year, last_year = year_range(years)
+    global_stats = {"totalIncidents": 0, "totalFatalities": 0.0, "yearTrend": {}}
+    zone_list = []
+    for entry, contribution in zone_entries(zones, zone_idx, years, fatalities, first_year, last_year):
+        merge_contribution(global_stats, entry, contribution)
+        zone_list.append(entry)
+    return build_output(zone_list, global_stats)
+
+
+def zone_hash(zone):
+    return hashlib.sha256(json.dumps(zone, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def _load_state(path):
+    try:
+        with open(path, 'r') as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return state if state.get("version") == STATE_VERSION else None
+
+
+def write_json_atomic(path, data):
+    """
+    Writes compact JSON via a temp file + rename, so readers never see a
+    partial file. Returns False (and leaves the file alone) if nothing changed.
+    """
+    payload = json.dumps(data, separators=(",", ":"))
+    try:
+        with open(path, 'r') as f:
+            if f.read() == payload:
+                return False
+    except FileNotFoundError:
+        pass
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        f.write(payload)
+    os.replace(tmp, path)
+    return True
+
+
+def update_analytics(zones, store, state=None):
+    """
+    Recomputes only the zones whose content hash changed since 'state' and
+    patches the global aggregates with their old/new contributions. A change
+    of the dataset's year range (which moves every trend window) or of the
+    crash store's rows (store.fingerprint) recomputes all.
+    Returns (analytics_data, new_state, recomputed_zone_count).
+    """
+    first_year, last_year = year_range(store.year)
+    hashes = [zone_hash(zone) for zone in zones]
+    names = [zone['name'] for zone in zones]
+
+    if state is None or state["window"] != [first_year, last_year] or state["store"] != store.fingerprint:
+        state = {"version": STATE_VERSION, "window": [first_year, last_year], "store": store.fingerprint,
+                 "zones": {}, "global": {"totalIncidents": 0, "totalFatalities": 0.0, "yearTrend": {}}}
+    global_stats = state["global"]
+    cached = state["zones"]
+
+    changed = [i for i, name in enumerate(names) if cached.get(name, {}).get("hash") != hashes[i]]
+    for name in set(cached) - set(names):
+        merge_contribution(global_stats, cached[name]["entry"], cached[name], sign=-1)
+        del cached[name]
+
+    if changed:
+        subset = [zones[i] for i in changed]
+        for i, (entry, contribution) in zip(changed, zone_entries(
+                subset, zone_rows(store, subset), store.year, store.fatalities, first_year, last_year)):
+            old = cached.get(names[i])
+            if old is not None:
+                merge_contribution(global_stats, old["entry"], old, sign=-1)
+            merge_contribution(global_stats, entry, contribution)
+            cached[names[i]] = dict(contribution, hash=hashes[i], entry=entry)
+
+    return build_output([cached[name]["entry"] for name in names], global_stats), state, len(changed)
+
+
+def analyze_risk(full=False):
     input_path = os.path.join(os.getcwd(), 'src/data/risk_zones.json')
     output_path = os.path.join(os.getcwd(), 'public/data/advanced_analytics.json')
-    
+
     # Ensure output dir exists
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
@@ -17,101 +272,40 @@ def analyze_risk():
         print(f"Error: Could not find {input_path}")
         return
 
-    analytics_data = {
-        "globalStats": {
-            "totalIncidents": 0,
-            "totalFatalities": 0,
-            "mostDangerousZone": "",
-            "yearTrend": {}
-        },
-        "zones": []
-    }
+    # Incident rows come pre-parsed from the columnar crash store
+    store = load_store()
+    state = None if full else _load_state(STATE_PATH)
+    analytics_data, state, recomputed = update_analytics(zones, store, state)
 
-    # Process each zone
-    for zone in zones:
-        # 1. Severity Score (0-10)
-        # Weight fatalities higher than simple counts
-        fatality_weight = 0.7
-        incident_weight = 0.3
-        
-        # Normalize (assuming max fatalities in a zone ~1000 for scaling)
-        severity = (min(zone['totalFatalities'] / 500, 1.0) * 10 * fatality_weight) + \
-                   (min(zone['count'] / 50, 1.0) * 10 * incident_weight)
-        
-        severity = round(min(severity, 10.0), 1)
-
-        # 2. Trend Analysis (Linear Regression Slope)
-        years = []
-        for crash in zone['crashes']:
-            try:
-                # Handle various date formats if necessary, but assuming MM/DD/YYYY based on sample
-                if not crash['date']: continue
-                dt = datetime.strptime(crash['date'], '%m/%d/%Y')
-                years.append(dt.year)
-                
-                # Global Year Trend
-                y_str = str(dt.year)
-                analytics_data["globalStats"]["yearTrend"][y_str] = \
-                    analytics_data["globalStats"]["yearTrend"].get(y_str, 0) + 1
-            except (ValueError, TypeError):
-                continue
-        
-        years.sort()
-        
-        # Simple trend (incidents per decade)
-        trend_status = "Stable"
-        if len(years) > 1:
-            recent_count = len([y for y in years if y > 1990])
-            old_count = len([y for y in years if y <= 1990])
-            if recent_count > old_count:
-                trend_status = "Increasing"
-            elif recent_count < old_count:
-                trend_status = "Decreasing"
-
-        # 3. Drift Prediction (Mock Physics)
-        # Generate a "Drift Vector" based on latitude
-        lat = zone['lat']
-        u_wind = 0
-        v_wind = 0
-        
-        # Simple atmospheric circulation approximation
-        if 0 <= abs(lat) < 30:
-            # Trade winds (East to West)
-            u_wind = -5.0 # m/s (Westward)
-            v_wind = -2.0 if lat > 0 else 2.0 # Towards equator ideally
-        elif 30 <= abs(lat) < 60:
-            # Westerlies (West to East)
-            u_wind = 8.0 # m/s (Eastward)
-            v_wind = 2.0
-        else:
-            # Polar Easterlies
-            u_wind = -3.0
-            v_wind = -1.0
+    write_json_atomic(output_path, analytics_data)
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    write_json_atomic(STATE_PATH, state)
 
-        analytics_data["zones"].append({
-            "name": zone['name'],
-            "lat": zone['lat'],
-            "lon": zone['lon'],
-            "severityScore": severity,
-            "trend": trend_status,
-            "primaryRisk": zone['primaryRisk'],
-            "driftVector": {"u": u_wind, "v": v_wind},
-            "fatalities": zone['totalFatalities'] 
-        })
+    print(f"Successfully generated analytics for {len(zones)} zones ({recomputed} recomputed) at {output_path}")
 
-        analytics_data["globalStats"]["totalIncidents"] += zone['count']
-        analytics_data["globalStats"]["totalFatalities"] += zone['totalFatalities']
 
-    # Identify most dangerous
-    if analytics_data["zones"]:
-        most_dangerous = max(analytics_data["zones"], key=lambda x: x['severityScore'])
-        analytics_data["globalStats"]["mostDangerousZone"] = most_dangerous['name']
+def bench(rows, n_zones=500, seed=0):
+    """
+    Times compute_analytics on synthetic incident rows.
+    """
+    rng = np.random.default_rng(seed)
+    zones = [{"name": f"Zone {i}", "lat": float(lat), "lon": 0.0, "primaryRisk": "Unknown"}
+             for i, lat in enumerate(rng.uniform(-80, 80, n_zones))]
+    zone_idx = rng.integers(-1, n_zones, rows)
+    years = rng.integers(1908, 2025, rows).astype(np.int16)
+    fatalities = rng.poisson(12, rows).astype(np.float32)
+
+    start = time.perf_counter()
+    compute_analytics(zones, zone_idx, years, fatalities)
+    print(f"{rows} incidents, {n_zones} zones: {(time.perf_counter() - start) * 1000:.0f} ms")
 
-    # Save
-    with open(output_path, 'w') as f:
-        json.dump(analytics_data, f, indent=2)
-    
-    print(f"Successfully generated analytics for {len(zones)} zones at {output_path}")
 
 if __name__ == "__main__":
-    analyze_risk()
+    parser = argparse.ArgumentParser(description="Generate public/data/advanced_analytics.json")
+    parser.add_argument("--full", action="store_true", help="ignore the saved state and recompute every zone")
+    parser.add_argument("--bench", type=int, metavar="ROWS", help="time the analytics on synthetic rows instead")
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.bench)
+    else:
+        analyze_risk(full=args.full)
@@ -0,0 +1,71 @@
+"""
+Builds scripts/assets/gazetteer.json.gz, the offline gazetteer used by
+scripts/geocode.py.
+
+Source: GeoNames (CC BY 4.0, https://www.geonames.org) as packaged by the
+MIT-licensed 'geonamescache' module (pip install geonamescache; build-time
+only). Places with at least --min-population inhabitants are kept with the
+normalized forms (geocode.normalize) of their name and plain-ASCII alternate
+names (old spellings such as "Peking" or "Godthaab" are common in the crash
+records), plus country and US state names.
+
+    python scripts/build_gazetteer.py [--min-population 5000] [--out scripts/assets/gazetteer.json.gz]
+"""
+import argparse
+import gzip
+import json
+import os
+import re
+
+from geocode import normalize
+
+ASCII_NAME = re.compile(r"^[A-Za-z][A-Za-z .'\-]{1,39}$")
+
+
+def load_source(name):
+    import geonamescache
+    path = os.path.join(os.path.dirname(geonamescache.__file__), "data", name)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def build(out_path, min_population=5000):
+    source = "cities5000.json" if min_population >= 5000 else "cities1000.json"
+    cities = load_source(source)
+
+    places = []
+    for city in sorted(cities.values(), key=lambda c: -c["population"]):
+        if city["population"] < min_population:
+            continue
+        keys = [normalize(city["name"])]
+        for alt in city.get("alternatenames", []):
+            key = normalize(alt) if ASCII_NAME.match(alt) else ""
+            if key and key not in keys:
+                keys.append(key)
+        places.append([
+            city["name"], keys, city["countrycode"], city.get("admin1code", ""),
+            round(city["latitude"], 4), round(city["longitude"], 4), city["population"]
+        ])
+
+    gazetteer = {
+        "attribution": "GeoNames (CC BY 4.0) via geonamescache",
+        "countries": {c["iso"]: c["name"] for c in load_source("countries.json").values()},
+        "us_states": {s["code"]: s["name"] for s in load_source("us_states.json").values()},
+        "places": places,
+    }
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with gzip.open(out_path, "wt", encoding="utf-8", compresslevel=9) as f:
+        json.dump(gazetteer, f, separators=(",", ":"))
+    print(f"Wrote {len(places)} places ({os.path.getsize(out_path) / 1e6:.1f} MB) to {out_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-population", type=int, default=5000)
+    parser.add_argument("--out", default=os.path.join("scripts", "assets", "gazetteer.json.gz"))
+    args = parser.parse_args()
+    build(args.out, args.min_population)
+
+
+if __name__ == "__main__":
+    main()
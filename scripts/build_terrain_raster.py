@@ -0,0 +1,97 @@
+"""
+Builds backend/assets/terrain.bin, the offline land/sea raster used by
+backend/terrain.py for /api/recon.
+
+Source: the GLOBE-derived 30 arc-second ocean mask shipped with the
+'global-land-mask' package (pip install global-land-mask; build-time only).
+Each output cell summarises the land fraction of the source pixels it covers:
+
+    0 open ocean       no land in the cell
+    1 coastal waters   mostly water, some land
+    2 coastline        mostly land, some water
+    3 land             no water in the cell
+
+Codes are packed four to a byte, row-major from 90N / 180W, after a small
+header (magic, rows, cols, cell size), so the server can memory-map the file.
+
+    python scripts/build_terrain_raster.py [--cell-deg 0.1] [--out backend/assets/terrain.bin]
+"""
+import argparse
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"TERRAIN1"
+HEADER = struct.Struct(">IId")
+SOURCE_CELL_DEG = 1 / 120
+
+
+def load_ocean_mask():
+    import global_land_mask
+    path = os.path.join(os.path.dirname(global_land_mask.__file__), "globe_combined_mask_compressed.npz")
+    data = np.load(path)
+    lat = data["lat"]
+    if lat[0] < lat[-1]:
+        raise ValueError("expected the source mask to run north to south")
+    return data["mask"]
+
+
+def land_fraction(ocean, block):
+    """
+    Fraction of land pixels in each block x block tile, processed a band of
+    rows at a time to keep peak memory near the size of the source mask.
+    """
+    rows, cols = ocean.shape[0] // block, ocean.shape[1] // block
+    fraction = np.empty((rows, cols), dtype=np.float32)
+    for r in range(rows):
+        band = ~ocean[r * block:(r + 1) * block]
+        fraction[r] = band.reshape(block, cols, block).mean(axis=(0, 2))
+    return fraction
+
+
+def classify(fraction):
+    codes = np.full(fraction.shape, 3, dtype=np.uint8)
+    codes[fraction < 1.0] = 2
+    codes[fraction < 0.5] = 1
+    codes[fraction == 0.0] = 0
+    return codes
+
+
+def pack(codes):
+    rows, cols = codes.shape
+    quads = codes.reshape(rows, cols // 4, 4)
+    return (quads[..., 0] | (quads[..., 1] << 2) | (quads[..., 2] << 4) | (quads[..., 3] << 6)).astype(np.uint8)
+
+
+def build(out_path, cell_deg=0.1):
+    block = round(cell_deg / SOURCE_CELL_DEG)
+    if abs(block * SOURCE_CELL_DEG - cell_deg) > 1e-9:
+        raise ValueError(f"cell size must be a multiple of {SOURCE_CELL_DEG:.6f} degrees")
+
+    codes = classify(land_fraction(load_ocean_mask(), block))
+    rows, cols = codes.shape
+    if cols % 4:
+        raise ValueError("column count must be a multiple of 4")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(rows, cols, cell_deg))
+        f.write(pack(codes).tobytes())
+
+    counts = np.bincount(codes.ravel(), minlength=4)
+    print(f"Wrote {rows}x{cols} raster ({os.path.getsize(out_path) / 1e6:.1f} MB) to {out_path}")
+    print(f"Cells: ocean={counts[0]} coastal_waters={counts[1]} coastline={counts[2]} land={counts[3]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cell-deg", type=float, default=0.1)
+    parser.add_argument("--out", default=os.path.join("backend", "assets", "terrain.bin"))
+    args = parser.parse_args()
+    build(args.out, args.cell_deg)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Converts a gridded surface-wind forecast into the memory-mapped format read
+by backend/wind_field.py (drop the output into backend/assets/wind/).
+
+Input is any NetCDF file with 10 m wind components on a regular
+time/lat/lon grid, e.g. an ERA5 or GFS subset (variables u10/v10,
+UGRD_10maboveground/VGRD_10maboveground or ugrd10m/vgrd10m). Reading NetCDF
+needs 'xarray' plus a NetCDF engine (pip install xarray scipy; build-time only).
+
+Output layout: magic, header (time steps, rows, cols, first time in unix
+seconds, time step, first lat, lat step, first lon, lon step), then the u and
+v grids as big-endian float32, each (time, lat, lon).
+
+    python scripts/build_wind_field.py forecast.nc [--hours 72] [--out backend/assets/wind/forecast.wind]
+"""
+import argparse
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b"WINDFLD1"
+HEADER = struct.Struct(">IIIdddddd")
+COMPONENTS = (("u10", "v10"), ("UGRD_10maboveground", "VGRD_10maboveground"), ("ugrd10m", "vgrd10m"))
+AXES = {"time": ("time", "valid_time"), "lat": ("latitude", "lat"), "lon": ("longitude", "lon")}
+
+
+def _pick(names, candidates, what):
+    for name in candidates:
+        if name in names:
+            return name
+    raise ValueError(f"no {what} found (looked for {', '.join(candidates)})")
+
+
+def _step(values, what):
+    steps = np.diff(values)
+    if not steps.size:
+        return 1.0
+    if not np.allclose(steps, steps[0], rtol=1e-4):
+        raise ValueError(f"{what} axis is not evenly spaced")
+    return float(steps[0])
+
+
+def load_forecast(path, hours=None):
+    import xarray
+
+    ds = xarray.open_dataset(path)
+    u_name, v_name = next(((u, v) for u, v in COMPONENTS if u in ds and v in ds), (None, None))
+    if u_name is None:
+        raise ValueError(f"no 10 m wind components found in {path}")
+    dims = {axis: _pick(ds[u_name].dims, names, f"{axis} dimension") for axis, names in AXES.items()}
+    order = [dims["time"], dims["lat"], dims["lon"]]
+
+    times = ds[dims["time"]].values.astype("datetime64[s]").astype(np.int64).astype(float)
+    keep = slice(None) if hours is None else times <= times[0] + hours * 3600
+    wind_u = ds[u_name].transpose(*order).values[keep]
+    wind_v = ds[v_name].transpose(*order).values[keep]
+    return times[keep], ds[dims["lat"]].values.astype(float), ds[dims["lon"]].values.astype(float), wind_u, wind_v
+
+
+def build(source, out_path, hours=None):
+    times, lats, lons, wind_u, wind_v = load_forecast(source, hours)
+    dt_s = _step(times, "time")
+    dlat = _step(lats, "latitude")
+    dlon = _step(lons, "longitude")
+    # Missing values (land masks in some products) become calm air
+    data = np.nan_to_num(np.stack([wind_u, wind_v])).astype(">f4")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    tmp = f"{out_path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(times), len(lats), len(lons), times[0], dt_s, lats[0], dlat, lons[0], dlon))
+        f.write(data.tobytes())
+    os.replace(tmp, out_path)
+
+    print(f"Wrote {len(times)}x{len(lats)}x{len(lons)} wind field "
+          f"({os.path.getsize(out_path) / 1e6:.1f} MB) to {out_path}")
+    print(f"Window: {np.datetime64(int(times[0]), 's')} .. {np.datetime64(int(times[-1]), 's')} "
+          f"every {dt_s / 3600:g} h")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="NetCDF forecast file")
+    parser.add_argument("--hours", type=float, help="keep only the first N hours of the forecast")
+    parser.add_argument("--out", help="default: backend/assets/wind/<source name>.wind")
+    args = parser.parse_args()
+    out = args.out or os.path.join("backend", "assets", "wind",
+                                   os.path.splitext(os.path.basename(args.source))[0] + ".wind")
+    build(args.source, out, args.hours)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,356 @@
+"""
+Columnar store for Airplane_Crashes_and_Fatalities_Since_1908.csv.
+
+The CSV is parsed once into typed, fixed-width column files plus a JSON
+manifest; analytics memory-map the columns instead of re-parsing text.
+
+    <store>/manifest.json   row count, column dtypes, string dictionaries, source fingerprint
+    <store>/<column>.bin    raw little-endian array, one value per crash
+    <store>/summary.txt/.end  concatenated summary text and per-row end offsets
+
+String columns (location, operator, type, geo) are dictionary-encoded as
+int32 codes (-1 = empty). Dates are int32 days since 1970-01-01, numeric
+columns are float32 with NaN for missing values, 'precision' is the
+geocode.py match level, and 'causes' is a bitmask of the CAUSE_KEYWORDS
+found in the summary. Free text (summary) is kept as a UTF-8 blob plus an
+int64 end offset per row.
+
+When the CSV only grew (new incidents appended), just the new tail is parsed
+and appended; any other change, or a geocoder change, triggers a full rebuild.
+
+    python scripts/crash_store.py [--csv PATH] [--store DIR] [--rebuild]
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+
+import numpy as np
+
+from geocode import geocode, geocoder_version, NONE
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_PATH = os.path.join(ROOT, "Airplane_Crashes_and_Fatalities_Since_1908.csv")
+STORE_DIR = os.getenv("CRASH_STORE_DIR", os.path.join(ROOT, "build", "crash_store"))
+
+STORE_VERSION = 2
+MISSING_DATE = np.iinfo(np.int32).min
+
+CSV_FIELDS = ["Date", "Time", "Location", "Operator", "Flight #", "Route", "Type",
+              "Registration", "cn/In", "Aboard", "Fatalities", "Ground", "Summary"]
+
+COLUMNS = {
+    "date": "<i4",
+    "year": "<i2",
+    "aboard": "<f4",
+    "fatalities": "<f4",
+    "ground": "<f4",
+    "lat": "<f4",
+    "lon": "<f4",
+    "location": "<i4",
+    "operator": "<i4",
+    "type": "<i4",
+    "geo": "<i4",
+    "precision": "u1",
+    "causes": "u1",
+}
+# Variable-length UTF-8 text: <column>.txt holds the bytes, <column>.end each row's end offset
+TEXT_COLUMNS = ("summary",)
+DICTIONARY_COLUMNS = ("location", "operator", "type", "geo")
+
+# Summary keywords behind each risk factor; bit i = CAUSES[i]
+CAUSE_KEYWORDS = {
+    "Fog": ("fog",),
+    "Mountainous Terrain": ("mountain",),
+    "Engine Failure": ("engine",),
+    "Severe Weather": ("storm", "rain", "snow"),
+    "Stall": ("stall",),
+    "Conflict": ("shot down",),
+    "Fire": ("fire",),
+}
+CAUSES = list(CAUSE_KEYWORDS)
+
+DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+
+
+def cause_mask(summary):
+    text = summary.lower()
+    mask = 0
+    for bit, keywords in enumerate(CAUSE_KEYWORDS.values()):
+        if any(k in text for k in keywords):
+            mask |= 1 << bit
+    return mask
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _date_days(value):
+    match = DATE_RE.search(value or "")
+    if not match:
+        return MISSING_DATE
+    month, day, year = (int(g) for g in match.groups())
+    try:
+        return int(np.datetime64(f"{year:04d}-{month:02d}-{day:02d}", "D").astype(np.int64))
+    except ValueError:
+        return MISSING_DATE
+
+
+class _Dictionary:
+    def __init__(self, values=()):
+        self.values = list(values)
+        self.codes = {v: i for i, v in enumerate(self.values)}
+
+    def encode(self, value):
+        if not value:
+            return -1
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def parse_rows(text, dictionaries):
+    """
+    Parses CSV data rows (no header) into a dict of column arrays.
+    """
+    out = {name: [] for name in list(COLUMNS) + list(TEXT_COLUMNS) if name != "year"}
+    for row in csv.reader(io.StringIO(text)):
+        if len(row) < len(CSV_FIELDS):
+            continue
+        record = dict(zip(CSV_FIELDS, (field.strip() for field in row)))
+        days = _date_days(record["Date"])
+        place = geocode(record["Location"])
+
+        out["date"].append(days)
+        out["aboard"].append(_number(record["Aboard"]))
+        out["fatalities"].append(_number(record["Fatalities"]))
+        out["ground"].append(_number(record["Ground"]))
+        out["lat"].append(place[1] if place else np.nan)
+        out["lon"].append(place[2] if place else np.nan)
+        out["precision"].append(place[3] if place else NONE)
+        out["location"].append(dictionaries["location"].encode(record["Location"]))
+        out["operator"].append(dictionaries["operator"].encode(record["Operator"]))
+        out["type"].append(dictionaries["type"].encode(record["Type"]))
+        out["geo"].append(dictionaries["geo"].encode(place[0] if place else ""))
+        out["causes"].append(cause_mask(record["Summary"]))
+        out["summary"].append(record["Summary"].encode("utf-8"))
+    columns = {name: np.asarray(out[name], dtype=dtype) for name, dtype in COLUMNS.items() if name != "year"}
+    for name in TEXT_COLUMNS:
+        columns[name] = out[name]
+    dated = columns["date"] != MISSING_DATE
+    columns["year"] = np.where(
+        dated, columns["date"].astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970, 0
+    ).astype(COLUMNS["year"])
+    return columns
+
+
+def _sha256(path, length=None):
+    digest = hashlib.sha256()
+    remaining = os.path.getsize(path) if length is None else length
+    with open(path, "rb") as f:
+        while remaining > 0:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                break
+            digest.update(chunk)
+            remaining -= len(chunk)
+    return digest.hexdigest()
+
+
+def _read_manifest(store_dir):
+    try:
+        with open(os.path.join(store_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if manifest.get("version") != STORE_VERSION or manifest.get("geocoder") != geocoder_version():
+        return None
+    return manifest
+
+
+def _write_manifest(store_dir, manifest):
+    path = os.path.join(store_dir, "manifest.json")
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def _fingerprint(csv_path):
+    stat = os.stat(csv_path)
+    return {"path": os.path.abspath(csv_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "sha256": _sha256(csv_path)}
+
+
+def _append_text(store_dir, name, values, rows):
+    """
+    Appends encoded strings to a text column that currently holds 'rows' rows.
+    """
+    end_path = os.path.join(store_dir, f"{name}.end")
+    with open(end_path, "r+b") as f:
+        f.truncate(rows * 8)
+        f.seek(max(rows - 1, 0) * 8)
+        start = int(np.frombuffer(f.read(8), dtype="<i8")[0]) if rows else 0
+        ends = start + np.cumsum([len(v) for v in values], dtype=np.int64)
+        f.seek(0, os.SEEK_END)
+        f.write(ends.astype("<i8").tobytes())
+    with open(os.path.join(store_dir, f"{name}.txt"), "r+b") as f:
+        f.truncate(start)
+        f.seek(0, os.SEEK_END)
+        f.write(b"".join(values))
+
+
+def build_store(csv_path=CSV_PATH, store_dir=STORE_DIR, rebuild=False):
+    """
+    Brings the store in line with the CSV. Returns "fresh", "appended" or "rebuilt".
+    """
+    os.makedirs(store_dir, exist_ok=True)
+    manifest = None if rebuild else _read_manifest(store_dir)
+    stat = os.stat(csv_path)
+
+    if manifest is not None:
+        source = manifest["source"]
+        if source["size"] == stat.st_size and source["mtime_ns"] == stat.st_mtime_ns:
+            return "fresh"
+        if source["size"] == stat.st_size and source["sha256"] == _sha256(csv_path):
+            source["mtime_ns"] = stat.st_mtime_ns
+            _write_manifest(store_dir, manifest)
+            return "fresh"
+        # Appended rows: the old file is an unchanged prefix ending on a record boundary
+        if stat.st_size > source["size"] and source.get("ends_with_newline") \
+                and _sha256(csv_path, source["size"]) == source["sha256"]:
+            with open(csv_path, "rb") as f:
+                f.seek(source["size"])
+                tail = f.read().decode("utf-8")
+            dictionaries = {name: _Dictionary(manifest["dictionaries"][name]) for name in DICTIONARY_COLUMNS}
+            columns = parse_rows(tail, dictionaries)
+            rows = manifest["rows"]
+            for name, dtype in COLUMNS.items():
+                path = os.path.join(store_dir, f"{name}.bin")
+                with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                    # Drop anything past the committed row count (e.g. an interrupted append)
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+                    f.seek(0, os.SEEK_END)
+                    f.write(columns[name].tobytes())
+            for name in TEXT_COLUMNS:
+                _append_text(store_dir, name, columns[name], rows)
+            manifest["rows"] = rows + len(columns["date"])
+            manifest["dictionaries"] = {name: d.values for name, d in dictionaries.items()}
+            manifest["source"] = dict(_fingerprint(csv_path), ends_with_newline=tail.endswith("\n"))
+            _write_manifest(store_dir, manifest)
+            return "appended"
+
+    with open(csv_path, "r", encoding="utf-8", newline="") as f:
+        text = f.read()
+    header_end = text.find("\n") + 1
+    dictionaries = {name: _Dictionary() for name in DICTIONARY_COLUMNS}
+    columns = parse_rows(text[header_end:], dictionaries)
+    for name in COLUMNS:
+        tmp = os.path.join(store_dir, f"{name}.bin.tmp")
+        columns[name].tofile(tmp)
+        os.replace(tmp, os.path.join(store_dir, f"{name}.bin"))
+    for name in TEXT_COLUMNS:
+        for suffix in ("txt", "end"):
+            open(os.path.join(store_dir, f"{name}.{suffix}"), "wb").close()
+        _append_text(store_dir, name, columns[name], 0)
+    _write_manifest(store_dir, {
+        "version": STORE_VERSION,
+        "geocoder": geocoder_version(),
+        "rows": len(columns["date"]),
+        "columns": COLUMNS,
+        "text_columns": list(TEXT_COLUMNS),
+        "causes": CAUSES,
+        "dictionaries": {name: d.values for name, d in dictionaries.items()},
+        "source": dict(_fingerprint(csv_path), ends_with_newline=text.endswith("\n")),
+    })
+    return "rebuilt"
+
+
+class CrashStore:
+    """
+    Read-only view of a built store; each column is a memory-mapped array.
+    """
+
+    def __init__(self, store_dir=STORE_DIR):
+        manifest = _read_manifest(store_dir)
+        if manifest is None:
+            raise FileNotFoundError(f"No crash store at {store_dir}; run scripts/crash_store.py")
+        self.store_dir = store_dir
+        self.rows = manifest["rows"]
+        # Changes whenever rows are appended or the store is rebuilt from a different source
+        self.fingerprint = {"rows": self.rows, "sha256": manifest["source"]["sha256"]}
+        self.dictionaries = manifest["dictionaries"]
+        self.cause_names = manifest["causes"]
+        for name, dtype in manifest["columns"].items():
+            path = os.path.join(store_dir, f"{name}.bin")
+            if self.rows:
+                column = np.memmap(path, dtype=dtype, mode="r", shape=(self.rows,))
+            else:
+                column = np.empty(0, dtype=dtype)
+            setattr(self, name, column)
+        self._text = {}
+        for name in manifest.get("text_columns", []):
+            ends = np.memmap(os.path.join(store_dir, f"{name}.end"), dtype="<i8", mode="r", shape=(self.rows,)) \
+                if self.rows else np.empty(0, dtype="<i8")
+            size = int(ends[-1]) if self.rows else 0
+            blob = np.memmap(os.path.join(store_dir, f"{name}.txt"), dtype=np.uint8, mode="r", shape=(size,)) \
+                if size else np.empty(0, dtype=np.uint8)
+            self._text[name] = (ends, blob)
+
+    def text(self, column, row):
+        """
+        Value of a text column (e.g. 'summary') at one row.
+        """
+        ends, blob = self._text[column]
+        start = int(ends[row - 1]) if row > 0 else 0
+        return bytes(blob[start:int(ends[row])]).decode("utf-8")
+
+    def __len__(self):
+        return self.rows
+
+    def code(self, column, value):
+        """
+        Dictionary code of a string value, or -1 if it never occurs.
+        """
+        try:
+            return self.dictionaries[column].index(value)
+        except ValueError:
+            return -1
+
+    def decode(self, column, codes):
+        values = self.dictionaries[column]
+        return [values[c] if c >= 0 else "" for c in np.asarray(codes).tolist()]
+
+
+def load_store(csv_path=CSV_PATH, store_dir=STORE_DIR):
+    """
+    Opens the store, building or extending it first if the CSV changed.
+    """
+    build_store(csv_path, store_dir)
+    return CrashStore(store_dir)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("--store", default=STORE_DIR)
+    parser.add_argument("--rebuild", action="store_true", help="ignore the existing store")
+    args = parser.parse_args()
+
+    status = build_store(args.csv, args.store, args.rebuild)
+    store = CrashStore(args.store)
+    geocoded = int(np.count_nonzero(~np.isnan(store.lat)))
+    print(f"Crash store {status}: {len(store)} rows ({geocoded} geocoded) in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Offline geocoder for free-text crash locations ("Near Kano, Nigeria",
+"Mt. Trelease, near Silver Plume, Colorado", "Atlantic Ocean").
+
+Places come from the bundled gazetteer (scripts/build_gazetteer.py). The last
+comma-separated part of a location is read as the region (country, US state,
+province or historical name); earlier parts are tried as place names within
+it, first by exact normalized name, then by a trigram-indexed fuzzy match.
+Unresolved places fall back to the region's largest place.
+"""
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from functools import lru_cache
+
+import numpy as np
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "gazetteer.json.gz")
+
+# Match quality, best last; stored per crash in the crash store
+NONE, REGION, WATER, PLACE = range(4)
+
+FUZZY_CUTOFF = 0.82
+
+# Bump when the matching rules change, so stores geocoded with the old rules are rebuilt
+GEOCODER_REVISION = 2
+
+WATER_BODIES = {
+    "atlantic ocean": (25.0, -40.0), "pacific ocean": (0.0, -160.0), "indian ocean": (-20.0, 80.0),
+    "arctic ocean": (80.0, 0.0), "mediterranean sea": (35.0, 18.0), "north sea": (56.0, 3.0),
+    "english channel": (50.2, -1.5), "irish sea": (53.5, -5.0), "baltic sea": (58.0, 20.0),
+    "black sea": (43.0, 34.0), "caspian sea": (42.0, 51.0), "aegean sea": (39.0, 25.0),
+    "adriatic sea": (43.0, 15.0), "red sea": (20.0, 38.0), "persian gulf": (27.0, 51.0),
+    "arabian sea": (15.0, 65.0), "bay of bengal": (15.0, 88.0), "south china sea": (12.0, 113.0),
+    "east china sea": (29.0, 125.0), "sea of japan": (40.0, 135.0), "java sea": (-5.0, 111.0),
+    "tasman sea": (-40.0, 160.0), "coral sea": (-18.0, 155.0), "bering sea": (58.0, -175.0),
+    "gulf of alaska": (57.0, -145.0), "gulf of mexico": (25.0, -90.0), "caribbean sea": (15.0, -75.0),
+    "lake michigan": (44.0, -87.0), "lake erie": (42.2, -81.2), "lake ontario": (43.7, -77.9),
+    "gulf of finland": (60.0, 26.0), "gulf of oman": (24.5, 58.5), "mediterranean": (35.0, 18.0),
+}
+
+# Historical and sub-national region names -> ISO country codes
+REGION_ALIASES = {
+    "england": ["GB"], "scotland": ["GB"], "wales": ["GB"], "northern ireland": ["GB"],
+    "uk": ["GB"], "great britain": ["GB"], "united kingdom": ["GB"],
+    "ussr": ["RU", "UA", "KZ", "BY", "UZ", "GE", "AM", "AZ", "TM", "KG", "TJ", "MD", "LT", "LV", "EE"],
+    "soviet union": ["RU", "UA", "KZ", "BY", "UZ", "GE", "AM", "AZ", "TM", "KG", "TJ", "MD", "LT", "LV", "EE"],
+    "south vietnam": ["VN"], "north vietnam": ["VN"], "burma": ["MM"], "zaire": ["CD"],
+    "democratic republic of congo": ["CD"], "democratirepubliof congo": ["CD"], "congo": ["CG", "CD"],
+    "yugoslavia": ["RS", "HR", "BA", "SI", "MK", "ME"], "czechoslovakia": ["CZ", "SK"],
+    "west germany": ["DE"], "east germany": ["DE"], "rhodesia": ["ZW"], "ceylon": ["LK"],
+    "persia": ["IR"], "siam": ["TH"], "formosa": ["TW"], "dutch east indies": ["ID"],
+    "mocambique": ["MZ"], "usa": ["US"], "united states": ["US"], "puerto rico": ["PR"],
+    "ontario": ["CA"], "quebec": ["CA"], "british columbia": ["CA"], "alberta": ["CA"], "manitoba": ["CA"],
+    "saskatchewan": ["CA"], "newfoundland": ["CA"], "nova scotia": ["CA"], "new brunswick": ["CA"],
+    "yukon": ["CA"], "yukon territory": ["CA"], "northwest territories": ["CA"], "labrador": ["CA"],
+    "new south wales": ["AU"], "queensland": ["AU"], "victoria": ["AU"], "tasmania": ["AU"],
+    "western australia": ["AU"], "south australia": ["AU"], "northern territory": ["AU"],
+}
+
+QUALIFIER = re.compile(
+    r"^(near|off|over|outside|at|in|into|from|approximately|about|the|"
+    r"(north|south|east|west|northeast|northwest|southeast|southwest)(ern)?( of)?|"
+    r"\d+(\.\d+)? ?(miles|mile|mi|km|nm|kilometers)( \w+)?( of)?)\s+"
+)
+FACILITY = re.compile(r"\s+(airport|international airport|air force base|air base|afb|nas|naval air station|airfield|field)$")
+ABBREVIATIONS = [(re.compile(r"^st\.? "), "saint "), (re.compile(r"^ste\.? "), "sainte "),
+                 (re.compile(r"^mt\.? "), "mount "), (re.compile(r"^ft\.? "), "fort ")]
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    text = re.sub(r"\(.*?\)", " ", text)
+    text = re.sub(r"[^a-z0-9 .'\-]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    for pattern, replacement in ABBREVIATIONS:
+        text = pattern.sub(replacement, text)
+    return text.replace(".", "").replace("'", "").strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class Gazetteer:
+    """
+    Name indexes over the bundled places: exact lookups by normalized name,
+    and per-country trigram postings (built on first use) for fuzzy matches.
+    """
+
+    def __init__(self, path=GAZETTEER_PATH):
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        self.places = data["places"]  # [name, keys, country, admin1, lat, lon, population], largest first
+        self.countries = data["countries"]
+        self.us_states = data["us_states"]
+
+        self.by_name = {}
+        for i, place in enumerate(self.places):
+            for key in place[1]:
+                self.by_name.setdefault(key, []).append(i)
+
+        self.regions = {}
+        for code, name in self.countries.items():
+            self.regions[normalize(name)] = (name, [code], None)
+        for alias, codes in REGION_ALIASES.items():
+            if len(codes) == 1:
+                label = self.countries.get(codes[0], alias.title())
+            else:
+                label = alias.upper() if len(alias) <= 4 else alias.title()
+            self.regions[alias] = (label, codes, None)
+        for code, name in self.us_states.items():
+            self.regions[normalize(name)] = (name, ["US"], code)
+            self.regions.setdefault(code.lower(), (name, ["US"], code))
+        self.regions["washington dc"] = ("Washington DC", ["US"], "DC")
+
+        self._by_country = None
+        self._trigram_index = {}
+
+    @lru_cache(maxsize=4096)
+    def resolve_region(self, text):
+        key = normalize(text)
+        region = self.regions.get(key)
+        if region is None:
+            close = difflib.get_close_matches(key, self.regions.keys(), n=1, cutoff=FUZZY_CUTOFF)
+            region = self.regions[close[0]] if close else None
+        return region
+
+    def _in_region(self, place_id, countries, admin1):
+        place = self.places[place_id]
+        return place[2] in countries and (admin1 is None or place[3] == admin1)
+
+    def _fuzzy_index(self, country):
+        """
+        (names, postings) for one country: the distinct name keys with their
+        place ids, and for every trigram the array of name indexes containing it.
+        """
+        if self._by_country is None:
+            self._by_country = {}
+            for key, ids in self.by_name.items():
+                for place_id in ids:
+                    names = self._by_country.setdefault(self.places[place_id][2], {})
+                    names.setdefault(key, []).append(place_id)
+        index = self._trigram_index.get(country)
+        if index is None:
+            names = list(self._by_country.get(country, {}).items())
+            postings = {}
+            for n, (key, _) in enumerate(names):
+                for gram in trigrams(key):
+                    postings.setdefault(gram, []).append(n)
+            index = self._trigram_index[country] = (names, {g: np.asarray(p) for g, p in postings.items()})
+        return index
+
+    @lru_cache(maxsize=65536)
+    def find_place(self, key, countries, admin1=None):
+        """
+        Largest place whose normalized name is 'key' in the region (a tuple of
+        country codes, optionally one US state), by exact then fuzzy name.
+        """
+        if not key:
+            return None
+        for strict in ((admin1,) if admin1 is None else (admin1, None)):
+            for place_id in self.by_name.get(key, ()):
+                if self._in_region(place_id, countries, strict):
+                    return place_id
+
+        best, best_score = None, FUZZY_CUTOFF
+        grams = trigrams(key)
+        for country in countries:
+            names, postings = self._fuzzy_index(country)
+            hits = [postings[g] for g in grams if g in postings]
+            if not hits:
+                continue
+            shared = np.bincount(np.concatenate(hits), minlength=len(names))
+            top = np.argpartition(-shared, min(8, len(names) - 1))[:8]
+            for n in top.tolist():
+                candidate, ids = names[n]
+                score = difflib.SequenceMatcher(None, key, candidate).ratio()
+                # Only exact names may leave the named state ("Fort Myer, Virginia" is not Fort Myers, FL)
+                in_state = [i for i in ids if self._in_region(i, countries, admin1)]
+                if score > best_score and in_state:
+                    best, best_score = in_state[0], score
+        return best
+
+    def label(self, place_id):
+        """
+        "Place, State" for US places, "Place, Country" elsewhere, whatever
+        (historical) region name the record used.
+        """
+        name, _, country, admin1, *_ = self.places[place_id]
+        if country == "US" and admin1 in self.us_states:
+            return f"{name}, {self.us_states[admin1]}"
+        return f"{name}, {self.countries.get(country, country)}"
+
+    def largest_place(self, countries, admin1=None):
+        for place_id in range(len(self.places)):
+            if self._in_region(place_id, countries, admin1):
+                return place_id
+        return None
+
+
+def clean_place(text):
+    text = normalize(text)
+    text = re.sub(r"^between (.+?) and .+$", r"\1", text)
+    text = re.sub(r" between .+$", "", text)
+    previous = None
+    while previous != text:
+        previous = text
+        text = QUALIFIER.sub("", text)
+    return FACILITY.sub("", text).strip()
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    return Gazetteer()
+
+
+@lru_cache(maxsize=1)
+def geocoder_version():
+    with open(GAZETTEER_PATH, "rb") as f:
+        return f"{GEOCODER_REVISION}-{hashlib.sha256(f.read()).hexdigest()[:16]}"
+
+
+@lru_cache(maxsize=65536)
+def geocode(location):
+    """
+    Returns (label, lat, lon, precision) for a free-text location, or None.
+    """
+    if not location or not location.strip():
+        return None
+    gazetteer = load_gazetteer()
+    parts = [p.strip() for p in location.split(",") if p.strip()]
+
+    for part in parts:
+        key = clean_place(part)
+        # The source data often drops a "c" before a space ("AtlantiOcean"), hence the fuzzy match
+        water = key if key in WATER_BODIES else next(iter(difflib.get_close_matches(key, WATER_BODIES, n=1, cutoff=0.9)), None)
+        if water:
+            lat, lon = WATER_BODIES[water]
+            return water.title().replace(" Of ", " of "), lat, lon, WATER
+
+    # Try the region as written first: qualifier stripping would turn "North Carolina" into "carolina"
+    region = gazetteer.resolve_region(parts[-1]) or gazetteer.resolve_region(clean_place(parts[-1]))
+    if region is None:
+        # No recognizable region ("Croydon, London"): the largest place named like the last part
+        ids = gazetteer.by_name.get(clean_place(parts[-1]))
+        if ids:
+            _, _, _, _, lat, lon, _ = gazetteer.places[ids[0]]
+            return gazetteer.label(ids[0]), lat, lon, PLACE
+        return None
+
+    region_name, countries, admin1 = region
+    for part in parts[:-1]:
+        candidates = [clean_place(part)]
+        candidates += [c.strip() for c in re.split(r"[-/]", candidates[0]) if c.strip() and c.strip() != candidates[0]]
+        for candidate in candidates:
+            place_id = gazetteer.find_place(candidate, tuple(countries), admin1)
+            if place_id is not None:
+                _, _, _, _, lat, lon, _ = gazetteer.places[place_id]
+                return gazetteer.label(place_id), lat, lon, PLACE
+
+    place_id = gazetteer.largest_place(countries, admin1)
+    if place_id is None:
+        return None
+    _, _, _, _, lat, lon, _ = gazetteer.places[place_id]
+    return region_name, lat, lon, REGION
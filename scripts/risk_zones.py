@@ -0,0 +1,227 @@
+"""
+Builds src/data/risk_zones.json from the crash store.
+
+Crashes geocoded to a place or water body are grouped by location and
+clustered with a weighted DBSCAN: a location is a core point when at least
+--min-crashes crashes lie within --eps-km of it. Neighbour queries go
+through a 3D grid of unit-sphere vectors with cells one eps wide, so each
+query only looks at 27 cells and the pass is near-linear in the number of
+distinct locations (and correct across the antimeridian).
+
+DBSCAN chains dense regions (e.g. the US Northeast) into one long cluster, so
+clusters reaching further than --max-radius-factor x eps from their centroid
+are bisected until every part fits; parts left with fewer than --min-crashes
+crashes are dropped as noise. Each zone is named after the location nearest
+its centroid, preferring locations with more than one crash.
+
+    python scripts/risk_zones.py [--eps-km 60] [--min-crashes 5] [--max-radius-factor 2]
+                                 [--out src/data/risk_zones.json]
+"""
+import argparse
+import json
+import os
+import time
+from collections import deque
+
+import numpy as np
+
+from crash_store import load_store, MISSING_DATE, ROOT
+from geocode import PLACE, WATER
+
+EARTH_RADIUS_KM = 6371.0
+EPS_KM = 60.0
+MIN_CRASHES = 5
+MAX_RADIUS_FACTOR = 2.0
+NAME_MIN_CRASHES = 2
+OUTPUT_PATH = os.path.join(ROOT, "src", "data", "risk_zones.json")
+
+
+def unit_vectors(lats, lons):
+    lat = np.radians(np.asarray(lats, dtype=np.float64))
+    lon = np.radians(np.asarray(lons, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack((cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)))
+
+
+def grid_neighbors(vectors, eps_km):
+    """
+    For every point, the indexes of all points within eps_km (itself included).
+    """
+    chord = 2 * np.sin(eps_km / (2 * EARTH_RADIUS_KM))
+    cells = np.floor(vectors / chord).astype(np.int64)
+    buckets = {}
+    for i, cell in enumerate(map(tuple, cells.tolist())):
+        buckets.setdefault(cell, []).append(i)
+    buckets = {cell: np.asarray(ids) for cell, ids in buckets.items()}
+
+    offsets = [(dx, dy, dz) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)]
+    neighbors = [None] * len(vectors)
+    for (cx, cy, cz), members in buckets.items():
+        candidates = [buckets[c] for c in ((cx + dx, cy + dy, cz + dz) for dx, dy, dz in offsets) if c in buckets]
+        candidates = np.concatenate(candidates)
+        # Whole cell at once: |members| x |candidates| squared chord distances
+        d2 = ((vectors[members, None, :] - vectors[None, candidates, :]) ** 2).sum(axis=2)
+        for row, i in enumerate(members.tolist()):
+            neighbors[i] = candidates[d2[row] <= chord * chord]
+    return neighbors
+
+
+def dbscan(lats, lons, weights, eps_km=EPS_KM, min_weight=MIN_CRASHES):
+    """
+    Weighted DBSCAN over points on the sphere. Returns a cluster label per
+    point (-1 = noise); clusters are numbered in order of discovery.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    neighbors = grid_neighbors(unit_vectors(lats, lons), eps_km)
+    core = np.array([weights[n].sum() >= min_weight for n in neighbors], dtype=bool)
+
+    labels = np.full(len(weights), -1, dtype=np.int64)
+    cluster = 0
+    for seed in np.flatnonzero(core).tolist():
+        if labels[seed] != -1:
+            continue
+        labels[seed] = cluster
+        queue = deque([seed])
+        while queue:
+            point = queue.popleft()
+            if not core[point]:
+                continue  # border point: joins the cluster but does not extend it
+            for other in neighbors[point].tolist():
+                if labels[other] == -1:
+                    labels[other] = cluster
+                    queue.append(other)
+        cluster += 1
+    return labels
+
+
+def _centroid(vectors, weights):
+    centre = (vectors * weights[:, None]).sum(axis=0)
+    return centre / np.linalg.norm(centre)
+
+
+def _radius_km(vectors, centre):
+    return float(EARTH_RADIUS_KM * np.arccos(np.clip(vectors @ centre, -1.0, 1.0)).max())
+
+
+def bound_extent(vectors, weights, members, max_radius_km, iterations=10):
+    """
+    Splits one cluster (indexes into vectors/weights) into parts whose
+    farthest member is within max_radius_km of the part's weighted centroid.
+    Oversized parts are bisected with weighted 2-means, seeded by the member
+    farthest from the centroid and the member farthest from that one.
+    """
+    pending, parts = [np.asarray(members)], []
+    while pending:
+        part = pending.pop()
+        centre = _centroid(vectors[part], weights[part])
+        if len(part) < 2 or _radius_km(vectors[part], centre) <= max_radius_km:
+            parts.append(part)
+            continue
+        first = part[np.argmin(vectors[part] @ centre)]
+        second = part[np.argmin(vectors[part] @ vectors[first])]
+        seeds = np.stack([vectors[first], vectors[second]])
+        for _ in range(iterations):
+            side = np.argmax(vectors[part] @ seeds.T, axis=1)
+            seeds = np.stack([_centroid(vectors[part[side == k]], weights[part[side == k]]) for k in (0, 1)])
+        pending += [part[side == 0], part[side == 1]]
+    return parts
+
+
+def _format_date(days):
+    if days == MISSING_DATE:
+        return ""
+    return np.datetime64(int(days), "D").astype(object).strftime("%m/%d/%Y")
+
+
+def _format_count(value):
+    return "" if np.isnan(value) else str(int(value))
+
+
+def build_zones(store, eps_km=EPS_KM, min_crashes=MIN_CRASHES, max_radius_factor=MAX_RADIUS_FACTOR):
+    """
+    Clusters the store's geocoded crashes into risk zones, largest first.
+    """
+    precision = np.asarray(store.precision)
+    rows = np.flatnonzero((precision == PLACE) | (precision == WATER))
+    geo = np.asarray(store.geo)[rows]
+
+    # One point per distinct location, weighted by its crash count
+    places, inverse, weights = np.unique(geo, return_inverse=True, return_counts=True)
+    first_row = rows[np.unique(inverse, return_index=True)[1]]
+    lats = np.asarray(store.lat, dtype=np.float64)[first_row]
+    lons = np.asarray(store.lon, dtype=np.float64)[first_row]
+    labels = dbscan(lats, lons, weights, eps_km, min_crashes)
+
+    vectors = unit_vectors(lats, lons)
+    clusters = [part for cluster in range(int(labels.max()) + 1 if labels.size else 0)
+                for part in bound_extent(vectors, weights, np.flatnonzero(labels == cluster), max_radius_factor * eps_km)
+                if weights[part].sum() >= min_crashes]
+    labels = np.full(len(weights), -1, dtype=np.int64)
+    for cluster, part in enumerate(clusters):
+        labels[part] = cluster
+
+    row_labels = labels[inverse]
+    fatalities = np.asarray(store.fatalities, dtype=np.float64)
+    causes = np.asarray(store.causes)
+    cause_bits = 1 << np.arange(len(store.cause_names))
+
+    zones = []
+    for cluster, members in enumerate(clusters):
+        member_rows = np.sort(rows[row_labels == cluster])
+        count = len(member_rows)
+
+        # Weighted centroid on the sphere, named after the nearest location with
+        # repeat crashes (one-off suburbs make poor labels), else the nearest one
+        centre = _centroid(vectors[members], weights[members])
+        closeness = vectors[members] @ centre
+        repeat = weights[members] >= NAME_MIN_CRASHES
+        label = members[np.argmax(np.where(repeat, closeness, -2.0) if repeat.any() else closeness)]
+
+        cause_counts = ((causes[member_rows, None] & cause_bits) > 0).sum(axis=0)
+        zone_causes = {name: int(n) for name, n in zip(store.cause_names, cause_counts.tolist()) if n}
+        primary = store.cause_names[int(np.argmax(cause_counts))] if cause_counts.any() else "Unknown"
+
+        zones.append({
+            "name": store.decode("geo", [places[label]])[0],
+            "lat": round(float(np.degrees(np.arcsin(centre[2]))), 4),
+            "lon": round(float(np.degrees(np.arctan2(centre[1], centre[0]))), 4),
+            "count": count,
+            "totalFatalities": int(np.nansum(fatalities[member_rows])),
+            "crashes": [{
+                "date": _format_date(store.date[r]),
+                "operator": store.decode("operator", [store.operator[r]])[0],
+                "fatalities": _format_count(fatalities[r]),
+                "summary": store.text("summary", r),
+            } for r in member_rows.tolist()],
+            "causes": zone_causes,
+            "places": sorted(store.decode("geo", places[members])),
+            "primaryRisk": primary,
+            "riskIntensity": min(count / 15, 1),
+            "description": f"High risk zone with {count} recorded incidents. Primary factor: {primary}.",
+        })
+    zones.sort(key=lambda z: -z["count"])
+    return zones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--eps-km", type=float, default=EPS_KM)
+    parser.add_argument("--min-crashes", type=int, default=MIN_CRASHES)
+    parser.add_argument("--max-radius-factor", type=float, default=MAX_RADIUS_FACTOR,
+                        help="split clusters reaching further than this many eps from their centroid")
+    parser.add_argument("--out", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = load_store()
+    zones = build_zones(store, args.eps_km, args.min_crashes, args.max_radius_factor)
+    os.makedirs(os.path.dirname(args.out), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(zones, f, indent=2)
+    clustered = sum(z["count"] for z in zones)
+    print(f"Risk zones data generated at {args.out}: {len(zones)} zones covering {clustered} of "
+          f"{len(store)} crashes in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
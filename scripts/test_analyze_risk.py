@@ -0,0 +1,98 @@
+import os
+import sys
+
+import numpy as np
+
+# Add scripts to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import analyze_risk
+
+
+def test_trend_slopes_match_polyfit():
+    rng = np.random.default_rng(1)
+    histogram = rng.poisson(3, (6, 40))
+    slope, confidence = analyze_risk.trend_regression(histogram, 1970)
+    years = np.arange(1970, 2010)
+    for row, s in zip(histogram, slope):
+        assert abs(np.polyfit(years, row, 1)[0] - s) < 1e-9
+    assert ((confidence >= 0) & (confidence <= 1)).all()
+
+
+def test_compute_analytics_from_rows():
+    zones = [
+        {"name": "Rising", "lat": 10.0, "lon": 0.0, "primaryRisk": "Fog"},
+        {"name": "Flat", "lat": 45.0, "lon": 0.0, "primaryRisk": "Stall"},
+    ]
+    # 'Rising' gets one more incident each decade; 'Flat' one per year; row zone -1 is ignored
+    years, zone_idx = [], []
+    for i, year in enumerate(range(1950, 2010)):
+        years += [year] * (1 + i // 10)
+        zone_idx += [0] * (1 + i // 10)
+        years.append(year)
+        zone_idx.append(1)
+    years += [1999, 0]
+    zone_idx += [-1, 1]
+    fatalities = np.full(len(years), 2.0)
+    fatalities[-1] = np.nan
+
+    data = analyze_risk.compute_analytics(zones, np.array(zone_idx), np.array(years), fatalities)
+    rising, flat = data["zones"]
+
+    assert rising["trend"] == "Increasing" and rising["trendConfidence"] > 0.99
+    assert flat["trend"] == "Stable" and flat["trendSlope"] == 0
+    assert flat["yearHistogram"]["1960"] == 1 and "0" not in flat["yearHistogram"]
+    assert data["globalStats"]["totalIncidents"] == len(years) - 1
+    assert data["globalStats"]["totalFatalities"] == 2 * (len(years) - 2)
+    assert data["globalStats"]["yearTrend"]["2009"] == 7
+    assert rising["driftVector"] == {"u": -5.0, "v": -2.0} and flat["driftVector"] == {"u": 8.0, "v": 2.0}
+
+
+class FakeStore:
+    def __init__(self, geo_names, years, fatalities):
+        self.dictionaries = {"geo": sorted(set(geo_names) - {""})}
+        self.geo = np.array([self.code("geo", n) for n in geo_names])
+        self.year = np.array(years)
+        self.fatalities = np.array(fatalities, dtype=float)
+        self.fingerprint = {"rows": len(geo_names), "sha256": str(hash((tuple(geo_names), tuple(years))))}
+
+    def code(self, column, value):
+        values = self.dictionaries[column]
+        return values.index(value) if value in values else -1
+
+
+def test_incremental_update_matches_full_recompute():
+    rng = np.random.default_rng(2)
+    names = [f"Zone {i}" for i in range(6)]
+    geo = rng.choice(names + [""], 400).tolist()
+    store = FakeStore(geo, rng.integers(1950, 2000, 400), rng.integers(0, 50, 400))
+    zones = [{"name": n, "lat": 10.0 * i, "lon": 0.0, "primaryRisk": "Fog", "count": 1} for i, n in enumerate(names)]
+
+    _, state, recomputed = analyze_risk.update_analytics(zones, store)
+    assert recomputed == 6
+
+    zones[2] = dict(zones[2], primaryRisk="Fire")
+    del zones[4]
+    data, state, recomputed = analyze_risk.update_analytics(zones, store, state)
+    assert recomputed == 1
+
+    full, _, _ = analyze_risk.update_analytics(zones, store)
+    assert data == full
+    assert data["zones"][2]["primaryRisk"] == "Fire"
+    assert data["globalStats"]["totalIncidents"] == sum(geo.count(z["name"]) for z in zones)
+
+
+def test_appended_crash_rows_are_picked_up_incrementally():
+    names = ["Zone 0", "Zone 1", "Zone 2"]
+    zones = [{"name": n, "lat": 10.0 * i, "lon": 0.0, "primaryRisk": "Fog"} for i, n in enumerate(names)]
+    geo, years, fatalities = ["Zone 0", "Zone 1", ""], [1970, 1980, 1990], [1, 2, 3]
+    _, state, _ = analyze_risk.update_analytics(zones, FakeStore(geo, years, fatalities))
+
+    # Two new incidents land in existing zones; the zone records themselves do not change
+    appended = FakeStore(geo + ["Zone 1", "Zone 2"], years + [1985, 1975], fatalities + [4, 5])
+    data, state, recomputed = analyze_risk.update_analytics(zones, appended, state)
+    full, _, _ = analyze_risk.update_analytics(zones, appended)
+
+    assert recomputed == 3
+    assert data == full
+    assert data["globalStats"]["totalIncidents"] == 4
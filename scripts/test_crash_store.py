@@ -0,0 +1,66 @@
+import os
+import sys
+
+import numpy as np
+
+# Add scripts to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import crash_store
+import geocode
+
+HEADER = "Date,Time,Location,Operator,Flight #,Route,Type,Registration,cn/In,Aboard,Fatalities,Ground,Summary\n"
+ROWS = [
+    '09/17/1908,17:18,"Fort Myer, Virginia",Military - U.S. Army,,Demonstration,Wright Flyer III,,1,2,1,0,"Nose-dived, engine trouble."\n',
+    '03/05/1965,,"Near Moscow, Russia",Aeroflot,,,Ilyushin,,,20,9,0,"Crashed in fog.\nSecond line of the summary."\n',
+    '10/01/1990,,"Paris, France",Air France,,,Boeing 737,,,,,0,\n',
+]
+APPENDED = '13/40/2001,,"Cairo, Egypt",EgyptAir,,,Boeing 767,,,217,217,0,"Shot down near Cairo"\n'
+
+
+def write_csv(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(HEADER + "".join(rows))
+
+
+def test_build_decodes_typed_columns(tmp_path):
+    csv_path, store_dir = tmp_path / "crashes.csv", str(tmp_path / "store")
+    write_csv(csv_path, ROWS)
+
+    assert crash_store.build_store(str(csv_path), store_dir) == "rebuilt"
+    store = crash_store.CrashStore(store_dir)
+
+    assert len(store) == 3
+    assert isinstance(store.year, np.memmap)
+    assert store.year.tolist() == [1908, 1965, 1990]
+    assert store.date[0] == np.datetime64("1908-09-17", "D").astype(int)
+    assert np.isnan(store.aboard[2]) and store.fatalities[1] == 9
+    # Fort Myer is below the gazetteer's population cut, so only its state is known
+    assert store.decode("geo", store.geo) == ["Virginia", "Moscow, Russia", "Paris, France"]
+    assert store.precision.tolist() == [geocode.REGION, geocode.PLACE, geocode.PLACE]
+    assert abs(store.lat[2] - 48.8534) < 1e-4
+    assert store.text("summary", 1) == "Crashed in fog.\nSecond line of the summary." and store.text("summary", 2) == ""
+
+    fog, engine = crash_store.CAUSES.index("Fog"), crash_store.CAUSES.index("Engine Failure")
+    assert store.causes[0] == 1 << engine and store.causes[1] == 1 << fog
+
+    assert crash_store.build_store(str(csv_path), store_dir) == "fresh"
+
+
+def test_append_only_parses_new_rows_and_edits_rebuild(tmp_path):
+    csv_path, store_dir = tmp_path / "crashes.csv", str(tmp_path / "store")
+    write_csv(csv_path, ROWS)
+    crash_store.build_store(str(csv_path), store_dir)
+
+    write_csv(csv_path, ROWS + [APPENDED])
+    assert crash_store.build_store(str(csv_path), store_dir) == "appended"
+    store = crash_store.CrashStore(store_dir)
+    assert len(store) == 4
+    assert store.date[3] == crash_store.MISSING_DATE and store.year[3] == 0
+    assert store.decode("geo", store.geo[3:]) == ["Cairo, Egypt"]
+    assert store.text("summary", 3) == "Shot down near Cairo"
+
+    # Editing an existing row invalidates the prefix, so the store is rebuilt
+    write_csv(csv_path, [ROWS[0].replace("1908", "1909")] + ROWS[1:] + [APPENDED])
+    assert crash_store.build_store(str(csv_path), store_dir) == "rebuilt"
+    assert crash_store.CrashStore(store_dir).year[0] == 1909
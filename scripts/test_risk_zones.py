@@ -0,0 +1,69 @@
+import os
+import sys
+
+import numpy as np
+
+# Add scripts to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import geocode
+import risk_zones
+
+
+def test_dbscan_finds_dense_clusters_and_noise():
+    rng = np.random.default_rng(3)
+    # Two tight clusters, one straddling the antimeridian, plus scattered points
+    lats = np.concatenate([rng.normal(40, 0.1, 20), rng.normal(-10, 0.1, 20), [0.0, 60.0, -45.0]])
+    lons = np.concatenate([rng.normal(-74, 0.1, 20), rng.normal(0, 0.1, 20) + np.where(np.arange(20) % 2, 179.95, -179.95),
+                           [100.0, 20.0, 60.0]])
+    labels = risk_zones.dbscan(lats, lons, np.ones(len(lats)), eps_km=60, min_weight=5)
+
+    assert len(set(labels[:20].tolist())) == 1 and len(set(labels[20:40].tolist())) == 1
+    assert labels[0] != labels[20] and labels.min() == -1
+    assert (labels[40:] == -1).all()
+
+
+def test_dbscan_weights_count_toward_core_points():
+    labels = risk_zones.dbscan([10.0, 10.1], [20.0, 20.1], [4, 1], eps_km=60, min_weight=5)
+    assert labels.tolist() == [0, 0]
+    assert risk_zones.dbscan([10.0, 12.0], [20.0, 20.0], [4, 1], eps_km=60, min_weight=5).tolist() == [-1, -1]
+
+
+def test_chained_clusters_are_split_to_bounded_extent():
+    # Points every 20 km along 600 km of the equator: DBSCAN chains them into one cluster
+    lons = np.arange(31) * 20 / 111.195
+    lats = np.zeros(31)
+    weights = np.ones(31)
+    labels = risk_zones.dbscan(lats, lons, weights, eps_km=60, min_weight=3)
+    assert set(labels.tolist()) == {0}
+
+    vectors = risk_zones.unit_vectors(lats, lons)
+    parts = risk_zones.bound_extent(vectors, weights, np.arange(31), 120)
+    assert len(parts) > 2
+    assert sorted(np.concatenate(parts).tolist()) == list(range(31))
+    for part in parts:
+        centre = risk_zones._centroid(vectors[part], weights[part])
+        assert risk_zones._radius_km(vectors[part], centre) <= 120
+        # Contiguous stretches, not interleaved points
+        assert np.ptp(part) == len(part) - 1
+
+
+def test_grid_neighbors_match_brute_force():
+    rng = np.random.default_rng(4)
+    vectors = risk_zones.unit_vectors(rng.uniform(-89, 89, 300), rng.uniform(-180, 180, 300))
+    neighbors = risk_zones.grid_neighbors(vectors, 800)
+    chord = 2 * np.sin(800 / (2 * risk_zones.EARTH_RADIUS_KM))
+    d2 = ((vectors[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+    for i, found in enumerate(neighbors):
+        assert sorted(found.tolist()) == np.flatnonzero(d2[i] <= chord * chord).tolist()
+
+
+def test_geocode_resolves_crash_record_locations():
+    assert geocode.geocode("Near Moscow, Russia")[0] == "Moscow, Russia"
+    assert geocode.geocode("Charlotte, North Carolina")[0] == "Charlotte, North Carolina"
+    assert geocode.geocode("Bogata, Colombia")[0] == "Bogotá, Colombia"
+    assert geocode.geocode("Off Rio de Janeiro, Brazil")[0] == "Rio de Janeiro, Brazil"
+    assert geocode.geocode("AtlantiOcean")[3] == geocode.WATER
+    label, _, _, precision = geocode.geocode("Fort Myer, Virginia")
+    assert (label, precision) == ("Virginia", geocode.REGION)
+    assert geocode.geocode("") is None
@@ -79,6 +79,24 @@ export function useFlightData(refreshInterval = 30000) {
       // Parse to internal AircraftState
       const parsed = parseAircraftStates(uniqueRaw);
 
+      // Feed the backend EKF track store (fire-and-forget; drift runs look tracks up by icao24)
+      if (parsed.length > 0) {
+        fetch('/api/tracks/observe', {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({
+            observations: parsed.map((a) => ({
+              flight_id: a.icao24,
+              lat: a.latitude,
+              lon: a.longitude,
+              t: a.lastContact,
+              speed_ms: a.velocity,
+              track_deg: a.trueTrack,
+            })),
+          }),
+        }).catch(() => {});
+      }
+
       if (parsed.length > 0) {
         setAircraft(parsed);
         setLastUpdate(new Date());
@@ -27,8 +27,8 @@ echo "🌟 Starting Services..."
 echo "   - Backend: http://localhost:8000"
 echo "   - Frontend: http://localhost:8080"
 
-# Run backend in background
-python3 backend/server.py &
+# Run backend in background (long-running, so keep the live AIS feed on)
+AIS_BACKGROUND=1 python3 backend/server.py &
 BACKEND_PID=$!
 
 # Run frontend